@@ -0,0 +1,289 @@
+"""Benchmark the registry, server manager and desktop agent on synthetic data
+
+Run from the repository root:
+
+    python -m benchmarks.run --sizes 1000 10000 --output results.json
+
+Everything runs against a temporary HOME, so the real ~/.mcphub and Claude
+config are never touched. Results are JSON, one record per benchmark, so two
+runs can be compared between commits.
+"""
+import argparse
+import asyncio
+import functools
+import http.server
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import yaml
+
+from .synthetic import synthetic_installed, synthetic_registry, write_claude_config, write_config_yaml
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+AGENT_MAIN = REPO_ROOT / "desktop-agent" / "src" / "main.py"
+
+SEARCH_QUERIES = ["git", "postgres vector", "kubernets", "calendar email server", "mcp"]
+
+
+def measure(fn: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict:
+    """Time fn repeat times, running setup untimed before each call"""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "repeat": repeat,
+        "min_ms": min(samples),
+        "median_ms": statistics.median(samples),
+        "mean_ms": statistics.fmean(samples),
+        "max_ms": max(samples),
+    }
+
+
+class Results:
+    def __init__(self):
+        self.records: List[Dict] = []
+
+    def add(self, name: str, params: Dict, timing: Dict):
+        record = {"name": name, "params": params, **timing}
+        self.records.append(record)
+        print(f"{name:<40} {json.dumps(params):<30} median {timing['median_ms']:10.3f} ms", file=sys.stderr)
+
+
+class StaticServer:
+    """Serve a directory over HTTP in a background thread, with If-Modified-Since support"""
+
+    def __init__(self, directory: Path):
+        handler = functools.partial(QuietHandler, directory=str(directory))
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def bench_registry(results: Results, size: int, home: Path, repeat: int):
+    from mcphub.core.registry import MCPRegistry
+    from mcphub.core.registry_shards import build_shards
+
+    registry_dir = home / "served-registry"
+    registry_dir.mkdir()
+    registry = synthetic_registry(size)
+    with open(registry_dir / "servers.yaml", "w") as f:
+        yaml.safe_dump(registry, f, sort_keys=False)
+    build_shards(registry["servers"], registry_dir)
+
+    server = StaticServer(registry_dir)
+    params = {"servers": size}
+    try:
+        for layout, filename in (("monolithic", "servers.yaml"), ("sharded", "index.yaml")):
+            url = server.url + filename
+
+            def cold():
+                registry_client = MCPRegistry(url)
+                registry_client.cache_file.unlink(missing_ok=True)
+                return registry_client
+
+            clients = []
+            results.add(f"fetch_registry.miss.{layout}", params,
+                        measure(lambda: clients[-1].fetch_registry(), repeat,
+                                setup=lambda: clients.append(cold())))
+
+            warm = clients[-1]
+            results.add(f"fetch_registry.hit_memory.{layout}", params,
+                        measure(warm.fetch_registry, repeat))
+            results.add(f"fetch_registry.hit_disk.{layout}", params,
+                        measure(lambda: MCPRegistry(url).fetch_registry(), repeat))
+            results.add(f"fetch_registry.revalidate.{layout}", params,
+                        measure(lambda: warm.fetch_registry(force_refresh=True), repeat))
+
+        warm = MCPRegistry(server.url + "index.yaml")
+        warm.fetch_registry()
+        results.add("search_servers.build_index", params,
+                    measure(lambda: warm.get_search_index(), 1,
+                            setup=lambda: setattr(warm, "_search_index", None)))
+        for query in SEARCH_QUERIES:
+            results.add("search_servers", dict(params, query=query),
+                        measure(lambda: warm.search_servers(query, limit=50), repeat))
+
+        names = [entry["name"] for entry in registry["servers"]]
+        for position, name in (("first", names[0]), ("last", names[-1]), ("missing", "No Such Server")):
+            results.add("get_server_metadata", dict(params, position=position),
+                        measure(lambda: warm.get_server_metadata(name), repeat))
+    finally:
+        server.close()
+
+
+def bench_manager(results: Results, installed_count: int, home: Path, repeat: int):
+    from mcphub.core.server_manager import ServerManager
+
+    servers = synthetic_registry(installed_count, seed=1)["servers"]
+    installed = synthetic_installed(servers, home / ".mcphub" / "servers")
+    write_config_yaml(home / ".mcphub" / "config.yaml", installed)
+
+    manager = ServerManager()
+    write_claude_config(manager.claude_config_file, installed)
+    params = {"installed": installed_count}
+
+    results.add("get_installed_servers.cold", params,
+                measure(lambda: ServerManager().get_installed_servers(), repeat))
+    results.add("get_installed_servers.warm", params,
+                measure(manager.get_installed_servers, repeat))
+
+    names = list(installed)
+    counter = iter(range(10 ** 9))
+
+    def update_one():
+        name = names[next(counter) % len(names)]
+        config = dict(installed[name], env={"TOKEN": str(time.time())})
+        manager.update_claude_config(name, config)
+
+    results.add("update_claude_config", params, measure(update_one, repeat))
+    manager.flush_config()
+
+
+def load_agent_app():
+    spec = importlib.util.spec_from_file_location("mcphub_desktop_agent", AGENT_MAIN)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def bench_agent(results: Results, installed_count: int, home: Path, repeat: int):
+    import httpx
+
+    from mcphub.core.claude_config import get_claude_config_path
+
+    servers = synthetic_registry(installed_count, seed=2)["servers"]
+    installed = synthetic_installed(servers, home / ".mcphub" / "servers")
+    write_claude_config(get_claude_config_path(), installed)
+    params = {"installed": installed_count}
+    app = load_agent_app()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://agent") as client:
+            async def timed(name: str, request: Callable, extra: Optional[Dict] = None):
+                samples = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    response = await request()
+                    samples.append((time.perf_counter() - start) * 1000)
+                    if response.status_code >= 400:
+                        raise RuntimeError(f"{name} returned {response.status_code}: {response.text}")
+                results.add(name, dict(params, **(extra or {})), {
+                    "repeat": repeat,
+                    "min_ms": min(samples),
+                    "median_ms": statistics.median(samples),
+                    "mean_ms": statistics.fmean(samples),
+                    "max_ms": max(samples),
+                })
+
+            await timed("agent.GET /health", lambda: client.get("/health"))
+            await timed("agent.GET /config", lambda: client.get("/config"))
+
+            config = (await client.get("/config")).json()
+            await timed("agent.POST /config", lambda: client.post("/config", json={"config": config}))
+
+            entry = {"command": "node", "args": ["bench"], "env": {}}
+            await timed("agent.PUT /config/servers/{name}",
+                        lambda: client.put("/config/servers/bench-server", json=entry))
+
+            # One config write for the whole batch, compared with one per PUT above
+            operations = [{"op": "patch", "name": f"bench-batch-{i}", "entry": entry} for i in range(50)]
+            await timed("agent.POST /batch", lambda: client.post("/batch", json={"operations": operations}),
+                        {"operations": len(operations)})
+
+            names = iter(list(installed))
+            await timed("agent.DELETE /uninstall/{name}",
+                        lambda: client.delete(f"/uninstall/{next(names)}"))
+            await timed("agent.GET /jobs", lambda: client.get("/jobs"))
+
+    asyncio.run(run())
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def with_home(fn: Callable[[Path], None]):
+    """Run fn with HOME pointing at a fresh temporary directory"""
+    previous = os.environ.get("HOME")
+    home = Path(tempfile.mkdtemp(prefix="mcphub-bench-"))
+    os.environ["HOME"] = str(home)
+    try:
+        fn(home)
+    finally:
+        if previous is None:
+            os.environ.pop("HOME", None)
+        else:
+            os.environ["HOME"] = previous
+        shutil.rmtree(home, ignore_errors=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark mcphub on synthetic registries and configs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Registry sizes to benchmark (default: 1000 10000 100000)")
+    parser.add_argument("--installed", type=int, nargs="+", default=[100, 500],
+                        help="Installed server counts for config benchmarks (default: 100 500)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark (default: 5)")
+    parser.add_argument("--skip-agent", action="store_true", help="Skip the desktop agent endpoints")
+    parser.add_argument("--output", type=Path, help="Write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = Results()
+    for size in args.sizes:
+        with_home(lambda home: bench_registry(results, size, home, args.repeat))
+    for count in args.installed:
+        with_home(lambda home: bench_manager(results, count, home, args.repeat))
+        if not args.skip_agent:
+            with_home(lambda home: bench_agent(results, count, home, args.repeat))
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "libyaml": hasattr(yaml, "CSafeLoader"),
+            "repeat": args.repeat,
+        },
+        "results": results.records,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(payload + "\n")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import json
+import random
+from pathlib import Path
+from typing import Dict, List
+
+import yaml
+
+from mcphub.core.slug import server_slug
+
+WORDS = [
+    "atlas", "git", "github", "slack", "postgres", "sqlite", "redis", "search", "browser", "files",
+    "memory", "notes", "calendar", "email", "docker", "kubernetes", "weather", "maps", "finance",
+    "translate", "vector", "embeddings", "scraper", "jira", "linear", "notion", "drive", "s3",
+    "metrics", "logs", "tasks", "shell", "python", "node", "rust", "graph", "time", "fetch",
+]
+
+TAGS = [
+    "task-management", "organization", "git", "version-control", "database", "productivity",
+    "communication", "devops", "cloud", "search", "ai", "storage", "monitoring", "web",
+]
+
+
+def synthetic_server(rng: random.Random, index: int) -> Dict:
+    """One registry entry shaped like registry/servers.yaml"""
+    words = rng.sample(WORDS, 2)
+    runtime = rng.choice(["python", "node"])
+    slug = f"{words[0]}-{words[1]}-{index}"
+    server = {
+        "name": f"{words[0].title()} {words[1].title()} MCP Server {index}",
+        "description": " ".join(rng.choice(WORDS) for _ in range(12)),
+        "repository": f"https://github.com/example/{slug}-mcp-server",
+        "version": f"{rng.randint(0, 3)}.{rng.randint(0, 20)}.{rng.randint(0, 9)}",
+        "tags": rng.sample(TAGS, 3),
+        "runtime": runtime,
+        "default_config": {"port": 8000 + index % 1000, "auth_token": ""},
+    }
+    if runtime == "python":
+        server["install_command"] = "python3"
+        server["command_args"] = ["-m", slug.replace("-", "_")]
+    else:
+        server["install_command"] = "npm"
+        server["install_args"] = ["install", "-g", f"@example/{slug}"]
+        server["command_args"] = [f"@example/{slug}"]
+    return server
+
+
+def synthetic_registry(count: int, seed: int = 0) -> Dict:
+    rng = random.Random(seed)
+    return {"servers": [synthetic_server(rng, i) for i in range(count)]}
+
+
+def synthetic_installed(servers: List[Dict], install_root: Path) -> Dict[str, Dict]:
+    """installed_servers entries as ServerManager.install_server records them"""
+    installed = {}
+    for server in servers:
+        name = server_slug(server["name"])
+        installed[name] = {
+            "version": server["version"],
+            "port": server["default_config"]["port"],
+            "auth_token": "",
+            "enabled": True,
+            "install_path": str(install_root / name),
+            "runtime": server["runtime"],
+            "command_args": list(server["command_args"]),
+            "env": {},
+        }
+    return installed
+
+
+def write_config_yaml(path: Path, installed: Dict[str, Dict]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        yaml.safe_dump({"installed_servers": installed}, f)
+
+
+def write_claude_config(path: Path, installed: Dict[str, Dict]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    servers = {
+        name: {"command": "node", "args": data["command_args"], "env": {}}
+        for name, data in installed.items()
+    }
+    with open(path, "w") as f:
+        json.dump({"mcpServers": servers}, f, indent=2)
@@ -10,17 +10,38 @@ const configPaths = {
 
 // Connect to native messaging host
 let port = null;
+// Requests waiting for their reply, by id; the host may answer them in any order
+let nextRequestId = 1;
+const pendingRequests = new Map();
 
 function connectNativeHost() {
   port = chrome.runtime.connectNative(hostName);
   
   port.onMessage.addListener((msg) => {
     console.log('Received from native host:', msg);
+    const resolve = pendingRequests.get(msg.id);
+    if (resolve) {
+      pendingRequests.delete(msg.id);
+      resolve(msg);
+    }
   });
 
   port.onDisconnect.addListener(() => {
     console.log('Disconnected from native host');
     port = null;
+    for (const resolve of pendingRequests.values()) {
+      resolve({ success: false, error: 'Disconnected from native host' });
+    }
+    pendingRequests.clear();
+  });
+}
+
+// Send a message to the native host and wait for the reply with the same id
+function sendNativeRequest(message) {
+  return new Promise((resolve) => {
+    const id = nextRequestId++;
+    pendingRequests.set(id, resolve);
+    port.postMessage({ ...message, id });
   });
 }
 
@@ -68,6 +89,15 @@ chrome.runtime.onMessageExternal.addListener(
         }
         break;
 
+      case 'BATCH':
+        try {
+          const results = await runBatch(request.operations);
+          sendResponse({ success: results.every((result) => result.status === 'ok'), results });
+        } catch (error) {
+          sendResponse({ success: false, error: error.message });
+        }
+        break;
+
       default:
         sendResponse({ success: false, error: 'Unknown request type' });
     }
@@ -76,57 +106,39 @@ chrome.runtime.onMessageExternal.addListener(
 );
 
 async function getConfig() {
-  return new Promise((resolve, reject) => {
-    port.postMessage({ type: 'GET_CONFIG' });
-    port.onMessage.addListener(function listener(response) {
-      port.onMessage.removeListener(listener);
-      if (response.success) {
-        resolve(response.data);
-      } else {
-        reject(new Error(response.error));
-      }
-    });
-  });
+  const response = await sendNativeRequest({ type: 'GET_CONFIG' });
+  if (!response.success) {
+    throw new Error(response.error);
+  }
+  return response.data;
 }
 
 async function updateConfig(config) {
-  return new Promise((resolve, reject) => {
-    port.postMessage({ type: 'UPDATE_CONFIG', config });
-    port.onMessage.addListener(function listener(response) {
-      port.onMessage.removeListener(listener);
-      if (response.success) {
-        resolve();
-      } else {
-        reject(new Error(response.error));
-      }
-    });
-  });
+  const response = await sendNativeRequest({ type: 'UPDATE_CONFIG', config });
+  if (!response.success) {
+    throw new Error(response.error);
+  }
 }
 
 async function installServer(server) {
-  return new Promise((resolve, reject) => {
-    port.postMessage({ type: 'INSTALL_SERVER', server });
-    port.onMessage.addListener(function listener(response) {
-      port.onMessage.removeListener(listener);
-      if (response.success) {
-        resolve();
-      } else {
-        reject(new Error(response.error));
-      }
-    });
-  });
+  const response = await sendNativeRequest({ type: 'INSTALL_SERVER', server });
+  if (!response.success) {
+    throw new Error(response.error);
+  }
 }
 
 async function uninstallServer(serverName) {
-  return new Promise((resolve, reject) => {
-    port.postMessage({ type: 'UNINSTALL_SERVER', serverName });
-    port.onMessage.addListener(function listener(response) {
-      port.onMessage.removeListener(listener);
-      if (response.success) {
-        resolve();
-      } else {
-        reject(new Error(response.error));
-      }
-    });
-  });
+  const response = await sendNativeRequest({ type: 'UNINSTALL_SERVER', serverName });
+  if (!response.success) {
+    throw new Error(response.error);
+  }
+}
+
+// Apply several install, uninstall and config patch operations with a single config write
+async function runBatch(operations) {
+  const response = await sendNativeRequest({ type: 'BATCH', operations });
+  if (!response.results) {
+    throw new Error(response.error);
+  }
+  return response.results;
 }
@@ -10,7 +10,8 @@ setup(
         "pydantic>=1.8.0",
         "python-dotenv>=0.19.0",
         "requests>=2.26.0",
-        "typing-extensions>=4.0.0"
+        "typing-extensions>=4.0.0",
+        "mcphub>=0.1.0"
     ],
     entry_points={
         'console_scripts': [
@@ -1,16 +1,88 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import uvicorn
+import argparse
+import asyncio
 import os
+import socket
+import struct
+import threading
 import json
+import shutil
 import subprocess
 import sys
-from typing import Dict, List, Optional
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from pathlib import Path
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+from mcphub.core import metrics
+from mcphub.core.artifact_cache import ArtifactCache
+from mcphub.core.claude_config import ClaudeConfigFile, ConfigConflictError, config_version, get_claude_config_path
+from mcphub.core.config_watcher import ConfigWatcher, config_files
+from mcphub.core.monitor import HealthMonitor, targets_from_claude_config
+from mcphub.core.reconcile import load_owned_entries
+from mcphub.core.slug import claude_entry_updates, server_slug
 
 app = FastAPI()
 
+# Shared with the mcphub GUI so both install from the same package cache
+artifact_cache = ArtifactCache()
+
+# Number of installs allowed to run their package managers at once
+MAX_CONCURRENT_INSTALLS = int(os.environ.get("MCPHUB_AGENT_MAX_INSTALLS", "4"))
+# Finished jobs kept for GET /jobs/{id}
+MAX_FINISHED_JOBS = 200
+# Unix socket the native messaging host forwards extension requests to in --daemon mode
+DEFAULT_SOCKET_PATH = Path(os.environ.get("MCPHUB_AGENT_SOCKET", Path.home() / ".mcphub" / "agent.sock"))
+# mcphub's own config, which records the Claude config entries it owns
+MCPHUB_CONFIG_PATH = Path.home() / ".mcphub" / "config.yaml"
+# Largest message Chrome sends to a native messaging host
+MAX_NATIVE_MESSAGE = 64 * 1024 * 1024
+# Largest reply a native messaging host may send back to Chrome
+MAX_NATIVE_REPLY = 1024 * 1024
+# Seconds between keep-alive comments on idle event streams
+EVENTS_KEEPALIVE = 15.0
+
+REQUEST_DURATION = metrics.REGISTRY.histogram(
+    "mcphub_agent_request_duration_seconds", "Agent request latency by route", ["method", "route", "status"]
+)
+REQUESTS_IN_FLIGHT = metrics.REGISTRY.gauge("mcphub_agent_requests_in_flight", "Agent requests being served")
+INSTALL_JOBS = metrics.REGISTRY.counter("mcphub_agent_install_jobs_total", "Finished install jobs", ["status"])
+
+class MetricsMiddleware:
+    """Records per-route latency and in-flight requests; a pass-through when metrics are disabled"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.REGISTRY.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        with REQUESTS_IN_FLIGHT.labels().track():
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # The route template, not the raw path, keeps label cardinality bounded
+                route = getattr(scope.get("route"), "path", "unmatched")
+                REQUEST_DURATION.labels(scope["method"], route, status["code"]).observe(
+                    time.perf_counter() - started
+                )
+
+app.add_middleware(MetricsMiddleware)
+
 # Allow CORS for web UI
 app.add_middleware(
     CORSMiddleware,
@@ -22,24 +94,56 @@ app.add_middleware(
 
 def get_config_path() -> Path:
     """Get the path to the Claude config file based on the operating system"""
-    if sys.platform == "win32":
-        base_path = Path(os.environ["APPDATA"])
-    elif sys.platform == "darwin":
-        base_path = Path.home() / "Library" / "Application Support"
-    else:  # Linux and others
-        base_path = Path.home() / ".config"
+    return get_claude_config_path()
 
-    config_path = base_path / "Claude" / "claude_desktop_config.json"
-    return config_path
+def get_config_file() -> ClaudeConfigFile:
+    """Get the locked, versioned handle on the Claude config file"""
+    return ClaudeConfigFile(get_config_path())
 
 def ensure_config_exists():
-    """Ensure the config file and directory exist"""
-    config_path = get_config_path()
-    config_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    if not config_path.exists():
-        with open(config_path, 'w') as f:
-            json.dump({"mcpServers": {}}, f)
+    """Ensure the config file and its mcpServers key exist"""
+    get_config_file().patch_servers({})
+
+class ConfigCache:
+    """Parsed Claude config kept in memory and revalidated with one stat per read
+
+    Writers replace the file by renaming a temporary file over it, so a
+    changed inode, size or mtime means the file must be parsed again.
+    Callers must not mutate the returned config.
+    """
+
+    def __init__(self):
+        self._key: Optional[Tuple] = None
+        self._config: Dict = {}
+        self._version = ""
+        self._lock = threading.Lock()
+
+    def read(self) -> Tuple[Dict, str]:
+        """Return the config and its version, creating the file if it does not exist"""
+        path = get_config_path()
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            ensure_config_exists()
+            st = os.stat(path)
+        key = (str(path), st.st_ino, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            if key == self._key:
+                return self._config, self._version
+        with open(path, "rb") as f:
+            raw = f.read()
+        config = json.loads(raw) if raw.strip() else {}
+        version = config_version(raw)
+        with self._lock:
+            # If the file was replaced after the stat, its new key makes the next read reparse it
+            self._key, self._config, self._version = key, config, version
+        return config, version
+
+    def invalidate(self):
+        with self._lock:
+            self._key = None
+
+config_cache = ConfigCache()
 
 class ServerConfig(BaseModel):
     name: str
@@ -52,99 +156,625 @@ class ServerConfig(BaseModel):
     install_args: Optional[List[str]] = None
     command_args: List[str]
     default_config: Dict
+    offline: bool = False
 
 class ConfigUpdate(BaseModel):
     config: Dict
 
+class InstallJob:
+    """A background install and the output of the commands it ran"""
+
+    def __init__(self, server_name: str):
+        self.id = uuid.uuid4().hex
+        self.server_name = server_name
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.logs: List[str] = []
+        self.subscribers: List[asyncio.Queue] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def log(self, line: str):
+        self.logs.append(line)
+        for queue in self.subscribers:
+            queue.put_nowait(line)
+
+    def finish(self, status: str, error: Optional[str] = None):
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+        for queue in self.subscribers:
+            queue.put_nowait(None)
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "server": self.server_name,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "logs": self.logs,
+        }
+
+class JobManager:
+    """Runs install jobs in the background with a bounded number running at once"""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.jobs: Dict[str, InstallJob] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks = set()
+
+    def submit(self, job: InstallJob, steps) -> InstallJob:
+        """Schedule the coroutine function steps(job) and return immediately"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.jobs[job.id] = job
+        task = asyncio.get_event_loop().create_task(self._run(job, steps))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: InstallJob, steps):
+        async with self._semaphore:
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                with metrics.timed("agent_install"):
+                    await steps(job)
+                job.finish("succeeded")
+            except Exception as e:
+                job.log(f"error: {e}")
+                job.finish("failed", str(e))
+        INSTALL_JOBS.labels(job.status).inc()
+        self._prune()
+
+    def _prune(self):
+        finished = [job for job in self.jobs.values() if job.finished]
+        for job in sorted(finished, key=lambda j: j.finished_at)[:-MAX_FINISHED_JOBS]:
+            del self.jobs[job.id]
+
+    async def run_command(self, job: InstallJob, command: List[str], cwd: Optional[str] = None):
+        """Run a command without blocking the event loop, streaming its output into the job log"""
+        job.log(f"$ {' '.join(command)}")
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            *command, cwd=cwd,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        )
+        async for line in process.stdout:
+            job.log(line.decode(errors="replace").rstrip())
+        returncode = await process.wait()
+        metrics.observe_subprocess(command, time.perf_counter() - started, returncode)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, command)
+
+    async def follow(self, job: InstallJob) -> AsyncIterator[Optional[str]]:
+        """Yield the job's log lines so far and then new ones until it finishes"""
+        queue: asyncio.Queue = asyncio.Queue()
+        backlog = list(job.logs)
+        if not job.finished:
+            job.subscribers.append(queue)
+        try:
+            for line in backlog:
+                yield line
+            if job.finished:
+                return
+            while True:
+                line = await queue.get()
+                if line is None:
+                    return
+                yield line
+        finally:
+            if queue in job.subscribers:
+                job.subscribers.remove(queue)
+
+job_manager = JobManager(MAX_CONCURRENT_INSTALLS)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def get_metrics(request: Request):
+    """Prometheus metrics, or OpenMetrics when the scraper asks for it"""
+    openmetrics = "application/openmetrics-text" in request.headers.get("accept", "")
+    return Response(
+        metrics.REGISTRY.render(openmetrics=openmetrics),
+        media_type=metrics.OPENMETRICS_CONTENT_TYPE if openmetrics else metrics.PROMETHEUS_CONTENT_TYPE
+    )
+
 @app.get("/config")
-async def get_config():
-    """Get Claude desktop config"""
+def get_config(response: Response):
+    """Get Claude desktop config, with its version in the ETag header"""
     try:
-        ensure_config_exists()
-        config_path = get_config_path()
-        
-        with open(config_path, 'r') as f:
-            config = json.load(f)
-            
-        # Ensure mcpServers key exists
-        if "mcpServers" not in config:
-            config["mcpServers"] = {}
-            with open(config_path, 'w') as f:
-                json.dump(config, f, indent=2)
-                
+        config, version = config_cache.read()
+        response.headers["ETag"] = f'"{version}"'
         return config
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/config")
-async def update_config(config_update: ConfigUpdate):
-    """Update Claude desktop config"""
+def update_config(config_update: ConfigUpdate, response: Response,
+                        if_match: Optional[str] = Header(None)):
+    """Update Claude desktop config, failing with 409 if If-Match is stale"""
     try:
-        ensure_config_exists()
-        config_path = get_config_path()
-        
-        with open(config_path, 'w') as f:
-            json.dump(config_update.config, f, indent=2)
+        expected_version = if_match.strip('"') if if_match else None
+        version = get_config_file().write(config_update.config, expected_version)
+        response.headers["ETag"] = f'"{version}"'
         return {"status": "success"}
+    except ConfigConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/install")
-async def install_server(server: ServerConfig):
-    """Install MCP server"""
+@app.put("/config/servers/{server_name}")
+def put_server_config(server_name: str, entry: Dict):
+    """Set a single mcpServers entry without rewriting the rest of the file"""
     try:
-        if server.runtime == "node":
-            if server.install_args:
-                subprocess.run([server.install_command, *server.install_args], check=True)
-            else:
-                subprocess.run(["npm", "install", "-g", server.repository], check=True)
-        else:  # python
-            if server.install_args:
-                subprocess.run([sys.executable, "-m", "pip", "install", *server.install_args], check=True)
-            else:
-                subprocess.run([sys.executable, "-m", "pip", "install", "-e", "."], cwd=server.repository, check=True)
-        
-        # Update Claude config
-        config = await get_config()
-        config["mcpServers"] = config.get("mcpServers", {})
-        
-        # Extract env from default_config if it exists
-        env = server.default_config.get("env", {})
-        
-        config["mcpServers"][server.name] = {
-            "command": server.install_command,
-            "args": server.command_args,
-            "env": env,
-            "port": server.default_config.get("port", 8000),
-            "auth_token": server.default_config.get("auth_token", "")
-        }
-        
-        await update_config(ConfigUpdate(config=config))
+        get_config_file().patch_server(server_name, entry)
         return {"status": "success"}
-    except subprocess.CalledProcessError as e:
-        raise HTTPException(status_code=500, detail=f"Installation failed: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def run_package_steps(job: InstallJob, server: ServerConfig):
+    """Install a server's packages without touching the Claude config"""
+    if server.runtime == "node":
+        if server.install_args and server.install_command == "npm":
+            await job_manager.run_command(job, artifact_cache.npm_command(server.install_args, server.offline))
+        elif server.install_args:
+            await job_manager.run_command(job, [server.install_command, *server.install_args])
+        else:
+            await job_manager.run_command(
+                job, artifact_cache.npm_command(["install", "-g", server.repository], server.offline)
+            )
+    else:  # python
+        if server.install_args:
+            install = artifact_cache.pip_install_command(server.install_args)
+            if not artifact_cache.is_cacheable(server.install_args) or server.offline:
+                await job_manager.run_command(job, install)
+                return
+            # The package index is only asked when the wheelhouse cannot satisfy the install
+            try:
+                await job_manager.run_command(job, install)
+                return
+            except subprocess.CalledProcessError:
+                job.log("Not everything is cached yet, building wheels")
+            staging = await run_in_threadpool(artifact_cache.staging_dir)
+            try:
+                await job_manager.run_command(job, artifact_cache.pip_wheel_command(server.install_args, staging))
+                await run_in_threadpool(artifact_cache.ingest, staging)
+            finally:
+                await run_in_threadpool(shutil.rmtree, staging, True)
+            await job_manager.run_command(job, install)
+        else:
+            await job_manager.run_command(
+                job, [sys.executable, "-m", "pip", "install", "-e", "."], cwd=server.repository
+            )
+
+def server_entry(server: ServerConfig) -> Dict:
+    """The mcpServers entry of an installed server"""
+    return {
+        "command": server.install_command,
+        "args": server.command_args,
+        # Extract env from default_config if it exists
+        "env": server.default_config.get("env", {}),
+        "port": server.default_config.get("port", 8000),
+        "auth_token": server.default_config.get("auth_token", "")
+    }
+
+async def run_install_steps(job: InstallJob, server: ServerConfig):
+    """Install a server's packages and register it in the Claude config"""
+    await run_package_steps(job, server)
+    # Update only this server's entry in the Claude config
+    await run_in_threadpool(get_config_file().patch_servers, claude_entry_updates(server.name, server_entry(server)))
+    job.log(f"Installed {server.name}")
+
+@app.post("/install", status_code=202)
+async def install_server(server: ServerConfig):
+    """Start installing an MCP server in the background and return its job ID"""
+    job = job_manager.submit(InstallJob(server.name), lambda job: run_install_steps(job, server))
+    return {"status": "accepted", "job_id": job.id}
+
+class BatchOperation(BaseModel):
+    op: str  # 'install', 'uninstall' or 'patch'
+    server: Optional[ServerConfig] = None  # install
+    name: Optional[str] = None  # uninstall and patch
+    entry: Optional[Dict] = None  # patch; null removes the entry
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
+async def wait_for_job(job: InstallJob):
+    async for _ in job_manager.follow(job):
+        pass
+
+async def run_batch(operations: List[BatchOperation]) -> List[Dict]:
+    """Apply operations in order with one config read and one atomic write
+
+    Installs run their package steps concurrently, bounded by the job
+    manager, and only successful installs are added to the config.
+    """
+    results = [{"op": op.op, "name": op.server.name if op.server else op.name, "status": "ok"}
+               for op in operations]
+    jobs: Dict[int, InstallJob] = {}
+    for index, op in enumerate(operations):
+        if op.op == "install" and op.server is not None:
+            server = op.server
+            jobs[index] = job_manager.submit(
+                InstallJob(server.name), lambda job, server=server: run_package_steps(job, server)
+            )
+    await asyncio.gather(*(wait_for_job(job) for job in jobs.values()))
+
+    config, _ = await run_in_threadpool(config_cache.read)
+    # Later operations see the effect of earlier ones, e.g. an uninstall after an install
+    servers = dict(config.get("mcpServers", {}))
+    updates: Dict[str, Optional[Dict]] = {}
+    for index, (op, result) in enumerate(zip(operations, results)):
+        if op.op == "install":
+            if op.server is None:
+                result.update(status="error", error="install needs a server")
+                continue
+            job = jobs[index]
+            result["job_id"] = job.id
+            if job.status != "succeeded":
+                result.update(status="error", error=job.error)
+                continue
+            key = server_slug(op.server.name)
+            # Also drops an entry an earlier release keyed by display name
+            op_updates = claude_entry_updates(op.server.name, server_entry(op.server))
+        elif op.op == "uninstall" and op.name:
+            # Accept the config key itself or the registry name it was installed under
+            key = op.name if op.name in servers else server_slug(op.name)
+            if key not in servers:
+                result.update(status="not_found", error="Server not found")
+                continue
+            op_updates = {key: None}
+        elif op.op == "patch" and op.name:
+            key, op_updates = op.name, {op.name: op.entry}
+        else:
+            result.update(status="error", error=f"Invalid operation {op.op!r}")
+            continue
+        result["key"] = key
+        for name, entry in op_updates.items():
+            updates[name] = entry
+            if entry is None:
+                servers.pop(name, None)
+            else:
+                servers[name] = entry
+
+    if updates:
+        try:
+            version = await run_in_threadpool(get_config_file().patch_servers, updates)
+        except Exception as e:
+            for result in results:
+                if result["status"] == "ok":
+                    result.update(status="error", error=f"Config write failed: {e}")
+        else:
+            for result in results:
+                if result["status"] == "ok":
+                    result["version"] = version
+    return results
+
+@app.post("/batch")
+async def batch(request: BatchRequest):
+    """Apply install, uninstall and config patch operations with a single config write"""
+    with metrics.timed("agent_batch"):
+        results = await run_batch(request.operations)
+    return {"status": "success" if all(r["status"] == "ok" for r in results) else "partial",
+            "results": results}
+
+@app.get("/jobs")
+async def list_jobs():
+    """List install jobs without their logs"""
+    return [dict(job.to_dict(), logs=None) for job in job_manager.jobs.values()]
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the status and log of an install job"""
+    job = job_manager.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/logs")
+async def stream_job_logs(job_id: str):
+    """Stream an install job's log as server-sent events until it finishes"""
+    job = job_manager.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        async for line in job_manager.follow(job):
+            yield f"data: {json.dumps(line)}\n\n"
+        yield f"event: end\ndata: {json.dumps({'status': job.status, 'error': job.error})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+def config_probe_targets():
+    config, _ = get_config_file().read()
+    return targets_from_claude_config(config, load_owned_entries(MCPHUB_CONFIG_PATH))
+
+# Checks the Claude config entries mcphub owns, and TCP entries; started by the first /status request
+health_monitor = HealthMonitor(config_probe_targets)
+
+@app.get("/status")
+async def server_status():
+    """Health, latency percentiles and error rate of each configured server"""
+    health_monitor.start()
+    await run_in_threadpool(health_monitor.wait_first_round, health_monitor.timeout + 1)
+    return {"rounds": health_monitor.rounds, "servers": health_monitor.status()}
+
+def remove_server(server_name: str) -> bool:
+    """Remove a server's entry from the Claude config, returning False if it is not there"""
+    config, _ = config_cache.read()
+    servers = config.get("mcpServers", {})
+    # Accept the config key itself or the registry name it was installed under
+    key = server_name if server_name in servers else server_slug(server_name)
+    if key not in servers:
+        return False
+    get_config_file().patch_server(key, None)
+    return True
+
+# Watches the Claude config and mcphub's config.yaml; started by the first /events subscriber
+config_watcher = ConfigWatcher(config_files(get_config_path(), MCPHUB_CONFIG_PATH))
+
+@app.get("/events")
+async def config_events(request: Request):
+    """Push a structural diff of the configs as a server-sent event whenever they change"""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    unsubscribe = config_watcher.subscribe(lambda change: loop.call_soon_threadsafe(queue.put_nowait, change))
+    await run_in_threadpool(config_watcher.start)
+
+    async def events():
+        try:
+            yield f"event: ready\ndata: {json.dumps({'backend': config_watcher.backend})}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    change = await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: config\ndata: {json.dumps(change.to_dict())}\n\n"
+        finally:
+            unsubscribe()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @app.delete("/uninstall/{server_name}")
-async def uninstall_server(server_name: str):
+def uninstall_server(server_name: str):
     """Uninstall MCP server"""
     try:
-        config = await get_config()
-        if "mcpServers" in config and server_name in config["mcpServers"]:
-            # Remove from Claude config
-            del config["mcpServers"][server_name]
-            await update_config(ConfigUpdate(config=config))
-            
+        if remove_server(server_name):
             return {"status": "success"}
         raise HTTPException(status_code=404, detail="Server not found")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Native messaging requests, forwarded by native-host/host.js in the extension's message format
+
+async def native_get_config(message: Dict) -> Dict:
+    config, version = await run_in_threadpool(config_cache.read)
+    return {"success": True, "data": config, "version": version}
+
+async def native_update_config(message: Dict) -> Dict:
+    version = await run_in_threadpool(get_config_file().write, message["config"], message.get("version"))
+    return {"success": True, "version": version}
+
+async def native_patch_server(message: Dict) -> Dict:
+    version = await run_in_threadpool(get_config_file().patch_server, message["serverName"], message.get("entry"))
+    return {"success": True, "version": version}
+
+async def native_install_server(message: Dict) -> Dict:
+    server = ServerConfig(**message["server"])
+    job = job_manager.submit(InstallJob(server.name), lambda job: run_install_steps(job, server))
+    # The extension expects one reply once the install is done
+    await wait_for_job(job)
+    if job.status != "succeeded":
+        return {"success": False, "error": job.error, "job_id": job.id}
+    return {"success": True, "job_id": job.id}
+
+async def native_batch(message: Dict) -> Dict:
+    operations = [BatchOperation(**op) for op in message["operations"]]
+    results = await run_batch(operations)
+    return {"success": all(r["status"] == "ok" for r in results), "results": results}
+
+def uninstall_command(entry: Dict) -> Optional[List[str]]:
+    """Command that removes a server's package, if its config entry names one
+
+    Same as uninstallCommand in native-host/host.js. Only global npm packages
+    can be told from the entry; other servers just lose their entry.
+    """
+    packages = [arg for arg in entry.get("args") or [] if not arg.startswith("-")]
+    if entry.get("command") in ("npm", "npx", "node") and packages:
+        return ["npm", "uninstall", "-g", packages[0]]
+    return None
+
+async def native_uninstall_server(message: Dict) -> Dict:
+    config, _ = await run_in_threadpool(config_cache.read)
+    servers = config.get("mcpServers", {})
+    server_name = message["serverName"]
+    key = server_name if server_name in servers else server_slug(server_name)
+    if key not in servers:
+        return {"success": False, "error": "Server not found in config"}
+    command = uninstall_command(servers[key])
+
+    async def steps(job: InstallJob):
+        if command:
+            await job_manager.run_command(job, command)
+        # The entry stays if the package could not be removed, so the uninstall can be retried
+        await run_in_threadpool(get_config_file().patch_server, key, None)
+        job.log(f"Uninstalled {server_name}")
+
+    job = job_manager.submit(InstallJob(server_name), steps)
+    await wait_for_job(job)
+    if job.status != "succeeded":
+        return {"success": False, "error": job.error, "job_id": job.id}
+    return {"success": True, "job_id": job.id}
+
+NATIVE_HANDLERS = {
+    "GET_CONFIG": native_get_config,
+    "UPDATE_CONFIG": native_update_config,
+    "PATCH_SERVER": native_patch_server,
+    "INSTALL_SERVER": native_install_server,
+    "UNINSTALL_SERVER": native_uninstall_server,
+    "BATCH": native_batch,
+}
+
+async def handle_native_message(message: Dict) -> Dict:
+    handler = NATIVE_HANDLERS.get(message.get("type")) if isinstance(message, dict) else None
+    if handler is None:
+        return {"success": False, "error": "Unknown message type"}
+    try:
+        with metrics.timed(f"native_{message['type'].lower()}"):
+            return await handler(message)
+    except ValidationError as e:
+        return {"success": False, "error": f"Invalid server: {e}"}
+    except KeyError as e:
+        return {"success": False, "error": f"Missing field {e}"}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+async def read_native_message(reader: asyncio.StreamReader) -> Optional[Dict]:
+    """Read one length-prefixed JSON message, or None when the host disconnects"""
+    try:
+        header = await reader.readexactly(4)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = struct.unpack("<I", header)
+    if length > MAX_NATIVE_MESSAGE:
+        raise ValueError(f"Message of {length} bytes is too large")
+    return json.loads(await reader.readexactly(length))
+
+def encode_native_message(message: Dict) -> bytes:
+    payload = json.dumps(message).encode("utf-8")
+    if len(payload) > MAX_NATIVE_REPLY:
+        # Chrome drops a host that sends more, so send an error in its place
+        error = {"success": False, "error": f"Reply of {len(payload)} bytes is over the 1 MB native messaging limit"}
+        if "id" in message:
+            error["id"] = message["id"]
+        payload = json.dumps(error).encode("utf-8")
+    return struct.pack("<I", len(payload)) + payload
+
+async def handle_native_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Serve one native host
+
+    A message with an "id" is handled as its own task, and its reply carries
+    the same id, so a long install does not hold up later requests. Messages
+    without one are answered in order, for extensions that match replies by
+    order.
+    """
+    write_lock = asyncio.Lock()
+    tasks = set()
+
+    async def reply(message: Dict):
+        response = await handle_native_message(message)
+        if isinstance(message, dict) and "id" in message:
+            response["id"] = message["id"]
+        async with write_lock:
+            writer.write(encode_native_message(response))
+            await writer.drain()
+
+    async def reply_in_background(message: Dict):
+        try:
+            await reply(message)
+        except ConnectionError as e:
+            print(f"Error replying to native host: {e}")
+
+    try:
+        while True:
+            message = await read_native_message(reader)
+            if message is None:
+                break
+            if isinstance(message, dict) and "id" in message:
+                task = asyncio.get_running_loop().create_task(reply_in_background(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            else:
+                await reply(message)
+        if tasks:
+            await asyncio.gather(*tasks)
+    except (ConnectionError, ValueError, asyncio.IncompleteReadError) as e:
+        print(f"Error serving native host: {e}")
+    finally:
+        writer.close()
+
+def claim_socket(socket_path: Path):
+    """Remove a socket left by a daemon that is gone, refusing to replace a live one"""
+    if not socket_path.exists():
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(socket_path))
+    except OSError:
+        socket_path.unlink()
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"Another agent is already listening on {socket_path}")
+
+class DaemonServer(uvicorn.Server):
+    """uvicorn server that removes the native host socket as part of its shutdown
+
+    uvicorn re-raises the signal that stopped it once serve() has finished,
+    so cleanup placed after serve() would never run.
+    """
+
+    def __init__(self, config: uvicorn.Config, socket_path: Path):
+        super().__init__(config)
+        self.socket_path = socket_path
+
+    async def shutdown(self, sockets=None):
+        await super().shutdown(sockets=sockets)
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+async def serve_daemon(socket_path: Path, host: str, port: int):
+    """Serve the HTTP API and the native host socket from one process with warm caches"""
+    claim_socket(socket_path)
+    native_server = await asyncio.start_unix_server(
+        handle_native_connection, path=str(socket_path), limit=MAX_NATIVE_MESSAGE
+    )
+    os.chmod(socket_path, 0o600)
+    # Parse the config now so the first extension request is served from memory
+    await run_in_threadpool(config_cache.read)
+    async with native_server:
+        await DaemonServer(uvicorn.Config(app, host=host, port=port), socket_path).serve()
+
+def main():
+    parser = argparse.ArgumentParser(description="MCPHub desktop agent")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=3004)
+    parser.add_argument("--daemon", action="store_true",
+                        help="Also serve the native messaging host over a Unix socket")
+    parser.add_argument("--socket", type=Path, default=DEFAULT_SOCKET_PATH,
+                        help=f"Socket path for --daemon (default {DEFAULT_SOCKET_PATH})")
+    args = parser.parse_args()
+
+    if not args.daemon:
+        uvicorn.run(app, host=args.host, port=args.port)
+        return 0
+    if not hasattr(socket, "AF_UNIX"):
+        print("Error: --daemon needs Unix domain sockets", file=sys.stderr)
+        return 1
+    try:
+        asyncio.run(serve_daemon(args.socket, args.host, args.port))
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="localhost", port=3004)
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -1,21 +1,48 @@
+from .core.startup import STARTUP
+import argparse
 import customtkinter as ctk
-import json
-import os
-import yaml
-from pathlib import Path
-from typing import Dict, List
-import requests
+from typing import Dict
 import threading
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from .core.registry import MCPRegistry
+from .core.registry_feed import RegistryFeed
+from .core.search import SearchIndex
 from .core.server_manager import ServerManager
+from .core.slug import server_slug
+from .core.updater import UpdateEngine
 from .ui.server_config_dialog import ServerConfigDialog
+from .ui.server_rows import InstalledServerRow, ServerRow
+from .ui.virtual_list import VirtualList
+
+STARTUP.mark("imports")
+
 
 class MCPHub(ctk.CTk):
     def __init__(self):
         super().__init__()
 
-        # Initialize server manager
-        self.server_manager = ServerManager()
+        # Config and the registry cache load in the background after the window is up
+        self.server_manager = None
+        self.registry = None
+        self.registry_feed = None
+        self.health_monitor = None
+        self.config_watcher = None
+        self.server_registry = {"servers": []}
+        self.server_health = {}
+
+        # Installs started from the UI share a bounded worker pool
+        self.install_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="mcphub-install")
+
+        # Searches run one at a time off the Tk main loop; newer queries supersede older ones
+        self.search_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mcphub-search")
+        self.search_delay_ms = 200
+        self.search_after_id = None
+        self.search_future = None
+        self.search_generation = 0
+        self.search_index = None
+        self.search_index_source = None
+        self.registry_changed_keys = None
+        self.auto_update_running = False
 
         # Configure window
         self.title("MCPHub - MCP Server Manager")
@@ -28,11 +55,58 @@ class MCPHub(ctk.CTk):
         self.create_sidebar()
         self.create_main_frame()
 
-        # Initialize server registry
-        self.server_registry = self.load_server_registry()
-        
-        # Show browse page by default
+        # Show browse page by default; results appear once the registry cache is loaded
         self.show_browse_page()
+        STARTUP.mark("window")
+        self.after_idle(lambda: STARTUP.mark("first paint"))
+
+        threading.Thread(target=self.load_backend, name="mcphub-startup", daemon=True).start()
+
+        # Stop supervised servers when the window closes
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def load_backend(self):
+        """Read config and the cached registry off the Tk main loop"""
+        try:
+            server_manager = ServerManager()
+            settings = server_manager.get_settings()
+            STARTUP.mark("config")
+            registry = MCPRegistry(settings["registry_url"])
+            registry.load_cached()
+            STARTUP.mark("registry cache")
+        except Exception as e:
+            # Installed and Settings stay disabled, so tell the user why
+            self.after(0, lambda error=e: self.show_message("Error", f"Failed to load configuration: {error}"))
+            return
+        self.after(0, lambda: self.finish_startup(server_manager, registry))
+
+    def finish_startup(self, server_manager: ServerManager, registry: MCPRegistry):
+        """Attach the loaded backend to the window and start background refreshes"""
+        self.server_manager = server_manager
+        self.server_registry = self.load_server_registry(registry)
+        for button in (self.installed_button, self.settings_button):
+            button.configure(state="normal")
+        self.run_search()
+
+        self.registry_feed.start(periodic=self.server_manager.get_settings()["auto_update"])
+        self.run_auto_update()
+
+        # Check installed servers in the background and show their health on the installed page
+        from .core.monitor import HealthMonitor, targets_from_installed
+
+        self.health_monitor = HealthMonitor(
+            lambda: targets_from_installed(self.server_manager),
+            on_status=lambda status: self.after(0, lambda: self.apply_server_health(status)),
+            process_status=lambda name: self.server_manager.server_status(name).get(name)
+        )
+        self.health_monitor.start()
+
+        # Show edits to the configs made by other programs, such as the desktop agent
+        self.config_watcher = self.server_manager.watch_configs(
+            lambda change: self.after(0, lambda: self.apply_config_change(change))
+        )
+        STARTUP.mark("backend ready")
+        STARTUP.report()
 
     def create_sidebar(self):
         # Create sidebar frame
@@ -52,13 +126,14 @@ class MCPHub(ctk.CTk):
         )
         self.browse_button.grid(row=1, column=0, padx=20, pady=10)
 
+        # Pages that need the server manager are enabled once it has loaded
         self.installed_button = ctk.CTkButton(
-            self.sidebar_frame, text="Installed Servers", command=self.show_installed_page
+            self.sidebar_frame, text="Installed Servers", command=self.show_installed_page, state="disabled"
         )
         self.installed_button.grid(row=2, column=0, padx=20, pady=10)
 
         self.settings_button = ctk.CTkButton(
-            self.sidebar_frame, text="Settings", command=self.show_settings_page
+            self.sidebar_frame, text="Settings", command=self.show_settings_page, state="disabled"
         )
         self.settings_button.grid(row=3, column=0, padx=20, pady=10)
 
@@ -66,88 +141,118 @@ class MCPHub(ctk.CTk):
         self.main_frame = ctk.CTkFrame(self)
         self.main_frame.grid(row=0, column=1, sticky="nsew", padx=20, pady=20)
 
-    def load_server_registry(self) -> Dict:
-        """Load the MCP server registry from a remote source"""
-        # TODO: Implement actual registry loading from a central repository
-        return {
-            "servers": [
-                {
-                    "name": "Atlas MCP Server",
-                    "description": "Task management and organization server for LLMs",
-                    "repository": "https://github.com/cyanheads/atlas-mcp-server",
-                    "version": "1.0.0",
-                    "tags": ["task-management", "organization"],
-                    "config_schema": {
-                        "port": {"type": "integer", "default": 8000},
-                        "auth_token": {"type": "string", "required": True}
-                    }
-                },
-                {
-                    "name": "Git MCP Server",
-                    "description": "Git operations server for LLMs",
-                    "repository": "https://github.com/cyanheads/git-mcp-server",
-                    "version": "0.9.0",
-                    "tags": ["git", "version-control"],
-                    "config_schema": {
-                        "port": {"type": "integer", "default": 8001},
-                        "auth_token": {"type": "string", "required": True}
-                    }
-                }
-            ]
-        }
+        # Pages are built once and swapped in and out, so switching is constant time
+        self.pages = {}
+        self.current_page = None
+
+    def show_page(self, name: str, build) -> ctk.CTkFrame:
+        page = self.pages.get(name)
+        if page is None:
+            page = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+            build(page)
+            self.pages[name] = page
+        if self.current_page is not page:
+            if self.current_page is not None:
+                self.current_page.pack_forget()
+            page.pack(fill="both", expand=True)
+            self.current_page = page
+        return page
+
+    def load_server_registry(self, registry: MCPRegistry) -> Dict:
+        """Use the cached registry snapshot; fresh data arrives from the background feed"""
+        self.registry = registry
+        self.registry_feed = RegistryFeed(
+            self.registry,
+            on_change=lambda diff: self.after(0, lambda: self.apply_registry_diff(diff))
+        )
+        self.update_engine = UpdateEngine(self.server_manager, self.registry)
+        return {"servers": self.registry_feed.load_cached()}
+
+    def apply_registry_diff(self, diff):
+        """Show a registry refresh, rebinding only the rows whose entries changed"""
+        self.server_registry = {"servers": diff.servers}
+        self.run_auto_update()
+        if hasattr(self, "browse_list"):
+            self.registry_changed_keys = {server_slug(server["name"]) for server in diff.changed}
+            self.run_search()
 
     def show_browse_page(self):
-        # Clear main frame
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
+        self.show_page("browse", self.build_browse_page)
+        self.run_search()
 
+    def build_browse_page(self, page):
         # Add search bar
-        search_frame = ctk.CTkFrame(self.main_frame)
+        search_frame = ctk.CTkFrame(page)
         search_frame.pack(fill="x", padx=10, pady=10)
 
-        search_entry = ctk.CTkEntry(search_frame, placeholder_text="Search servers...")
-        search_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
+        self.search_entry = ctk.CTkEntry(search_frame, placeholder_text="Search servers...")
+        self.search_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
+        self.search_entry.bind("<KeyRelease>", self.schedule_search)
+        self.search_entry.bind("<Return>", lambda event: self.run_search())
 
-        search_button = ctk.CTkButton(search_frame, text="Search")
+        search_button = ctk.CTkButton(search_frame, text="Search", command=self.run_search)
         search_button.pack(side="right")
 
-        # Add server list
-        servers_frame = ctk.CTkScrollableFrame(self.main_frame)
-        servers_frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
-
-        # Add server cards
-        for server in self.server_registry["servers"]:
-            self.create_server_card(servers_frame, server)
-
-    def create_server_card(self, parent, server_data):
-        # Create card frame
-        card = ctk.CTkFrame(parent)
-        card.pack(fill="x", padx=5, pady=5)
-
-        # Add server info
-        name_label = ctk.CTkLabel(
-            card, text=server_data["name"], font=ctk.CTkFont(size=16, weight="bold")
+        # Add server list, which only builds cards for visible rows
+        self.browse_list = VirtualList(
+            page, row_height=ServerRow.height + 10,
+            create_row=lambda parent: ServerRow(parent, self.install_server),
+            key=lambda server_data: server_slug(server_data["name"])
         )
-        name_label.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="w")
-
-        desc_label = ctk.CTkLabel(card, text=server_data["description"])
-        desc_label.grid(row=1, column=0, padx=10, pady=(0, 10), sticky="w")
-
-        # Version and tags
-        info_text = f"Version: {server_data['version']} | Tags: {', '.join(server_data['tags'])}"
-        info_label = ctk.CTkLabel(card, text=info_text, text_color="gray")
-        info_label.grid(row=2, column=0, padx=10, pady=(0, 10), sticky="w")
-
-        # Add install button
-        install_button = ctk.CTkButton(
-            card, text="Install", width=100,
-            command=lambda: self.install_server(server_data)
-        )
-        install_button.grid(row=0, column=1, padx=10, pady=10, sticky="e")
+        self.browse_list.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+    def schedule_search(self, event=None):
+        """Debounce keystrokes so only the last query in a burst is searched"""
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+        self.search_after_id = self.after(self.search_delay_ms, self.run_search)
+
+    def run_search(self):
+        """Search the registry in the background and show the results when they arrive"""
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+            self.search_after_id = None
+
+        query = self.search_entry.get() if hasattr(self, "search_entry") else ""
+        servers = self.server_registry["servers"]
+
+        # Drop a query that has not started yet; a running one is discarded by generation
+        if self.search_future is not None:
+            self.search_future.cancel()
+        self.search_generation += 1
+        generation = self.search_generation
+
+        def search_task():
+            if generation != self.search_generation:
+                return
+            if self.search_index is None or self.search_index_source is not servers:
+                self.search_index = SearchIndex(servers)
+                self.search_index_source = servers
+            results = self.search_index.search(query)
+            self.after(0, lambda: self.show_search_results(generation, results))
+
+        self.search_future = self.search_executor.submit(search_task)
+
+    def show_search_results(self, generation, results):
+        if generation != self.search_generation:
+            return
+        # Set by a registry refresh, which keeps the scroll position
+        changed, self.registry_changed_keys = self.registry_changed_keys, None
+        current_keys = [server_slug(server["name"]) for server in self.browse_list.items]
+        new_keys = [server_slug(server["name"]) for server in results]
+        if current_keys == new_keys:
+            if changed:
+                self.browse_list.set_items(results)
+                self.browse_list.refresh(changed)
+            return
+        self.browse_list.set_items(results, reset_scroll=changed is None)
+        if changed:
+            self.browse_list.refresh(changed)
 
     def install_server(self, server_data):
-        def install_thread():
+        def install_task():
             success = self.server_manager.install_server(server_data)
+            self.after(0, progress.destroy)
             if success:
                 self.after(0, lambda: self.show_message("Success", f"Successfully installed {server_data['name']}"))
             else:
@@ -155,68 +260,75 @@ class MCPHub(ctk.CTk):
 
         # Show progress dialog
         progress = self.show_progress(f"Installing {server_data['name']}...")
-        
-        # Start installation in thread
-        thread = threading.Thread(target=install_thread)
-        thread.start()
-
-    def show_installed_page(self):
-        # Clear main frame
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
-
-        # Get installed servers
-        installed_servers = self.server_manager.get_installed_servers()
-
-        # Create scrollable frame for servers
-        servers_frame = ctk.CTkScrollableFrame(self.main_frame)
-        servers_frame.pack(fill="both", expand=True, padx=10, pady=10)
-
-        # Add server cards
-        for server in installed_servers:
-            self.create_installed_server_card(servers_frame, server)
-
-    def create_installed_server_card(self, parent, server):
-        card = ctk.CTkFrame(parent)
-        card.pack(fill="x", padx=5, pady=5)
-
-        # Server name and status
-        name_label = ctk.CTkLabel(
-            card, text=server.name, font=ctk.CTkFont(size=16, weight="bold")
-        )
-        name_label.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="w")
-
-        status_text = "Enabled" if server.enabled else "Disabled"
-        status_label = ctk.CTkLabel(card, text=status_text, text_color="gray")
-        status_label.grid(row=1, column=0, padx=10, pady=(0, 10), sticky="w")
-
-        # Control buttons
-        button_frame = ctk.CTkFrame(card)
-        button_frame.grid(row=0, column=1, rowspan=2, padx=10, pady=10, sticky="e")
 
-        start_button = ctk.CTkButton(
-            button_frame, text="Start", width=80,
-            command=lambda: self.server_manager.start_server(server.name)
-        )
-        start_button.pack(side="left", padx=5)
-
-        stop_button = ctk.CTkButton(
-            button_frame, text="Stop", width=80,
-            command=lambda: self.server_manager.stop_server(server.name)
-        )
-        stop_button.pack(side="left", padx=5)
-
-        config_button = ctk.CTkButton(
-            button_frame, text="Configure", width=80,
-            command=lambda: self.show_config_dialog(server)
-        )
-        config_button.pack(side="left", padx=5)
+        # Run installation on the shared install pool
+        self.install_executor.submit(install_task)
 
-        uninstall_button = ctk.CTkButton(
-            button_frame, text="Uninstall", width=80,
-            command=lambda: self.uninstall_server(server.name)
+    def show_installed_page(self):
+        self.show_page("installed", self.build_installed_page)
+        self.installed_list.set_items(self.server_manager.get_installed_servers())
+
+    def build_installed_page(self, page):
+        self.installed_list = VirtualList(
+            page, row_height=InstalledServerRow.height + 10,
+            create_row=lambda parent: InstalledServerRow(
+                parent,
+                on_start=self.start_server,
+                on_stop=self.stop_server,
+                on_configure=self.show_config_dialog,
+                on_uninstall=self.uninstall_server,
+                health_lookup=lambda name: self.server_health.get(name)
+            ),
+            key=lambda server: (server.name, server.enabled)
         )
-        uninstall_button.pack(side="left", padx=5)
+        self.installed_list.pack(fill="both", expand=True, padx=10, pady=10)
+
+    def apply_server_health(self, status):
+        """Update the health line of visible installed rows, without rebinding them"""
+        self.server_health = status
+        if not hasattr(self, "installed_list"):
+            return
+        for row in self.installed_list.rows:
+            if row.bound_key is not None and row.server is not None:
+                row.set_health(status.get(row.server.name))
+
+    def apply_config_change(self, change):
+        """Re-render only the installed rows whose config entries changed"""
+        if change.source != "mcphub" or "installed" not in self.pages:
+            return
+        servers = self.server_manager.get_installed_servers()
+        self.installed_list.set_items(servers)
+        self.installed_list.refresh({(server.name, server.enabled) for server in servers
+                                     if server.name in change.names})
+        self.health_monitor.probe_now()
+
+    def start_server(self, server_name):
+        if not self.server_manager.start_server(server_name):
+            self.show_message("Error", f"Failed to start {server_name}")
+        elif self.health_monitor is not None:
+            self.health_monitor.probe_now()
+
+    def stop_server(self, server_name):
+        def stop():
+            self.server_manager.stop_server(server_name)
+            if self.health_monitor is not None:
+                self.health_monitor.probe_now()
+
+        # Stopping waits up to 10s for the server to exit, so keep it off the Tk thread
+        threading.Thread(target=stop, name=f"mcphub-stop-{server_name}", daemon=True).start()
+
+    def on_close(self):
+        if self.registry_feed is not None:
+            self.registry_feed.stop()
+        if self.health_monitor is not None:
+            self.health_monitor.stop()
+        if self.config_watcher is not None:
+            self.config_watcher.stop()
+        if self.server_manager is not None:
+            self.server_manager.stop_all_servers()
+        self.install_executor.shutdown(wait=False)
+        self.search_executor.shutdown(wait=False)
+        self.destroy()
 
     def show_config_dialog(self, server):
         config = {
@@ -237,12 +349,11 @@ class MCPHub(ctk.CTk):
             self.show_message("Error", f"Failed to uninstall {server_name}")
 
     def show_settings_page(self):
-        # Clear main frame
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
+        self.show_page("settings", self.build_settings_page)
 
+    def build_settings_page(self, page):
         # Create settings form
-        settings_frame = ctk.CTkFrame(self.main_frame)
+        settings_frame = ctk.CTkFrame(page)
         settings_frame.pack(fill="both", expand=True, padx=20, pady=20)
 
         # Registry URL setting
@@ -252,18 +363,67 @@ class MCPHub(ctk.CTk):
         )
         url_label.grid(row=0, column=0, padx=10, pady=(20, 5), sticky="w")
 
+        settings = self.server_manager.get_settings()
+
         url_entry = ctk.CTkEntry(settings_frame, width=300)
         url_entry.grid(row=1, column=0, padx=10, pady=(0, 20), sticky="w")
-        url_entry.insert(0, "https://registry.mcphub.io")
+        url_entry.insert(0, settings["registry_url"])
+        url_entry.bind("<Return>", lambda event: self.set_registry_url(url_entry.get()))
+        url_entry.bind("<FocusOut>", lambda event: self.set_registry_url(url_entry.get()))
 
         # Auto-update setting
-        auto_update_var = ctk.BooleanVar(value=True)
+        auto_update_var = ctk.BooleanVar(value=settings["auto_update"])
         auto_update = ctk.CTkSwitch(
             settings_frame, text="Auto-update servers",
-            variable=auto_update_var
+            variable=auto_update_var,
+            command=lambda: self.set_auto_update(auto_update_var.get())
         )
         auto_update.grid(row=2, column=0, padx=10, pady=10, sticky="w")
 
+    def set_registry_url(self, url: str):
+        url = url.strip()
+        if not url or url == self.registry.registry_url:
+            return
+        self.server_manager.update_settings(registry_url=url)
+        self.registry.registry_url = url
+        self.registry_feed.refresh_now(force=True)
+
+    def set_auto_update(self, enabled: bool):
+        self.server_manager.update_settings(auto_update=enabled)
+        self.registry_feed.set_periodic(enabled)
+        self.run_auto_update()
+
+    def run_auto_update(self):
+        """Update installed servers in the background when auto-update is on"""
+        if self.auto_update_running or not self.server_manager.get_settings()["auto_update"]:
+            return
+        self.auto_update_running = True
+
+        def update_task():
+            try:
+                results = self.update_engine.update()
+            except Exception as e:
+                print(f"Error updating servers: {e}")
+                results = []
+            self.after(0, lambda: self.show_update_results(results))
+
+        self.install_executor.submit(update_task)
+
+    def show_update_results(self, results):
+        self.auto_update_running = False
+        if not results:
+            return
+        updated = [f"{r.name} {r.from_version} -> {r.to_version}" for r in results if r.success]
+        failed = [f"{r.name}: {r.error}" for r in results if not r.success]
+        lines = []
+        if updated:
+            lines.append("Updated " + ", ".join(updated))
+        if failed:
+            lines.append("Failed (rolled back) " + ", ".join(failed))
+        self.show_message("Server updates", "\n".join(lines))
+        if self.current_page is self.pages.get("installed"):
+            self.show_installed_page()
+
     def show_message(self, title: str, message: str):
         dialog = ctk.CTkToplevel(self)
         dialog.title(title)
@@ -290,6 +450,13 @@ class MCPHub(ctk.CTk):
         return dialog
 
 def main():
+    parser = argparse.ArgumentParser(description="MCPHub - MCP Server Manager")
+    parser.add_argument("--startup-timing", action="store_true",
+                        help="Print how long each startup phase took (or set MCPHUB_STARTUP_TIMING=1)")
+    args = parser.parse_args()
+    if args.startup_timing:
+        STARTUP.enabled = True
+
     app = MCPHub()
     app.mainloop()
 
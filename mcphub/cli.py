@@ -0,0 +1,170 @@
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+import yaml
+
+from .core.artifact_cache import ArtifactCache
+from .core.registry import MCPRegistry
+from .core.registry_shards import YAML_LOADER, build_shards
+from .core.server_manager import ServerManager
+from .core.updater import UpdateEngine
+
+
+def print_progress(name: str, status: str, elapsed: float):
+    if status == "started":
+        print(f"[{name}] working...")
+    else:
+        print(f"[{name}] {status} in {elapsed:.1f}s")
+
+
+def cmd_install(args) -> int:
+    """Install one or more servers from the registry in parallel"""
+    found = MCPRegistry().get_many(args.names)
+    unknown = [name for name, server_data in found.items() if server_data is None]
+    if unknown:
+        print(f"Unknown server: {', '.join(unknown)}", file=sys.stderr)
+        return 1
+    servers = list(found.values())
+
+    manager = ServerManager(offline=args.offline)
+    if args.dry_run:
+        print(manager.plan_installs(servers).describe(args.workers))
+        return 0
+    results = manager.install_many(servers, max_workers=args.workers, progress=print_progress)
+
+    failed = [result for result in results if not result.success]
+    print()
+    for result in results:
+        status = "ok" if result.success else f"failed: {result.error}"
+        print(f"{result.name:<40} {result.duration:>7.1f}s  {status}")
+    print(f"{len(results) - len(failed)}/{len(results)} servers installed")
+    return 1 if failed else 0
+
+
+def cmd_update(args) -> int:
+    """Update installed servers that have newer versions in the registry"""
+    manager = ServerManager(offline=args.offline)
+    engine = UpdateEngine(manager)
+    candidates = engine.check(args.names or None)
+    if not candidates:
+        print("All servers are up to date")
+        return 0
+    for candidate in candidates:
+        print(f"{candidate.name:<40} {candidate.current_version} -> {candidate.new_version}")
+    if args.check:
+        return 0
+
+    print()
+    results = engine.update(candidates, max_workers=args.workers, progress=print_progress)
+    failed = [result for result in results if not result.success]
+    print()
+    for result in results:
+        if result.success:
+            status = "ok, dependencies reinstalled" if result.deps_reinstalled else "ok, dependencies unchanged"
+        else:
+            status = f"failed, rolled back: {result.error}"
+        print(f"{result.name:<40} {result.duration:>7.1f}s  {status}")
+    print(f"{len(results) - len(failed)}/{len(results)} servers updated")
+    return 1 if failed else 0
+
+
+def cmd_sync(args) -> int:
+    """Bring the Claude desktop config in line with the installed servers"""
+    plan = ServerManager().sync_claude_config(check=args.check)
+    for prefix, names in (("+", plan.added), ("~", plan.changed), ("-", plan.removed)):
+        for name in names:
+            print(f"{prefix} {name}")
+    if plan.unmanaged:
+        print(f"Left alone (not installed by mcphub): {', '.join(plan.unmanaged)}")
+    if not plan:
+        print("Claude config is in sync")
+        return 0
+    if args.check:
+        print(f"Claude config has drifted: {len(plan.updates)} server(s) differ")
+        return 1
+    print(f"Updated {len(plan.updates)} server(s) in the Claude config")
+    return 0
+
+
+def cmd_cache_prefetch(args) -> int:
+    """Download the packages of every registry entry into the artifact cache"""
+    if args.registry:
+        with open(args.registry, "r") as f:
+            registry = yaml.safe_load(f) or {}
+    else:
+        registry = MCPRegistry().fetch_registry()
+
+    statuses = ArtifactCache().prefetch(registry.get("servers", []))
+    for name, status in statuses.items():
+        print(f"{name:<40} {status}")
+    return 1 if "failed" in statuses.values() else 0
+
+
+def cmd_registry_build_shards(args) -> int:
+    """Split a registry file into the sharded layout served to clients"""
+    with open(args.source, "r") as f:
+        registry = yaml.load(f, Loader=YAML_LOADER) or {}
+    servers = registry.get("servers", [])
+    index = build_shards(servers, args.output, prefix_length=args.prefix_length)
+    print(f"{len(servers)} servers in {len(index['shards'])} shards, serial {index['serial']}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="mcphub-cli", description="Manage MCP servers from the command line")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    install_parser = subparsers.add_parser("install", help="Install servers from the registry")
+    install_parser.add_argument("names", nargs="+", help="Registry names of the servers to install")
+    install_parser.add_argument("-j", "--workers", type=int, default=4,
+                                help="Number of servers to install in parallel (default: 4)")
+    install_parser.add_argument("--offline", action="store_true",
+                                help="Install only from the local artifact cache")
+    install_parser.add_argument("--dry-run", action="store_true",
+                                help="Print the install plan with estimated costs without running it")
+    install_parser.set_defaults(func=cmd_install)
+
+    update_parser = subparsers.add_parser("update", help="Update installed servers to their registry versions")
+    update_parser.add_argument("names", nargs="*", help="Installed servers to update (default: all)")
+    update_parser.add_argument("--check", action="store_true", help="Only list available updates")
+    update_parser.add_argument("-j", "--workers", type=int, default=4,
+                               help="Number of servers to update in parallel (default: 4)")
+    update_parser.add_argument("--offline", action="store_true",
+                               help="Install changed dependencies only from the local artifact cache")
+    update_parser.set_defaults(func=cmd_update)
+
+    sync_parser = subparsers.add_parser("sync", help="Write installed servers into the Claude desktop config")
+    sync_parser.add_argument("--check", action="store_true",
+                             help="Only report drift, exiting with 1 if the config differs")
+    sync_parser.set_defaults(func=cmd_sync)
+
+    cache_parser = subparsers.add_parser("cache", help="Manage the local artifact cache")
+    cache_subparsers = cache_parser.add_subparsers(dest="cache_command", required=True)
+    prefetch_parser = cache_subparsers.add_parser("prefetch", help="Warm the cache from a registry file")
+    prefetch_parser.add_argument("--registry", type=Path,
+                                 help="Registry YAML to read (default: the remote registry)")
+    prefetch_parser.set_defaults(func=cmd_cache_prefetch)
+
+    registry_parser = subparsers.add_parser("registry", help="Maintain the server registry")
+    registry_subparsers = registry_parser.add_subparsers(dest="registry_command", required=True)
+    shards_parser = registry_subparsers.add_parser("build-shards", help="Write the sharded registry layout")
+    shards_parser.add_argument("--source", type=Path, default=Path("registry/servers.yaml"),
+                               help="Registry YAML to split (default: registry/servers.yaml)")
+    shards_parser.add_argument("--output", type=Path, default=Path("registry"),
+                               help="Directory for index.yaml and shards/ (default: registry)")
+    shards_parser.add_argument("--prefix-length", type=int, default=1,
+                               help="Name prefix length used as the shard key (default: 1)")
+    shards_parser.set_defaults(func=cmd_registry_build_shards)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .metrics import observe_subprocess
+
+# pip arguments that point at local sources, which are never cached
+LOCAL_PIP_FLAGS = {"-e", "--editable"}
+
+
+def run_command(command: List[str], **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run with check=True, recording the duration in the subprocess metrics"""
+    started = time.perf_counter()
+    try:
+        result = subprocess.run(command, check=True, **kwargs)
+    except subprocess.CalledProcessError as e:
+        observe_subprocess(command, time.perf_counter() - started, e.returncode)
+        raise
+    observe_subprocess(command, time.perf_counter() - started, result.returncode)
+    return result
+
+
+class ArtifactCache:
+    """Content-addressed pip wheelhouse and npm cache shared by all server installs"""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = cache_dir or Path.home() / ".mcphub" / "cache"
+        self.blobs_dir = self.cache_dir / "blobs"
+        self.wheelhouse = self.cache_dir / "wheelhouse"
+        self.npm_cache = self.cache_dir / "npm"
+        for directory in (self.blobs_dir, self.wheelhouse, self.npm_cache):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blobs_dir / digest[:2] / digest
+
+    def store(self, path: Path) -> str:
+        """Move a downloaded file into the blob store and link it into the wheelhouse"""
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+
+        blob = self.blob_path(digest)
+        if blob.exists():
+            path.unlink()
+        else:
+            blob.parent.mkdir(exist_ok=True)
+            os.replace(path, blob)
+
+        link = self.wheelhouse / path.name
+        tmp_link = self.wheelhouse / f".{path.name}.{os.getpid()}.tmp"
+        try:
+            os.link(blob, tmp_link)
+        except OSError:
+            shutil.copy2(blob, tmp_link)
+        os.replace(tmp_link, link)
+        return digest
+
+    def ingest(self, directory: Path) -> List[str]:
+        """Store every wheel pip built or downloaded into directory, then remove it"""
+        digests = [self.store(path) for path in sorted(directory.iterdir()) if path.is_file()]
+        shutil.rmtree(directory, ignore_errors=True)
+        return digests
+
+    def staging_dir(self) -> Path:
+        """Create a private wheel directory for one pip run"""
+        return Path(tempfile.mkdtemp(prefix="download-", dir=self.cache_dir))
+
+    def is_cacheable(self, pip_args: List[str]) -> bool:
+        return not any(arg in LOCAL_PIP_FLAGS for arg in pip_args)
+
+    def pip_wheel_command(self, pip_args: List[str], staging: Path, python: str = sys.executable) -> List[str]:
+        """Build or download wheels of the packages and their dependencies
+
+        Wheels rather than downloads are cached, so sdists are built once, with
+        their build dependencies, and later installs need no index at all.
+        """
+        return [python, "-m", "pip", "wheel", "--find-links", str(self.wheelhouse),
+                "-w", str(staging), *pip_args]
+
+    def pip_install_command(self, pip_args: List[str], python: str = sys.executable) -> List[str]:
+        if not self.is_cacheable(pip_args):
+            return [python, "-m", "pip", "install", *pip_args]
+        return [python, "-m", "pip", "install", "--no-index", "--find-links", str(self.wheelhouse), *pip_args]
+
+    def npm_command(self, npm_args: List[str], offline: bool = False) -> List[str]:
+        """Return an npm command line that reads from and fills the shared npm cache"""
+        return ["npm", *npm_args, "--cache", str(self.npm_cache),
+                "--offline" if offline else "--prefer-offline"]
+
+    def fill(self, pip_args: List[str], python: str = sys.executable, **kwargs):
+        """Add wheels of the packages and their dependencies to the wheelhouse"""
+        staging = self.staging_dir()
+        try:
+            run_command(self.pip_wheel_command(pip_args, staging, python), **kwargs)
+            self.ingest(staging)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def pip_install(self, pip_args: List[str], python: str = sys.executable, offline: bool = False, **kwargs):
+        """Install with pip from the wheelhouse, building missing wheels first unless offline
+
+        The package index is only asked when the wheelhouse cannot satisfy
+        the requirements on its own.
+        """
+        command = self.pip_install_command(pip_args, python)
+        if not self.is_cacheable(pip_args) or offline:
+            run_command(command, **kwargs)
+            return
+        try:
+            run_command(command, **{"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL, **kwargs})
+            return
+        except subprocess.CalledProcessError:
+            pass  # something is not cached yet
+        self.fill(pip_args, python, **kwargs)
+        run_command(command, **kwargs)
+
+    def npm_install(self, npm_args: List[str], offline: bool = False, **kwargs):
+        """Run an npm command against the shared npm cache"""
+        run_command(self.npm_command(npm_args, offline), **kwargs)
+
+    def prefetch(self, servers: Iterable[Dict], python: str = sys.executable) -> Dict[str, str]:
+        """Warm the cache with the packages registry entries install, returning a status per server"""
+        statuses = {}
+        for server in servers:
+            name = server.get("name", "?")
+            install_args = server.get("install_args") or []
+            packages = [arg for arg in install_args if not arg.startswith("-") and arg != "install"]
+            try:
+                if server.get("runtime") == "node" and packages:
+                    run_command(["npm", "cache", "add", *packages, "--cache", str(self.npm_cache)])
+                    statuses[name] = "cached"
+                elif server.get("runtime") == "python" and packages:
+                    self.fill(packages, python)
+                    statuses[name] = "cached"
+                else:
+                    statuses[name] = "skipped"
+            except Exception as e:
+                print(f"Error prefetching {name}: {e}")
+                statuses[name] = "failed"
+        return statuses
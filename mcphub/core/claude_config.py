@@ -0,0 +1,260 @@
+import copy
+import errno
+import hashlib
+import json
+import os
+import sys
+import time
+from json.decoder import scanstring
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .atomic import atomic_write_bytes
+from .metrics import observe_config_io
+
+# Lock files older than this are left over from a crashed writer
+STALE_LOCK_SECONDS = 30
+
+_decoder = json.JSONDecoder()
+
+
+class ConfigConflictError(Exception):
+    """Raised when the config file changed since the version the caller read"""
+
+
+def get_claude_config_path() -> Path:
+    """Get the path to the Claude config file based on the operating system"""
+    if sys.platform == "win32":
+        base_path = Path(os.environ["APPDATA"])
+    elif sys.platform == "darwin":
+        base_path = Path.home() / "Library" / "Application Support"
+    else:  # Linux and others
+        base_path = Path.home() / ".config"
+    return base_path / "Claude" / "claude_desktop_config.json"
+
+
+def config_version(raw: bytes) -> str:
+    """Version token of a config file's content, shared with native-host/host.js"""
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+class FileLock:
+    """Advisory lock held by exclusively creating ``<path>.lock``
+
+    Exclusive create is used instead of flock so that the Node.js native host
+    can take the same lock with ``fs.openSync(lockPath, 'wx')``.
+    """
+
+    def __init__(self, path: Path, timeout: float = 10.0, poll_interval: float = 0.02):
+        self.lock_path = Path(f"{path}.lock")
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+            self._break_stale_lock()
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {self.lock_path}")
+            time.sleep(self.poll_interval)
+
+    def _break_stale_lock(self):
+        try:
+            if time.time() - self.lock_path.stat().st_mtime > STALE_LOCK_SECONDS:
+                self.lock_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def release(self):
+        try:
+            self.lock_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def _skip_ws(text: str, idx: int) -> int:
+    while idx < len(text) and text[idx] in " \t\r\n":
+        idx += 1
+    return idx
+
+
+def _object_members(text: str, start: int) -> Tuple[List[Tuple[str, int, int, int]], int]:
+    """Scan the JSON object at text[start] without building values
+
+    Returns (key, key_start, value_start, value_end) for each member and the
+    index of the closing brace.
+    """
+    if text[start] != "{":
+        raise ValueError("Expected a JSON object")
+    members = []
+    idx = _skip_ws(text, start + 1)
+    if text[idx] == "}":
+        return members, idx
+    while True:
+        if text[idx] != '"':
+            raise ValueError("Expected an object key")
+        key_start = idx
+        key, idx = scanstring(text, idx + 1)
+        idx = _skip_ws(text, idx)
+        if text[idx] != ":":
+            raise ValueError("Expected ':'")
+        value_start = _skip_ws(text, idx + 1)
+        _, value_end = _decoder.raw_decode(text, value_start)
+        members.append((key, key_start, value_start, value_end))
+        idx = _skip_ws(text, value_end)
+        if text[idx] == "}":
+            return members, idx
+        if text[idx] != ",":
+            raise ValueError("Expected ',' or '}'")
+        idx = _skip_ws(text, idx + 1)
+
+
+def _line_indent(text: str, pos: int) -> Optional[str]:
+    """Return the indentation before pos, or None if it is not at the start of a line"""
+    line_start = text.rfind("\n", 0, pos) + 1
+    prefix = text[line_start:pos]
+    return prefix if prefix.strip() == "" and line_start > 0 else None
+
+
+def _dump_value(value, indent: Optional[str], unit: int) -> str:
+    """Serialise value so it lines up under a key indented by indent"""
+    if indent is None:
+        return json.dumps(value)
+    return json.dumps(value, indent=unit).replace("\n", "\n" + indent)
+
+
+def _splice_server(text: str, name: str, entry: Optional[Dict]) -> str:
+    """Add, replace or remove one mcpServers entry, leaving the rest of text untouched"""
+    root_start = _skip_ws(text, 0)
+    root_members, _ = _object_members(text, root_start)
+    servers = [m for m in root_members if m[0] == "mcpServers"]
+    if not servers:
+        raise ValueError("No mcpServers object")
+    _, servers_key_start, servers_start, _ = servers[-1]
+    members, servers_end = _object_members(text, servers_start)
+
+    # Indentation unit, taken from the first top-level key
+    first_indent = _line_indent(text, root_members[0][1])
+    unit = len(first_indent) if first_indent else 2
+
+    existing = [i for i, m in enumerate(members) if m[0] == name]
+    if existing:
+        i = existing[-1]
+        _, key_start, value_start, value_end = members[i]
+        if entry is not None:
+            value = _dump_value(entry, _line_indent(text, key_start), unit)
+            return text[:value_start] + value + text[value_end:]
+        if i > 0:
+            return text[:members[i - 1][3]] + text[value_end:]
+        if len(members) > 1:
+            return text[:key_start] + text[members[1][1]:]
+        return text[:servers_start + 1] + text[servers_end:]
+
+    if entry is None:
+        return text
+
+    if members:
+        last_key_start, last_value_end = members[-1][1], members[-1][3]
+        indent = _line_indent(text, last_key_start)
+        member = f"{json.dumps(name)}: {_dump_value(entry, indent, unit)}"
+        separator = f",\n{indent}" if indent is not None else ", "
+        return text[:last_value_end] + separator + member + text[last_value_end:]
+
+    outer = _line_indent(text, servers_key_start)
+    if outer is None:
+        member = f"{json.dumps(name)}: {_dump_value(entry, None, unit)}"
+        return text[:servers_start + 1] + member + text[servers_end:]
+    inner = outer + " " * unit
+    member = f"{json.dumps(name)}: {_dump_value(entry, inner, unit)}"
+    return text[:servers_start + 1] + f"\n{inner}{member}\n{outer}" + text[servers_end:]
+
+
+class ClaudeConfigFile:
+    """Locked, versioned access to claude_desktop_config.json"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else get_claude_config_path()
+        self.lock = FileLock(self.path)
+
+    def _read_raw(self) -> bytes:
+        started = time.perf_counter()
+        try:
+            with open(self.path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return b""
+        finally:
+            observe_config_io("claude", "read", time.perf_counter() - started)
+
+    def read(self) -> Tuple[Dict, str]:
+        """Return the parsed config and its version token"""
+        raw = self._read_raw()
+        config = json.loads(raw) if raw.strip() else {}
+        return config, config_version(raw)
+
+    def _write_raw(self, payload: bytes) -> str:
+        started = time.perf_counter()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(self.path, payload)
+        observe_config_io("claude", "write", time.perf_counter() - started)
+        return config_version(payload)
+
+    def write(self, config: Dict, expected_version: Optional[str] = None) -> str:
+        """Replace the whole config, failing if it changed since expected_version"""
+        with self.lock:
+            if expected_version is not None:
+                current = config_version(self._read_raw())
+                if current != expected_version:
+                    raise ConfigConflictError(
+                        f"Config changed (expected version {expected_version}, found {current})"
+                    )
+            return self._write_raw(json.dumps(config, indent=2).encode("utf-8"))
+
+    def patch_servers(self, updates: Dict[str, Optional[Dict]]) -> str:
+        """Set or remove (with None) mcpServers entries, rewriting only those entries"""
+        with self.lock:
+            raw = self._read_raw()
+            config = json.loads(raw) if raw.strip() else {}
+            if not isinstance(config.get("mcpServers"), dict):
+                config["mcpServers"] = {}
+                raw = b""
+
+            expected = copy.deepcopy(config)
+            for name, entry in updates.items():
+                if entry is None:
+                    expected["mcpServers"].pop(name, None)
+                else:
+                    expected["mcpServers"][name] = entry
+            if expected == config and raw:
+                return config_version(raw)
+
+            text = raw.decode("utf-8")
+            try:
+                for name, entry in updates.items():
+                    text = _splice_server(text, name, entry)
+                if json.loads(text) != expected:
+                    raise ValueError("Spliced config does not match")
+            except (ValueError, IndexError):
+                # Fall back to a full rewrite for documents we cannot splice
+                text = json.dumps(expected, indent=2)
+            return self._write_raw(text.encode("utf-8"))
+
+    def patch_server(self, name: str, entry: Optional[Dict]) -> str:
+        """Set or remove a single mcpServers entry"""
+        return self.patch_servers({name: entry})
@@ -0,0 +1,139 @@
+import atexit
+import copy
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import yaml
+
+from .atomic import atomic_write_bytes
+from .claude_config import FileLock
+from .metrics import observe_config_io
+
+# Use the libyaml implementations when they are available
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+def merge_changes(base, ours, theirs):
+    """Apply the changes that turned base into ours on top of theirs
+
+    Mappings are merged key by key, so edits to different servers or
+    settings by two processes both survive; where both changed the same
+    value, ours wins.
+    """
+    if ours == base:
+        return theirs
+    if not (isinstance(base, dict) and isinstance(ours, dict) and isinstance(theirs, dict)):
+        return ours
+    merged = dict(theirs)
+    for key in set(base) | set(ours):
+        if key not in ours:
+            merged.pop(key, None)
+        elif key not in base or key not in theirs:
+            merged[key] = ours[key]
+        elif ours[key] != base[key]:
+            merged[key] = merge_changes(base[key], ours[key], theirs[key])
+    return merged
+
+
+class ConfigStore:
+    """YAML config cached in memory, reloaded on stat changes and flushed atomically after a debounce"""
+
+    def __init__(self, path: Path, default_factory: Callable[[], Dict], flush_delay: float = 0.5):
+        self.path = Path(path)
+        self.default_factory = default_factory
+        self.flush_delay = flush_delay
+        self.lock = threading.RLock()
+        self._data: Optional[Dict] = None
+        # The document as last read from or written to disk; _data minus _base is what is pending
+        self._base: Optional[Dict] = None
+        self._stat_key: Optional[Tuple[int, int, int]] = None
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+
+    def _current_stat_key(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _read(self, stat_key: Optional[Tuple[int, int, int]]) -> Dict:
+        if stat_key is None:
+            return self.default_factory()
+        started = time.perf_counter()
+        with open(self.path, 'rb') as f:
+            data = yaml.load(f, Loader=YAML_LOADER) or self.default_factory()
+        observe_config_io("mcphub", "read", time.perf_counter() - started)
+        return data
+
+    def get(self) -> Dict:
+        """Return the live document, reloading it if the file changed on disk"""
+        # Callers that mutate the result must hold the lock or use transaction()
+        with self.lock:
+            stat_key = self._current_stat_key()
+            if self._data is None or stat_key != self._stat_key:
+                disk = self._read(stat_key)
+                if self._dirty and self._data is not None:
+                    # Another process wrote the file; keep our unflushed changes on top of its
+                    self._data = merge_changes(self._base, self._data, disk)
+                else:
+                    self._data = disk
+                self._base = copy.deepcopy(disk)
+                self._stat_key = stat_key
+            return self._data
+
+    def copy(self) -> Dict:
+        """Return a deep copy of the document that callers may keep"""
+        with self.lock:
+            return copy.deepcopy(self.get())
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict]:
+        """Mutate a copy of the document under the lock, committed only if the block does not raise"""
+        with self.lock:
+            current = self.get()
+            data = copy.deepcopy(current)
+            yield data
+            # Nothing is written for a transaction that changed nothing
+            if data != current:
+                self._data = data
+                self._mark_dirty()
+
+    def set(self, data: Dict):
+        """Replace the whole document and schedule a flush"""
+        with self.lock:
+            self._data = data
+            self._mark_dirty()
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write pending changes to disk now"""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            # Other mcphub processes write the same file; merge in what they wrote since
+            # our last read, and keep them from writing until we are done
+            with FileLock(self.path):
+                data = self.get()
+                started = time.perf_counter()
+                payload = yaml.dump(data, Dumper=YAML_DUMPER).encode('utf-8')
+                atomic_write_bytes(self.path, payload)
+                observe_config_io("mcphub", "write", time.perf_counter() - started)
+                self._stat_key = self._current_stat_key()
+                self._base = copy.deepcopy(data)
+                self._dirty = False
@@ -0,0 +1,331 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import yaml
+
+# Use the libyaml parser when it is available
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# inotify(7) flags
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# Writers replace config files by renaming a temporary file over them, so the
+# parent directory is watched rather than the file itself
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+@dataclass
+class ConfigChange:
+    source: str
+    path: str
+    added: Dict[str, Dict] = field(default_factory=dict)
+    changed: Dict[str, Dict] = field(default_factory=dict)
+    removed: List[str] = field(default_factory=list)
+    timestamp: float = field(default_factory=time.time)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    @property
+    def names(self) -> Set[str]:
+        """Every server the change touches"""
+        return set(self.added) | set(self.changed) | set(self.removed)
+
+    def to_dict(self) -> Dict:
+        return {
+            "source": self.source,
+            "path": self.path,
+            "added": self.added,
+            "changed": self.changed,
+            "removed": self.removed,
+            "timestamp": self.timestamp,
+        }
+
+
+def diff_entries(source: str, path: Path, old: Dict[str, Dict], new: Dict[str, Dict]) -> ConfigChange:
+    """Compare two snapshots of a config's server entries by name"""
+    change = ConfigChange(source, str(path))
+    for name, entry in new.items():
+        previous = old.get(name)
+        if previous is None:
+            change.added[name] = entry
+        elif previous != entry:
+            change.changed[name] = entry
+    change.removed = [name for name in old if name not in new]
+    return change
+
+
+def load_claude_servers(path: Path) -> Dict[str, Dict]:
+    """mcpServers entries of claude_desktop_config.json"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    config = json.loads(raw) if raw.strip() else {}
+    return dict(config.get("mcpServers") or {})
+
+
+def load_installed_servers(path: Path) -> Dict[str, Dict]:
+    """installed_servers entries of mcphub's config.yaml"""
+    with open(path, "rb") as f:
+        config = yaml.load(f, Loader=YAML_LOADER) or {}
+    return dict(config.get("installed_servers") or {})
+
+
+@dataclass
+class WatchedFile:
+    source: str
+    path: Path
+    load: Callable[[Path], Dict[str, Dict]]
+    entries: Dict[str, Dict] = field(default_factory=dict)
+    stat_key: Optional[Tuple[int, int, int]] = None
+
+
+def config_files(claude_config: Path, mcphub_config: Path) -> List[WatchedFile]:
+    """The Claude desktop config and mcphub's own config"""
+    return [
+        WatchedFile("claude", Path(claude_config), load_claude_servers),
+        WatchedFile("mcphub", Path(mcphub_config), load_installed_servers),
+    ]
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class _Inotify:
+    """Directory watches through the Linux inotify API, called through ctypes"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories: Dict[int, Path] = {}
+
+    def watch(self, directory: Path) -> bool:
+        """Watch a directory; False if it does not exist (yet)"""
+        if directory in self.directories.values():
+            return True
+        wd = self._add_watch(self.fd, os.fsencode(str(directory)), WATCH_MASK)
+        if wd < 0:
+            return False
+        self.directories[wd] = directory
+        return True
+
+    def read(self) -> Optional[Set[Path]]:
+        """Paths named by the pending events, or None if the kernel queue overflowed"""
+        paths: Set[Path] = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return paths
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            directory = self.directories.get(wd)
+            if directory is not None and name:
+                paths.add(directory / os.fsdecode(name))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ConfigWatcher:
+    """Watches config files on a background thread and pushes structural diffs to subscribers
+
+    inotify is used on Linux when it is available; elsewhere files are polled
+    by stat. Bursts of events are debounced into one reload per file, and a
+    reload that leaves the server entries unchanged notifies nobody.
+    """
+
+    def __init__(self, files: List[WatchedFile], debounce: float = 0.2, poll_interval: float = 1.0,
+                 use_inotify: bool = True):
+        self.files = {Path(watched.path): watched for watched in files}
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend = "polling"
+        self._subscribers: List[Callable[[ConfigChange], None]] = []
+        self._lock = threading.Lock()
+        self._inotify: Optional[_Inotify] = None
+        # Config directories that do not exist yet, and are awaited through a watch on an ancestor
+        self._missing: Set[Path] = set()
+        # stop() sets the event; the inotify path also needs a pipe it can select() on,
+        # which the polling path cannot use as Windows only selects sockets
+        self._wake = threading.Event()
+        self._wake_read, self._wake_write = None, None
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, callback: Callable[[ConfigChange], None]) -> Callable[[], None]:
+        """Call callback on the watcher thread with each change; returns an unsubscribe function"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def start(self):
+        """Load the current files as the baseline and start watching"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._wake.clear()
+            for watched in self.files.values():
+                self._load(watched)
+            if self.use_inotify and sys.platform.startswith("linux"):
+                try:
+                    self._inotify = _Inotify()
+                    self.backend = "inotify"
+                except (OSError, AttributeError) as e:
+                    print(f"inotify unavailable, polling config files instead: {e}")
+            self._watch_directories()
+            if self._inotify is not None:
+                self._wake_read, self._wake_write = os.pipe()
+            self._thread = threading.Thread(target=self._run, name="mcphub-config-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stopped = True
+        self._wake.set()
+        with self._lock:
+            if self._wake_write is not None:
+                os.write(self._wake_write, b"\0")
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                # Still busy; the thread closes the wake pipe itself when it exits
+                return
+            self._thread = None
+        self._close_wake()
+
+    def _close_wake(self):
+        with self._lock:
+            for fd in (self._wake_read, self._wake_write):
+                if fd is not None:
+                    os.close(fd)
+            self._wake_read, self._wake_write = None, None
+
+    def _watch_directories(self):
+        if self._inotify is None:
+            return
+        self._missing = set()
+        for path in self.files:
+            directory = path.parent
+            # Watch the nearest existing ancestor until the directory itself is created
+            while not self._inotify.watch(directory) and directory != directory.parent:
+                self._missing.add(directory)
+                directory = directory.parent
+
+    def _wait(self, timeout: float) -> Optional[Set[Path]]:
+        """Wait for events; the paths they name, None to rescan everything, or an empty set"""
+        if self._inotify is None:
+            return set() if self._wake.wait(timeout) else None
+        ready, _, _ = select.select([self._wake_read, self._inotify.fd], [], [], timeout)
+        if self._wake_read in ready:
+            return set()
+        if not ready:
+            return None
+        return self._inotify.read()
+
+    def _changed_by_stat(self) -> Set[Path]:
+        return {path for path, watched in self.files.items() if _stat_key(path) != watched.stat_key}
+
+    def _run(self):
+        # With inotify the periodic stat scan only catches what the watches cannot,
+        # such as a config directory that is created later
+        rescan = self.poll_interval if self._inotify is None else max(self.poll_interval, 5.0)
+        try:
+            while not self._stopped:
+                paths = self._wait(rescan)
+                if self._stopped:
+                    break
+                if paths is None:
+                    self._watch_directories()
+                    dirty = self._changed_by_stat()
+                elif paths & self._missing:
+                    self._watch_directories()
+                    dirty = self._changed_by_stat()
+                else:
+                    dirty = paths & set(self.files)
+                if not dirty:
+                    continue
+
+                # Let a burst of writes settle before reloading
+                while not self._stopped:
+                    more = self._wait(self.debounce)
+                    if more is None:
+                        break
+                    dirty |= more & set(self.files)
+                    if not more:
+                        break
+                self._reload(dirty)
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+            self._close_wake()
+
+    def _load(self, watched: WatchedFile) -> bool:
+        stat_key = _stat_key(watched.path)
+        try:
+            entries = watched.load(watched.path) if stat_key is not None else {}
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            # Probably written in place and not finished; the next event reloads it
+            print(f"Error reading {watched.path}: {e}")
+            return False
+        watched.entries = entries
+        watched.stat_key = stat_key
+        return True
+
+    def _reload(self, paths: Set[Path]):
+        for path in paths:
+            watched = self.files[path]
+            old = watched.entries
+            if not self._load(watched):
+                continue
+            change = diff_entries(watched.source, path, old, watched.entries)
+            if change:
+                self._notify(change)
+
+    def _notify(self, change: ConfigChange):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(change)
+            except Exception as e:
+                print(f"Error in config change subscriber: {e}")
@@ -0,0 +1,119 @@
+import hashlib
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional
+
+if TYPE_CHECKING:
+    import git
+
+# GitPython is imported inside the methods that use it: importing it takes
+# longer than the rest of startup, and only installs and updates need it.
+
+
+class VersionNotFoundError(Exception):
+    """Raised when a pinned version has no matching tag or branch in the repository"""
+
+
+class GitCache:
+    """Bare mirrors of server repositories, shared by shallow checkouts via alternates"""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = cache_dir or Path.home() / ".mcphub" / "git-cache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._locks: Dict[Path, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, path: Path) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def mirror_path(self, repository: str) -> Path:
+        """Return the mirror directory used for a repository URL"""
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", repository.rstrip("/").split("/")[-1])
+        if name.endswith(".git"):
+            name = name[:-4]
+        digest = hashlib.sha1(repository.encode("utf-8")).hexdigest()[:12]
+        return self.cache_dir / f"{name}-{digest}.git"
+
+    def update_mirror(self, repository: str) -> Path:
+        """Create the mirror for a repository or fetch new objects into it"""
+        mirror = self.mirror_path(repository)
+        import git
+
+        with self._lock_for(mirror):
+            if (mirror / "HEAD").exists():
+                git.Repo(mirror).git.fetch("--prune", "--tags", "origin")
+            else:
+                if mirror.exists():
+                    shutil.rmtree(mirror)
+                git.Repo.clone_from(repository, mirror, mirror=True)
+        return mirror
+
+    def resolve_ref(self, mirror: Path, version: Optional[str], strict: bool = False) -> Optional[str]:
+        """Map a registry version to a full tag or branch ref in the mirror
+
+        Without a match the default branch is used, or with strict
+        VersionNotFoundError is raised.
+        """
+        if not version:
+            return None
+        import git
+
+        repo = git.Repo(mirror)
+        for candidate in (f"v{version}", str(version)):
+            for ref in (f"refs/tags/{candidate}", f"refs/heads/{candidate}"):
+                try:
+                    repo.git.rev_parse("--verify", "--quiet", ref)
+                    return ref
+                except git.GitCommandError:
+                    continue
+        if strict:
+            raise VersionNotFoundError(f"Version {version} not found in {mirror.name}")
+        print(f"Warning: version {version} not found in {mirror.name}, checking out the default branch")
+        return None
+
+    def head_commit(self, target_dir: Path) -> Optional[str]:
+        """The commit a checkout is at, or None if it is not a git checkout"""
+        if not (target_dir / ".git").exists():
+            return None
+        import git
+
+        return git.Repo(target_dir).head.commit.hexsha
+
+    def checkout(self, repository: str, target_dir: Path, version: Optional[str] = None,
+                 update_mirror: bool = True, strict: bool = False) -> "git.Repo":
+        """Clone or update a shallow checkout of repository pinned to version"""
+        mirror = self.update_mirror(repository) if update_mirror else self.mirror_path(repository)
+        ref = self.resolve_ref(mirror, version, strict)
+
+        if (target_dir / ".git").exists():
+            return self._update_checkout(target_dir, mirror, ref)
+
+        # Leftovers of a failed install would make the clone fail
+        if target_dir.exists():
+            shutil.rmtree(target_dir)
+
+        import git
+
+        options = {"depth": 1, "single_branch": True, "reference": str(mirror)}
+        if ref:
+            options["branch"] = ref.split("/", 2)[2]
+        repo = git.Repo.clone_from(mirror.as_uri(), target_dir, **options)
+        repo.remote("origin").set_url(repository)
+        return repo
+
+    def _update_checkout(self, target_dir: Path, mirror: Path, ref: Optional[str]) -> "git.Repo":
+        """Fetch only the pinned commit from the mirror and check it out"""
+        import git
+
+        repo = git.Repo(target_dir)
+        alternates = target_dir / ".git" / "objects" / "info" / "alternates"
+        if not alternates.exists():
+            alternates.parent.mkdir(parents=True, exist_ok=True)
+            alternates.write_text(f"{mirror / 'objects'}\n")
+
+        repo.git.fetch("--depth=1", mirror.as_uri(), ref or "HEAD")
+        repo.git.checkout("--force", "--detach", "FETCH_HEAD")
+        return repo
@@ -0,0 +1,309 @@
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond config reads to multi-minute installs
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _NullChild:
+    """Stand-in returned by every metric while metrics are disabled"""
+
+    def inc(self, amount: float = 1.0):
+        pass
+
+    def dec(self, amount: float = 1.0):
+        pass
+
+    def set(self, value: float):
+        pass
+
+    def observe(self, value: float):
+        pass
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        yield
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        yield
+
+
+_NULL_CHILD = _NullChild()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: Sequence[str]):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **labels):
+        """Return the child for one combination of label values"""
+        if not self.registry.enabled:
+            return _NULL_CHILD
+        key = tuple(str(value) for value in values) or tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    # Unlabelled metrics can be used directly
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self, **labels):
+        return self.labels(**labels).time()
+
+    def samples(self, openmetrics: bool) -> List[str]:
+        raise NotImplementedError
+
+    def render(self, openmetrics: bool) -> List[str]:
+        family = self.name
+        if self.kind == "counter" and openmetrics and family.endswith("_total"):
+            family = family[:-len("_total")]
+        return [f"# HELP {family} {_escape(self.documentation)}", f"# TYPE {family} {self.kind}"] + \
+            self.samples(openmetrics)
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def samples(self, openmetrics: bool) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def samples(self, openmetrics: bool) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def samples(self, openmetrics: bool) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + [math.inf], counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics, rendered in the Prometheus text or OpenMetrics format"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self, openmetrics: bool = False) -> str:
+        """Render every metric; the OpenMetrics form ends with the required # EOF"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render(openmetrics))
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+# Set MCPHUB_METRICS=0 to turn every metric into a no-op
+REGISTRY = MetricsRegistry(enabled=os.environ.get("MCPHUB_METRICS", "1") != "0")
+
+OPERATION_DURATION = REGISTRY.histogram(
+    "mcphub_operation_duration_seconds", "Duration of mcphub operations", ["operation", "result"]
+)
+FAILURES = REGISTRY.counter("mcphub_failures_total", "Failed mcphub operations", ["operation"])
+SUBPROCESS_DURATION = REGISTRY.histogram(
+    "mcphub_subprocess_duration_seconds", "Duration of package manager and other subprocesses",
+    ["tool", "result"]
+)
+CONFIG_IO_DURATION = REGISTRY.histogram(
+    "mcphub_config_io_duration_seconds", "Time spent reading and writing config files", ["file", "op"]
+)
+
+
+@contextmanager
+def timed(operation: str) -> Iterator[None]:
+    """Record an operation's duration by result, and count it as a failure if it raises"""
+    if not REGISTRY.enabled:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        OPERATION_DURATION.labels(operation, "error").observe(time.perf_counter() - started)
+        FAILURES.labels(operation).inc()
+        raise
+    OPERATION_DURATION.labels(operation, "ok").observe(time.perf_counter() - started)
+
+
+def command_tool(command: Sequence[str]) -> str:
+    """Short name of the tool a command runs, for labelling subprocess metrics"""
+    if not command:
+        return "unknown"
+    if "-m" in command[:-1]:
+        return command[list(command).index("-m") + 1]
+    return os.path.basename(str(command[0])).lower().split(".")[0]
+
+
+def observe_subprocess(command: Sequence[str], seconds: float, returncode: int):
+    SUBPROCESS_DURATION.labels(command_tool(command), "ok" if returncode == 0 else "error").observe(seconds)
+    if returncode != 0:
+        FAILURES.labels(f"subprocess:{command_tool(command)}").inc()
+
+
+def observe_config_io(file: str, op: str, seconds: float):
+    CONFIG_IO_DURATION.labels(file, op).observe(seconds)
@@ -0,0 +1,361 @@
+import asyncio
+import itertools
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+MCP_PROTOCOL_VERSION = "2024-11-05"
+
+# Called with a snapshot of every server's status after each probe round
+StatusCallback = Callable[[Dict[str, Dict]], None]
+# Returns the supervisor's status of a server, or None if it does not run it
+ProcessStatus = Callable[[str], Optional[Dict]]
+
+
+class ProbeError(Exception):
+    """Raised when a server does not answer a probe correctly"""
+
+
+@dataclass(frozen=True)
+class ProbeTarget:
+    name: str
+    command: Tuple[str, ...] = ()
+    env: Tuple[Tuple[str, str], ...] = ()
+    cwd: Optional[str] = None
+    port: Optional[int] = None
+    # 'process' reports the supervised process, 'tcp' connects to port, and
+    # 'stdio' starts a throwaway instance for an MCP handshake, so it is opt-in
+    mode: str = "process"
+    host: str = "127.0.0.1"
+
+
+def probe_target(name: str, command: List[str], env: Optional[Dict] = None, cwd: Optional[str] = None,
+                 port: Optional[int] = None, mode: Optional[str] = None) -> ProbeTarget:
+    return ProbeTarget(
+        name=name,
+        command=tuple(str(part) for part in command),
+        env=tuple(sorted((key, str(value)) for key, value in (env or {}).items())),
+        cwd=cwd,
+        port=int(port) if port else None,
+        mode=mode or "process",
+    )
+
+
+def targets_from_installed(manager) -> List[ProbeTarget]:
+    """Probe targets for the enabled servers in mcphub's config.yaml"""
+    installed = manager.load_config()["installed_servers"]
+    return [
+        probe_target(name, manager.server_command(config), config.get("env"), config.get("install_path"),
+                     config.get("port"), config.get("probe"))
+        for name, config in installed.items() if config.get("enabled", True)
+    ]
+
+
+def targets_from_claude_config(config: Dict, owned: Iterable[str] = ()) -> List[ProbeTarget]:
+    """Probe targets for the claude_desktop_config.json entries mcphub owns, and any TCP entry
+
+    The commands of other entries belong to the user or other tools and are never run.
+    """
+    owned = set(owned)
+    return [
+        probe_target(name, [entry.get("command", "")] + list(entry.get("args") or []), entry.get("env"),
+                     None, entry.get("port"), entry.get("probe"))
+        for name, entry in config.get("mcpServers", {}).items()
+        if entry.get("probe") == "tcp" or (name in owned and entry.get("command"))
+    ]
+
+
+class LatencyWindow:
+    """Ring buffer of the most recent probe outcomes of one server"""
+
+    def __init__(self, size: int = 256):
+        self.samples: Deque[Tuple[float, Optional[float]]] = deque(maxlen=size)
+        self.last_error: Optional[str] = None
+
+    def record(self, latency_ms: Optional[float], error: Optional[str] = None):
+        self.samples.append((time.time(), latency_ms))
+        self.last_error = error
+
+    def snapshot(self) -> Dict:
+        latencies = sorted(latency for _, latency in self.samples if latency is not None)
+        errors = len(self.samples) - len(latencies)
+        last_checked, last_latency = self.samples[-1] if self.samples else (None, None)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(int(fraction * len(latencies)), len(latencies) - 1)]
+
+        histogram = {str(bound): 0 for bound in LATENCY_BUCKETS_MS}
+        histogram["+Inf"] = 0
+        for latency in latencies:
+            for bound in LATENCY_BUCKETS_MS:
+                if latency <= bound:
+                    histogram[str(bound)] += 1
+                    break
+            else:
+                histogram["+Inf"] += 1
+
+        return {
+            "healthy": last_latency is not None if self.samples else None,
+            "last_checked": last_checked,
+            "last_latency_ms": last_latency,
+            "last_error": self.last_error,
+            "samples": len(self.samples),
+            "error_rate": errors / len(self.samples) if self.samples else 0.0,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "histogram": histogram,
+        }
+
+
+class StdioSession:
+    """A probe-only instance of a stdio MCP server, started for a single probe
+
+    Only used for targets that opt in with the 'stdio' mode. close() must
+    always be called, which kills the instance's whole process group if it
+    does not exit on EOF.
+    """
+
+    def __init__(self, target: ProbeTarget):
+        self.target = target
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._ids = itertools.count(1)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self, timeout: float):
+        env = dict(os.environ)
+        env.update(dict(self.target.env))
+        kwargs = {}
+        if sys.platform != "win32":
+            # Own process group, so npx wrappers are killed with their children
+            kwargs["start_new_session"] = True
+        self.process = await asyncio.create_subprocess_exec(
+            *self.target.command, cwd=self.target.cwd, env=env,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL, **kwargs
+        )
+        await self.request("initialize", {
+            "protocolVersion": MCP_PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "mcphub-monitor", "version": "0.1.0"},
+        }, timeout)
+        await self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    async def _send(self, message: Dict):
+        self.process.stdin.write(json.dumps(message).encode("utf-8") + b"\n")
+        await self.process.stdin.drain()
+
+    async def _read_response(self, request_id: int) -> Dict:
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                raise ProbeError(f"Server exited with code {await self.process.wait()}")
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue  # log output on stdout
+            if isinstance(message, dict) and message.get("id") == request_id:
+                return message
+
+    async def request(self, method: str, params: Optional[Dict], timeout: float) -> Dict:
+        request_id = next(self._ids)
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            message["params"] = params
+        await self._send(message)
+        response = await asyncio.wait_for(self._read_response(request_id), timeout)
+        if "error" in response:
+            raise ProbeError(f"{method} failed: {response['error'].get('message', response['error'])}")
+        return response.get("result", {})
+
+    def _kill(self):
+        try:
+            if sys.platform == "win32":
+                self.process.kill()
+            else:
+                os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    async def close(self):
+        if self.process is None:
+            return
+        if self.alive:
+            try:
+                self.process.stdin.close()
+                await asyncio.wait_for(self.process.wait(), 2.0)
+            except (asyncio.TimeoutError, OSError):
+                pass
+        # Children of a wrapper can outlive it, so the group is killed even after a clean exit
+        self._kill()
+        await self.process.wait()
+
+
+class HealthMonitor:
+    """Probes servers concurrently on a background event loop and keeps latency windows
+
+    'process' targets are not probed at all: their status is the supervisor's
+    view of the running process, through process_status, so checking a
+    server never starts another copy of it.
+    """
+
+    def __init__(self, targets: Callable[[], List[ProbeTarget]], interval: float = 15.0,
+                 timeout: float = 5.0, window: int = 256, max_concurrency: int = 16,
+                 on_status: Optional[StatusCallback] = None, process_status: Optional[ProcessStatus] = None):
+        self.targets = targets
+        self.process_status = process_status
+        self.interval = interval
+        self.timeout = timeout
+        self.window = window
+        self.max_concurrency = max_concurrency
+        self.on_status = on_status
+        self.windows: Dict[str, LatencyWindow] = {}
+        self.modes: Dict[str, str] = {}
+        self.processes: Dict[str, Dict] = {}
+        self.rounds = 0
+        self._lock = threading.Lock()
+        self._first_round = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    async def _probe_stdio(self, target: ProbeTarget) -> float:
+        session = StdioSession(target)
+        try:
+            await session.start(self.timeout)
+            started = time.perf_counter()
+            await session.request("ping", None, self.timeout)
+            return (time.perf_counter() - started) * 1000
+        finally:
+            await session.close()
+
+    async def _probe_tcp(self, target: ProbeTarget) -> float:
+        if not target.port:
+            raise ProbeError("No port configured")
+        started = time.perf_counter()
+        _, writer = await asyncio.wait_for(asyncio.open_connection(target.host, target.port), self.timeout)
+        latency = (time.perf_counter() - started) * 1000
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return latency
+
+    def _check_process(self, target: ProbeTarget):
+        status = self.process_status(target.name) if self.process_status is not None else None
+        if status is None:
+            # Not started by mcphub, so nothing is known about it
+            report = {"healthy": None, "last_error": None}
+        elif status["running"]:
+            report = {"healthy": True, "last_error": None}
+        else:
+            report = {"healthy": False, "last_error": f"Exited with code {status['last_exit_code']}"}
+        report["last_checked"] = time.time()
+        for key in ("pid", "uptime", "restarts", "rss", "cpu_percent"):
+            report[key] = status.get(key) if status else None
+        with self._lock:
+            self.modes[target.name] = target.mode
+            self.processes[target.name] = report
+
+    async def _probe(self, target: ProbeTarget, semaphore: asyncio.Semaphore):
+        if target.mode == "process":
+            self._check_process(target)
+            return
+        async with semaphore:
+            try:
+                if target.mode == "tcp":
+                    latency, error = await self._probe_tcp(target), None
+                elif target.mode == "stdio":
+                    latency, error = await self._probe_stdio(target), None
+                else:
+                    raise ProbeError(f"Unknown probe mode {target.mode!r}")
+            except asyncio.TimeoutError:
+                latency, error = None, f"No response within {self.timeout:g}s"
+            except (OSError, ProbeError, ValueError) as e:
+                latency, error = None, str(e) or type(e).__name__
+        with self._lock:
+            window = self.windows.setdefault(target.name, LatencyWindow(self.window))
+            self.modes[target.name] = target.mode
+            window.record(latency, error)
+
+    async def probe_all(self):
+        """Probe every target once, concurrently"""
+        targets = self.targets()
+        probed = {target.name for target in targets if target.mode != "process"}
+        supervised = {target.name for target in targets if target.mode == "process"}
+        with self._lock:
+            for name in [name for name in self.windows if name not in probed]:
+                del self.windows[name]
+            for name in [name for name in self.processes if name not in supervised]:
+                del self.processes[name]
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        await asyncio.gather(*(self._probe(target, semaphore) for target in targets))
+        self.rounds += 1
+        self._first_round.set()
+        if self.on_status is not None:
+            self.on_status(self.status())
+
+    def status(self) -> Dict[str, Dict]:
+        """Thread-safe snapshot of every server's health and latency statistics"""
+        with self._lock:
+            status = {
+                name: dict(window.snapshot(), mode=self.modes.get(name))
+                for name, window in self.windows.items()
+            }
+            status.update((name, dict(report, mode="process")) for name, report in self.processes.items())
+            return status
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        while not self._stopped:
+            self._wake.clear()
+            try:
+                await self.probe_all()
+            except Exception as e:
+                print(f"Error probing servers: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start probing on a background thread with its own event loop"""
+        if self._thread is None:
+            self._stopped = False
+            self._thread = threading.Thread(target=lambda: asyncio.run(self._main()),
+                                            name="mcphub-monitor", daemon=True)
+            self._thread.start()
+
+    def probe_now(self):
+        """Ask the monitor thread to run a probe round right away"""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def wait_first_round(self, timeout: Optional[float] = None) -> bool:
+        return self._first_round.wait(timeout)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop probing"""
+        self._stopped = True
+        self.probe_now()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,291 @@
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .metrics import timed
+from .slug import server_slug
+
+
+@dataclass
+class InstallResult:
+    name: str
+    success: bool
+    duration: float
+    error: Optional[str] = None
+
+
+# Called as progress(server_name, status, elapsed_seconds)
+ProgressCallback = Callable[[str, str, float], None]
+
+# Rough cost of each kind of step in seconds, used for dry runs and scheduling order
+STEP_COSTS = {
+    "mirror_clone": 8.0,
+    "mirror_fetch": 1.5,
+    "checkout": 1.0,
+    "checkout_update": 0.5,
+    "venv_template": 8.0,
+    "venv": 0.5,
+    "pip": 15.0,
+    "npm": 12.0,
+    "mkdir": 0.0,
+}
+# Package installs served entirely from the artifact cache
+OFFLINE_STEP_COSTS = {"pip": 3.0, "npm": 3.0}
+
+
+@dataclass
+class PlanStep:
+    key: str
+    kind: str
+    description: str
+    action: Callable[[], None]
+    cost: float
+    deps: List[str] = field(default_factory=list)
+    servers: List[str] = field(default_factory=list)
+
+
+class InstallPlan:
+    """Deduplicated install steps of several servers, ordered as a DAG"""
+
+    def __init__(self):
+        self.steps: Dict[str, PlanStep] = {}
+        self.servers: Dict[str, Dict] = {}
+
+    def add(self, step: PlanStep, server: str) -> str:
+        """Add a step for server, merging it into an identical step already planned"""
+        existing = self.steps.get(step.key)
+        if existing is None:
+            self.steps[step.key] = existing = step
+        if server not in existing.servers:
+            existing.servers.append(server)
+        return existing.key
+
+    def server_steps(self, server: str) -> List[PlanStep]:
+        return [step for step in self.steps.values() if server in step.servers]
+
+    def levels(self) -> List[List[PlanStep]]:
+        """Group steps into waves whose members only depend on earlier waves"""
+        depth: Dict[str, int] = {}
+        for step in self.steps.values():  # steps are added after their dependencies
+            depth[step.key] = 1 + max((depth[dep] for dep in step.deps), default=-1)
+        levels: List[List[PlanStep]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for step in self.steps.values():
+            levels[depth[step.key]].append(step)
+        return levels
+
+    def critical_path(self) -> float:
+        """Estimated duration with unlimited parallelism"""
+        finish: Dict[str, float] = {}
+        for step in self.steps.values():
+            finish[step.key] = step.cost + max((finish[dep] for dep in step.deps), default=0.0)
+        return max(finish.values(), default=0.0)
+
+    def total_cost(self) -> float:
+        return sum(step.cost for step in self.steps.values())
+
+    def describe(self, max_workers: int) -> str:
+        """Human-readable plan with estimated costs, for dry runs"""
+        requested = sum(len(step.servers) for step in self.steps.values())
+        lines = [f"Install plan for {len(self.servers)} server(s): {len(self.steps)} steps "
+                 f"({requested - len(self.steps)} duplicate steps merged)"]
+        for number, level in enumerate(self.levels(), 1):
+            lines.append(f"\nWave {number} ({len(level)} step(s) in parallel):")
+            for step in level:
+                shared = f"  [shared by {len(step.servers)}]" if len(step.servers) > 1 else ""
+                lines.append(f"  {step.cost:>6.1f}s  {step.description}{shared}")
+        lines.append(f"\nThen: save {len(self.servers)} server config(s) with one config.yaml "
+                     f"and one Claude config write")
+        total, critical = self.total_cost(), self.critical_path()
+        estimate = max(critical, total / max(1, max_workers))
+        lines.append(f"\nEstimated: {total:.1f}s of work, critical path {critical:.1f}s, "
+                     f"about {estimate:.1f}s with {max_workers} worker(s)")
+        return "\n".join(lines)
+
+
+class InstallPlanner:
+    """Builds and runs install plans for a ServerManager"""
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def _cost(self, kind: str) -> float:
+        if self.manager.offline and kind in OFFLINE_STEP_COSTS:
+            return OFFLINE_STEP_COSTS[kind]
+        return STEP_COSTS[kind]
+
+    def plan(self, servers: Iterable[Dict]) -> InstallPlan:
+        plan = InstallPlan()
+        manager = self.manager
+        for server_data in servers:
+            name = server_slug(server_data["name"])
+            plan.servers[name] = server_data
+            server_dir = manager.servers_dir / name
+
+            repository = server_data.get("repository")
+            if repository:
+                mirror = manager.git_cache.mirror_path(repository)
+                exists = (mirror / "HEAD").exists()
+                mirror_key = plan.add(PlanStep(
+                    f"mirror:{repository}", "mirror_fetch" if exists else "mirror_clone",
+                    f"{'fetch' if exists else 'clone'} mirror of {repository}",
+                    lambda repository=repository: manager.git_cache.update_mirror(repository),
+                    self._cost("mirror_fetch" if exists else "mirror_clone"),
+                ), name)
+                updating = (server_dir / ".git").exists()
+                checkout_key = plan.add(PlanStep(
+                    f"checkout:{name}", "checkout", f"check out {name} {server_data.get('version', '')}".rstrip(),
+                    lambda repository=repository, server_dir=server_dir, version=server_data.get("version"):
+                        manager.git_cache.checkout(repository, server_dir, version, update_mirror=False),
+                    self._cost("checkout_update" if updating else "checkout"), [mirror_key],
+                ), name)
+            else:
+                checkout_key = plan.add(PlanStep(
+                    f"mkdir:{name}", "mkdir", f"create {server_dir}",
+                    lambda server_dir=server_dir: server_dir.mkdir(exist_ok=True), self._cost("mkdir"),
+                ), name)
+
+            if server_data.get("runtime") == "python":
+                template_key = plan.add(PlanStep(
+                    "venv-template", "venv_template", "build the template virtualenv",
+                    manager.venv_manager.ensure_template,
+                    0.0 if (manager.venv_manager.template_dir / "pyvenv.cfg").exists()
+                    else self._cost("venv_template"),
+                ), name)
+                venv_key = plan.add(PlanStep(
+                    f"venv:{name}", "venv", f"clone virtualenv for {name}",
+                    lambda server_dir=server_dir: manager.venv_manager.ensure(server_dir / ".venv"),
+                    self._cost("venv"), [checkout_key, template_key],
+                ), name)
+                plan.add(PlanStep(
+                    f"pip:{name}", "pip", f"pip install -r requirements.txt for {name}",
+                    lambda server_dir=server_dir: self._pip_install(server_dir),
+                    self._cost("pip"), [venv_key],
+                ), name)
+            elif server_data.get("runtime") == "node" and server_data.get("install_command") == "npm":
+                install_args = list(server_data.get("install_args", []))
+                # Identical npm commands, such as the same global package, run once
+                plan.add(PlanStep(
+                    f"npm:{json.dumps(install_args)}", "npm", f"npm {' '.join(install_args)}",
+                    lambda install_args=install_args: manager.artifact_cache.npm_install(
+                        install_args, offline=manager.offline
+                    ),
+                    self._cost("npm"),
+                ), name)
+        return plan
+
+    def _pip_install(self, server_dir: Path):
+        requirements = server_dir / "requirements.txt"
+        if requirements.exists():
+            python = self.manager.venv_manager.ensure(server_dir / ".venv")
+            self.manager.artifact_cache.pip_install(
+                ["-r", str(requirements)], python=str(python), offline=self.manager.offline
+            )
+
+    @timed("install_plan")
+    def execute(self, plan: InstallPlan, max_workers: int = 4,
+                progress: Optional[ProgressCallback] = None) -> List[InstallResult]:
+        """Run the plan's steps in parallel as their dependencies finish, then save the installed servers"""
+        lock = threading.Lock()
+        failed: Dict[str, str] = {}
+        done = set()
+        started_at: Dict[str, float] = {}
+        remaining = {name: len(plan.server_steps(name)) for name in plan.servers}
+        finished_at: Dict[str, float] = {}
+        display = {name: server_data["name"] for name, server_data in plan.servers.items()}
+
+        def server_started(step: PlanStep):
+            for name in step.servers:
+                with lock:
+                    first = name not in started_at
+                    if first:
+                        started_at[name] = time.perf_counter()
+                if first and progress:
+                    progress(display[name], "started", 0.0)
+
+        def server_step_finished(step: PlanStep):
+            for name in step.servers:
+                with lock:
+                    remaining[name] -= 1
+                    complete = remaining[name] == 0
+                    if complete:
+                        finished_at[name] = time.perf_counter()
+                        ok = not any(s.key in failed for s in plan.server_steps(name))
+                if complete and progress:
+                    progress(display[name], "done" if ok else "failed",
+                             finished_at[name] - started_at.get(name, finished_at[name]))
+
+        def run(step: PlanStep):
+            server_started(step)
+            try:
+                step.action()
+            except Exception as e:
+                # Recorded before the step counts as finished, so progress reports the failure
+                with lock:
+                    failed[step.key] = f"{step.description} failed: {e}"
+                raise
+            finally:
+                server_step_finished(step)
+
+        pending = dict(plan.steps)
+        running = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            while pending or running:
+                # Skip steps whose dependencies failed; they count as failed too
+                for key, step in list(pending.items()):
+                    broken = [dep for dep in step.deps if dep in failed]
+                    if broken:
+                        with lock:
+                            failed[key] = f"skipped, {failed[broken[0]]}"
+                        del pending[key]
+                        server_started(step)
+                        server_step_finished(step)
+
+                ready = [step for step in pending.values() if all(dep in done for dep in step.deps)]
+                # Longest steps first, so the slow package installs start early
+                for step in sorted(ready, key=lambda s: -s.cost):
+                    del pending[step.key]
+                    running[executor.submit(run, step)] = step
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        done.add(step.key)
+                    else:
+                        with lock:
+                            failed.setdefault(step.key, f"{step.description} failed: {error}")
+
+        results = []
+        installed: Dict[str, Dict] = {}
+        for name, server_data in plan.servers.items():
+            errors = [failed[step.key] for step in plan.server_steps(name) if step.key in failed]
+            duration = finished_at.get(name, time.perf_counter()) - started_at.get(name, time.perf_counter())
+            if errors:
+                results.append(InstallResult(display[name], False, duration, errors[0]))
+                continue
+            server_dir = self.manager.servers_dir / name
+            try:
+                python_path = None
+                if server_data.get("runtime") == "python":
+                    python_path = self.manager.venv_manager.ensure(server_dir / ".venv")
+                installed[name] = self.manager.build_server_config(server_data, server_dir, python_path)
+                results.append(InstallResult(display[name], True, duration))
+            except Exception as e:
+                results.append(InstallResult(display[name], False, duration, str(e)))
+
+        try:
+            self.manager.record_installs(installed)
+        except Exception as e:
+            print(f"Error saving installed servers: {e}")
+            for result in results:
+                if result.success:
+                    result.success = False
+                    result.error = str(e)
+        return results
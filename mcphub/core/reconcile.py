@@ -0,0 +1,120 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import yaml
+
+from .config_watcher import YAML_LOADER, diff_entries
+from .metrics import timed
+
+# config.yaml key listing the Claude config entries mcphub wrote and has not removed since
+OWNED_KEY = "claude_entries"
+
+
+def load_owned_entries(path: Path) -> List[str]:
+    """Names of the Claude config entries config.yaml records as mcphub's"""
+    try:
+        with open(path, "rb") as f:
+            config = yaml.load(f, Loader=YAML_LOADER) or {}
+    except FileNotFoundError:
+        return []
+    return list(config.get(OWNED_KEY) or [])
+
+
+@dataclass
+class SyncPlan:
+    """Difference between the mcpServers entries mcphub wants and the Claude config on disk"""
+    updates: Dict[str, Optional[Dict]] = field(default_factory=dict)
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    # Entries mcphub did not install, which it leaves alone
+    unmanaged: List[str] = field(default_factory=list)
+    # Entries mcphub owns once the plan is applied
+    owned: List[str] = field(default_factory=list)
+    version: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.updates)
+
+
+class Reconciler:
+    """Brings the Claude config's mcpServers in line with mcphub's config.yaml
+
+    Only entries that differ are written, through ClaudeConfigFile's atomic,
+    formatting-preserving patch. When nothing differs the file, and its lock,
+    are not touched, so programs watching it see no change.
+
+    The entries mcphub wrote are recorded in config.yaml, so a full sync
+    removes those of servers that are no longer installed while leaving
+    entries added by hand or by other tools alone.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def claude_entry(self, server_config: Dict) -> Dict:
+        """The mcpServers entry of an installed server"""
+        command = self.manager.server_command(server_config)
+        return {
+            "command": command[0],
+            "args": command[1:],
+            "env": server_config.get("env", {})
+        }
+
+    def desired(self) -> Dict[str, Dict]:
+        """mcpServers entries of every installed server"""
+        with self.manager.config_store.lock:
+            installed = self.manager.config_store.get()["installed_servers"]
+            return {name: self.claude_entry(server_config) for name, server_config in installed.items()}
+
+    def plan(self, desired: Optional[Dict[str, Dict]] = None, remove: Iterable[str] = ()) -> SyncPlan:
+        """Diff desired entries, and entries to remove, against the current Claude config
+
+        Without desired every installed server is wanted, and entries mcphub
+        owns for servers that are no longer installed are removed.
+        """
+        full = desired is None
+        if full:
+            desired = self.desired()
+        remove = set(remove)
+        with self.manager.config_store.lock:
+            config = self.manager.config_store.get()
+            installed = set(config["installed_servers"]) | set(desired)
+            owned = set(config.get(OWNED_KEY) or [])
+        if full:
+            remove |= owned - set(desired)
+        config, version = self.manager.claude_config.read()
+        current = config.get("mcpServers") or {}
+
+        # Only entries mcphub manages take part in the diff
+        managed = {name: current[name] for name in set(desired) | remove if name in current}
+        wanted = {name: entry for name, entry in desired.items() if name not in remove}
+        change = diff_entries("claude", self.manager.claude_config_file, managed, wanted)
+
+        plan = SyncPlan(
+            added=sorted(change.added),
+            changed=sorted(change.changed),
+            removed=sorted(change.removed),
+            unmanaged=sorted(name for name in current
+                             if name not in installed and name not in owned and name not in remove),
+            owned=sorted((owned | set(wanted)) - remove),
+            version=version,
+        )
+        plan.updates.update(change.added)
+        plan.updates.update(change.changed)
+        plan.updates.update((name, None) for name in change.removed)
+        return plan
+
+    def apply(self, plan: SyncPlan) -> SyncPlan:
+        """Write the plan's entries, if there are any, and record which entries mcphub owns"""
+        if plan:
+            with timed("claude_config_update"):
+                plan.version = self.manager.claude_config.patch_servers(plan.updates)
+        with self.manager.config_store.transaction() as config:
+            if config.get(OWNED_KEY, []) != plan.owned:
+                config[OWNED_KEY] = plan.owned
+        return plan
+
+    def sync(self, desired: Optional[Dict[str, Dict]] = None, remove: Iterable[str] = ()) -> SyncPlan:
+        return self.apply(self.plan(desired, remove))
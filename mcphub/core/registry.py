@@ -1,49 +1,261 @@
-import requests
-import json
 import time
-from typing import Dict, List, Optional
+import hashlib
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
+from urllib.parse import urljoin, urlparse
 import yaml
+from .atomic import atomic_write_bytes
+from .registry_shards import INDEX_FILE, SHARD_FORMAT, load_yaml, shard_digest
+from .metrics import REGISTRY as METRICS, timed
+from .search import SearchIndex
+from .slug import SlugIndex
+
+if TYPE_CHECKING:
+    import requests
+
+# Use the libyaml parser when it is available, it is several times faster
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+REGISTRY_FETCHES = METRICS.counter(
+    "mcphub_registry_fetches_total", "Registry fetches by outcome", ["result"]
+)
+
+DEFAULT_REGISTRY_URL = "https://raw.githubusercontent.com/hemangjoshi37a/mcphub/main/registry/index.yaml"
+MONOLITHIC_FILE = "servers.yaml"
+
+
+def is_shard_index_url(url: str) -> bool:
+    """Whether url points at a sharded registry index rather than a single registry file"""
+    return urlparse(url).path.endswith("/" + INDEX_FILE)
+
 
 class MCPRegistry:
-    def __init__(self):
+    def __init__(self, registry_url: Optional[str] = None):
         self.config_dir = Path.home() / ".mcphub"
-        self.cache_file = self.config_dir / "registry_cache.yaml"
+        self.cache_file = self.config_dir / "registry_cache.pickle"
         self.cache_ttl = 3600  # 1 hour cache TTL
-        self.registry_url = "https://raw.githubusercontent.com/hemangjoshi37a/mcphub/main/registry/servers.yaml"
+        self.registry_url = registry_url or DEFAULT_REGISTRY_URL
+        self.request_timeout = 30
+        self.chunk_size = 64 * 1024
+        self.shard_workers = 8
         self.config_dir.mkdir(exist_ok=True)
 
-    def fetch_registry(self, force_refresh: bool = False) -> Dict:
-        """Fetch the MCP server registry with caching"""
-        if not force_refresh and self.cache_file.exists():
-            with open(self.cache_file, 'r') as f:
-                cache = yaml.safe_load(f)
-                if cache.get('timestamp', 0) + self.cache_ttl > time.time():
-                    return cache.get('data', {})
+        # In-memory snapshot of the registry and the search index built from it
+        self._cache: Optional[Dict] = None
+        self._search_index: Optional[SearchIndex] = None
+        self._search_index_digest: Optional[str] = None
+        self._slug_index: Optional[SlugIndex] = None
+        self._slug_index_digest: Optional[str] = None
+        self._session: Optional["requests.Session"] = None
+
+    def _is_current(self, cache: Optional[Dict]) -> bool:
+        """Whether a snapshot was downloaded from the registry URL in use"""
+        return cache is not None and cache.get('url') == self.registry_url
 
+    def _is_fresh(self, cache: Optional[Dict]) -> bool:
+        return self._is_current(cache) and cache.get('timestamp', 0) + self.cache_ttl > time.time()
+
+    def _load_cache_file(self) -> Optional[Dict]:
+        """Load the binary cache snapshot into memory"""
         try:
-            response = requests.get(self.registry_url)
+            with open(self.cache_file, 'rb') as f:
+                cache = pickle.load(f)
+        except Exception as e:
+            print(f"Error reading registry cache: {e}")
+            return None
+        if not isinstance(cache, dict) or 'data' not in cache:
+            return None
+        self._cache = cache
+        return cache
+
+    def _save_cache_file(self, cache: Dict):
+        """Persist the cache snapshot atomically"""
+        try:
+            atomic_write_bytes(self.cache_file, pickle.dumps(cache, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            print(f"Error writing registry cache: {e}")
+
+    def _get_session(self) -> "requests.Session":
+        if self._session is None:
+            # Imported on the first fetch, as requests is slow to import
+            import requests
+
+            self._session = requests.Session()
+        return self._session
+
+    def _get(self, url: str, validators: Optional[Dict] = None) -> Tuple[Optional[bytes], str, Dict]:
+        """Conditional streamed GET; returns (body or None on 304, sha1 digest, validators)"""
+        headers = {}
+        if validators:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+
+        with self._get_session().get(url, headers=headers, stream=True, timeout=self.request_timeout) as response:
+            if response.status_code == 304 and validators:
+                return None, validators.get('digest'), validators
             response.raise_for_status()
-            data = yaml.safe_load(response.text)
 
-            # Save to cache
-            cache = {
-                'timestamp': time.time(),
-                'data': data
+            digest = hashlib.sha1()
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                digest.update(chunk)
+                body.extend(chunk)
+
+            return bytes(body), digest.hexdigest(), {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
             }
-            with open(self.cache_file, 'w') as f:
-                yaml.dump(cache, f)
 
-            return data
+    @timed("registry_download")
+    def _download(self, cache: Optional[Dict]) -> Dict:
+        """Download the registry, sending validators from the previous snapshot"""
+        import requests
+
+        if not self._is_current(cache):
+            cache = None
+        if is_shard_index_url(self.registry_url):
+            try:
+                return self._download_sharded(cache if cache and 'shards' in cache else None)
+            except requests.HTTPError as e:
+                # Registries that do not publish shards only serve the monolithic file
+                print(f"Sharded registry unavailable ({e}), falling back to {MONOLITHIC_FILE}")
+                cache = cache if cache and 'shards' not in cache else None
+                return self._download_monolithic(cache, urljoin(self.registry_url, MONOLITHIC_FILE))
+        return self._download_monolithic(cache, self.registry_url)
+
+    def _download_monolithic(self, cache: Optional[Dict], url: str) -> Dict:
+        body, digest, validators = self._get(url, cache)
+        if body is None:
+            return dict(cache, timestamp=time.time())
+
+        if cache is not None and cache.get('digest') == digest:
+            # Server ignored our validators but the content is unchanged
+            data = cache['data']
+        else:
+            data = yaml.load(body, Loader=YAML_LOADER) or {'servers': []}
+
+        return {
+            'url': self.registry_url,
+            'timestamp': time.time(),
+            'etag': validators['etag'],
+            'last_modified': validators['last_modified'],
+            'digest': digest,
+            'data': data,
+        }
+
+    @timed("registry_shard_download")
+    def _fetch_shard(self, entry: Dict) -> List[Dict]:
+        body, _, _ = self._get(urljoin(self.registry_url, entry['path']))
+        if shard_digest(body) != entry['sha256']:
+            raise ValueError(f"Shard {entry['path']} does not match its index hash")
+        return load_yaml(body).get('servers', [])
+
+    def _download_sharded(self, cache: Optional[Dict]) -> Dict:
+        """Download the shard index, then only the shards whose hashes changed"""
+        body, digest, validators = self._get(self.registry_url, cache)
+        if body is None or (cache is not None and cache.get('digest') == digest):
+            return dict(cache, timestamp=time.time())
+
+        index = load_yaml(body)
+        if index.get('format') != SHARD_FORMAT:
+            raise ValueError(f"Unsupported registry shard format: {index.get('format')}")
+
+        old_shards = cache['shards'] if cache is not None else {}
+        shards = {}
+        missing = {}
+        for key, entry in index.get('shards', {}).items():
+            old = old_shards.get(key)
+            if old is not None and old['sha256'] == entry['sha256']:
+                shards[key] = old
+            else:
+                missing[key] = entry
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(len(missing), self.shard_workers)) as executor:
+                fetched = dict(zip(missing, executor.map(self._fetch_shard, missing.values())))
+            for key, entry in missing.items():
+                shards[key] = {'sha256': entry['sha256'], 'servers': fetched[key]}
+
+        shards = dict(sorted(shards.items()))
+        return {
+            'url': self.registry_url,
+            'timestamp': time.time(),
+            'etag': validators['etag'],
+            'last_modified': validators['last_modified'],
+            'digest': digest,
+            'serial': index.get('serial'),
+            'shards': shards,
+            'data': {'servers': [server for shard in shards.values() for server in shard['servers']]},
+        }
+
+    def fetch_registry(self, force_refresh: bool = False) -> Dict:
+        """Fetch the MCP server registry with caching"""
+        cache = self._cache
+        if cache is None and self.cache_file.exists():
+            cache = self._load_cache_file()
+
+        if not force_refresh and self._is_fresh(cache):
+            REGISTRY_FETCHES.labels("cache_hit").inc()
+            return cache['data']
+
+        try:
+            previous = cache
+            cache = self._download(cache)
+            unchanged = previous is not None and previous.get('digest') == cache.get('digest')
+            REGISTRY_FETCHES.labels("not_modified" if unchanged else "downloaded").inc()
+            self._cache = cache
+            self._save_cache_file(cache)
+            return cache['data']
 
         except Exception as e:
+            REGISTRY_FETCHES.labels("error").inc()
             print(f"Error fetching registry: {e}")
-            # Return cached data if available, even if expired
-            if self.cache_file.exists():
-                with open(self.cache_file, 'r') as f:
-                    return yaml.safe_load(f).get('data', {})
+            # Return cached data if available, even if expired, but never another registry's
+            if self._is_current(cache):
+                return cache['data']
             return {'servers': []}
 
+    def load_cached(self) -> Optional[Dict]:
+        """Return the last cached snapshot of this registry, however old, without touching the network"""
+        cache = self._cache
+        if cache is None and self.cache_file.exists():
+            cache = self._load_cache_file()
+        return cache['data'] if self._is_current(cache) else None
+
+    def export_yaml(self, path: Path) -> bool:
+        """Export the cached registry snapshot as YAML"""
+        try:
+            with open(path, 'w') as f:
+                yaml.safe_dump(self.fetch_registry(), f, sort_keys=False)
+            return True
+        except Exception as e:
+            print(f"Error exporting registry: {e}")
+            return False
+
+    def get_search_index(self) -> SearchIndex:
+        """Return the search index, rebuilding it only when the registry changed"""
+        registry = self.fetch_registry()
+        digest = self._cache.get('digest') if self._cache is not None else None
+        if self._search_index is None or self._search_index_digest != digest:
+            with timed("search_index_build"):
+                self._search_index = SearchIndex(registry.get('servers', []))
+            self._search_index_digest = digest
+        return self._search_index
+
+    def get_slug_index(self) -> SlugIndex:
+        """Return the slug index, rebuilding it only when the registry changed"""
+        registry = self.fetch_registry()
+        digest = self._cache.get('digest') if self._cache is not None else None
+        if self._slug_index is None or self._slug_index_digest != digest:
+            self._slug_index = SlugIndex(registry.get('servers', []))
+            self._slug_index_digest = digest
+        return self._slug_index
+
     def submit_server(self, server_data: Dict) -> bool:
         """Submit a new server to the registry via pull request"""
         try:
@@ -62,32 +274,23 @@ class MCPRegistry:
             print(f"Error submitting server: {e}")
             return False
 
-    def search_servers(self, query: str) -> List[Dict]:
-        """Search for servers in the registry"""
-        registry = self.fetch_registry()
-        query = query.lower()
-
-        results = []
-        for server in registry.get('servers', []):
-            # Search in name, description, and tags
-            if query in server['name'].lower() or \
-               query in server['description'].lower() or \
-               any(query in tag.lower() for tag in server['tags']):
-                results.append(server)
-
-        return results
+    def search_servers(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Search for servers in the registry, best matches first"""
+        return self.get_search_index().search(query, limit=limit)
 
     def get_server_metadata(self, server_name: str) -> Optional[Dict]:
-        """Get metadata for a specific server"""
-        registry = self.fetch_registry()
-        for server in registry.get('servers', []):
-            if server['name'].lower() == server_name.lower():
-                return server
-        return None
+        """Get metadata for a specific server by slug, name or alias"""
+        return self.get_slug_index().get(server_name)
+
+    def get_many(self, server_names: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """Get metadata for several servers with one registry lookup"""
+        return self.get_slug_index().get_many(server_names)
 
     def verify_server(self, server_data: Dict) -> bool:
         """Verify server compatibility and requirements"""
         try:
+            import requests
+
             # Check repository existence
             repo_url = server_data.get('repository', '')
             response = requests.head(repo_url)
@@ -0,0 +1,93 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from .registry import MCPRegistry
+from .slug import server_slug
+
+
+@dataclass
+class RegistryDiff:
+    servers: List[Dict]
+    added: List[Dict] = field(default_factory=list)
+    changed: List[Dict] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+def diff_servers(old: Dict[str, Dict], servers: List[Dict]) -> RegistryDiff:
+    """Compare a new server list against the previous one, keyed by slug"""
+    diff = RegistryDiff(servers=servers)
+    seen = set()
+    for server in servers:
+        slug = server_slug(server["name"])
+        seen.add(slug)
+        previous = old.get(slug)
+        if previous is None:
+            diff.added.append(server)
+        elif previous != server:
+            diff.changed.append(server)
+    diff.removed = [slug for slug in old if slug not in seen]
+    return diff
+
+
+class RegistryFeed:
+    """Refreshes the registry on a background thread and reports only what changed"""
+
+    def __init__(self, registry: MCPRegistry, on_change: Callable[[RegistryDiff], None],
+                 interval: Optional[float] = None):
+        self.registry = registry
+        self.on_change = on_change
+        self.interval = interval or registry.cache_ttl
+        self.periodic = True
+        self._servers: Dict[str, Dict] = {}
+        self._wake = threading.Event()
+        self._force = False
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def load_cached(self) -> List[Dict]:
+        """Return the cached snapshot immediately, for the first render"""
+        data = self.registry.load_cached() or {}
+        servers = data.get("servers", [])
+        self._servers = {server_slug(server["name"]): server for server in servers}
+        return servers
+
+    def start(self, periodic: bool = True):
+        """Start the refresh thread; it refreshes once now and then every interval if periodic"""
+        self.periodic = periodic
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mcphub-registry-feed", daemon=True)
+            self._thread.start()
+
+    def set_periodic(self, periodic: bool):
+        self.periodic = periodic
+        if periodic:
+            self._wake.set()
+
+    def refresh_now(self, force: bool = False):
+        """Ask the refresh thread to check the registry right away"""
+        self._force = self._force or force
+        self._wake.set()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.clear()
+            force, self._force = self._force, False
+            try:
+                data = self.registry.fetch_registry(force_refresh=force)
+                servers = data.get("servers", [])
+                diff = diff_servers(self._servers, servers)
+                if diff:
+                    self._servers = {server_slug(server["name"]): server for server in servers}
+                    self.on_change(diff)
+            except Exception as e:
+                print(f"Error refreshing registry: {e}")
+
+            self._wake.wait(self.interval if self.periodic else None)
@@ -0,0 +1,139 @@
+import hashlib
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+
+from .atomic import atomic_write_bytes
+
+# Use the libyaml implementations when they are available
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+SHARD_FORMAT = 1
+INDEX_FILE = "index.yaml"
+CHANGELOG_FILE = "changelog.yaml"
+SHARDS_DIR = "shards"
+# Number of serials kept in the changelog feed
+CHANGELOG_LENGTH = 100
+
+
+def shard_key(name: str, prefix_length: int = 1) -> str:
+    """Shard a server lands in, from the alphanumeric prefix of its name"""
+    prefix = "".join(ch for ch in name.lower() if ch.isascii() and ch.isalnum())[:prefix_length]
+    return prefix.ljust(prefix_length, "_") if prefix else "_" * prefix_length
+
+
+def shard_digest(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+def dump_shard(servers: List[Dict]) -> bytes:
+    return yaml.dump({'servers': servers}, Dumper=YAML_DUMPER, sort_keys=False,
+                     allow_unicode=True).encode('utf-8')
+
+
+def load_yaml(payload: bytes) -> Dict:
+    return yaml.load(payload, Loader=YAML_LOADER) or {}
+
+
+def split_shards(servers: List[Dict], prefix_length: int = 1) -> Dict[str, List[Dict]]:
+    """Group servers by shard key, keeping their registry order within each shard"""
+    shards: Dict[str, List[Dict]] = {}
+    for server in servers:
+        shards.setdefault(shard_key(server['name'], prefix_length), []).append(server)
+    return dict(sorted(shards.items()))
+
+
+def _read_existing(out_dir: Path) -> Optional[Dict]:
+    try:
+        with open(out_dir / INDEX_FILE, 'rb') as f:
+            return load_yaml(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def _load_shard_servers(out_dir: Path, entry: Dict) -> Dict[str, Dict]:
+    try:
+        with open(out_dir / entry['path'], 'rb') as f:
+            servers = load_yaml(f.read()).get('servers', [])
+    except FileNotFoundError:
+        return {}
+    return {server['name']: server for server in servers}
+
+
+def build_shards(servers: List[Dict], out_dir: Path, prefix_length: int = 1) -> Dict:
+    """Write the sharded layout for servers into out_dir and return the new index
+
+    The layout is ``index.yaml`` (serial plus the sha256 of every shard),
+    ``shards/<key>.yaml`` and ``changelog.yaml``, which lists the servers added,
+    changed and removed at each serial. The serial only moves when a shard's
+    content changes, so rebuilding an unchanged registry is a no-op.
+    """
+    out_dir = Path(out_dir)
+    shards_dir = out_dir / SHARDS_DIR
+    shards_dir.mkdir(parents=True, exist_ok=True)
+
+    previous = _read_existing(out_dir) or {}
+    previous_shards = previous.get('shards', {}) if previous.get('prefix_length') == prefix_length else {}
+
+    index_shards = {}
+    change = {'added': [], 'changed': [], 'removed': []}
+    for key, shard_servers in split_shards(servers, prefix_length).items():
+        payload = dump_shard(shard_servers)
+        digest = shard_digest(payload)
+        path = f"{SHARDS_DIR}/{key}.yaml"
+        index_shards[key] = {'path': path, 'sha256': digest, 'count': len(shard_servers)}
+
+        old_entry = previous_shards.get(key)
+        if old_entry is not None and old_entry.get('sha256') == digest:
+            continue
+        old_servers = _load_shard_servers(out_dir, old_entry) if old_entry else {}
+        for server in shard_servers:
+            old = old_servers.pop(server['name'], None)
+            if old is None:
+                change['added'].append(server['name'])
+            elif old != server:
+                change['changed'].append(server['name'])
+        change['removed'].extend(old_servers)
+        atomic_write_bytes(out_dir / path, payload)
+
+    new_paths = {entry['path'] for entry in index_shards.values()}
+    stale_paths = []
+    for key, old_entry in previous.get('shards', {}).items():
+        if old_entry['path'] in new_paths:
+            continue
+        if key in previous_shards:
+            change['removed'].extend(_load_shard_servers(out_dir, old_entry))
+        stale_paths.append(out_dir / old_entry['path'])
+
+    changed = index_shards != previous_shards or not previous
+    serial = previous.get('serial', 0) + (1 if changed else 0)
+    index = {
+        'format': SHARD_FORMAT,
+        'serial': serial,
+        'generated': int(time.time()) if changed else previous.get('generated'),
+        'prefix_length': prefix_length,
+        'count': len(servers),
+        'changelog': CHANGELOG_FILE,
+        'shards': index_shards,
+    }
+    if not changed:
+        return index
+
+    changelog_path = out_dir / CHANGELOG_FILE
+    try:
+        with open(changelog_path, 'rb') as f:
+            entries = load_yaml(f.read()).get('entries', [])
+    except FileNotFoundError:
+        entries = []
+    entries.append({'serial': serial, 'generated': index['generated'], **change})
+    atomic_write_bytes(changelog_path, yaml.dump(
+        {'entries': entries[-CHANGELOG_LENGTH:]}, Dumper=YAML_DUMPER, sort_keys=False).encode('utf-8'))
+
+    # Written last, so clients never see an index naming shards that do not exist yet
+    atomic_write_bytes(out_dir / INDEX_FILE, yaml.dump(index, Dumper=YAML_DUMPER, sort_keys=False).encode('utf-8'))
+    for path in stale_paths:
+        path.unlink(missing_ok=True)
+    return index
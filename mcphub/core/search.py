@@ -0,0 +1,141 @@
+import re
+from bisect import bisect_left
+from difflib import SequenceMatcher
+from typing import Dict, List, Set, Tuple
+
+# Field weights used when ranking results
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "tags": 2.0,
+    "description": 1.0,
+}
+
+# Match quality multipliers, best first
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.75
+SUBSTRING_MATCH = 0.5
+FUZZY_MATCH = 0.35
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens"""
+    return TOKEN_RE.findall(text.lower())
+
+
+def trigrams(token: str) -> Set[str]:
+    """Return the character trigrams of a token, padded at both ends"""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """In-memory inverted index over registry server entries"""
+
+    def __init__(self, servers: List[Dict], fuzzy_threshold: float = 0.7):
+        self.servers = servers
+        self.fuzzy_threshold = fuzzy_threshold
+        # token -> {server position: best field weight}
+        self.postings: Dict[str, Dict[int, float]] = {}
+        # trigram -> tokens containing it, used for substring and fuzzy lookups
+        self.trigram_index: Dict[str, Set[str]] = {}
+        self.vocabulary: List[str] = []
+        self.build()
+
+    def build(self):
+        """Build postings, the sorted vocabulary and the trigram index"""
+        for position, server in enumerate(self.servers):
+            fields = (
+                ("name", server.get("name", "")),
+                ("description", server.get("description", "")),
+                ("tags", " ".join(server.get("tags", []) or [])),
+            )
+            for field, text in fields:
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(text or ""):
+                    postings = self.postings.setdefault(token, {})
+                    if postings.get(position, 0.0) < weight:
+                        postings[position] = weight
+
+        self.vocabulary = sorted(self.postings)
+        for token in self.vocabulary:
+            for gram in trigrams(token):
+                self.trigram_index.setdefault(gram, set()).add(token)
+
+    def _prefix_tokens(self, term: str) -> List[str]:
+        """Return vocabulary tokens starting with term"""
+        tokens = []
+        start = bisect_left(self.vocabulary, term)
+        for token in self.vocabulary[start:]:
+            if not token.startswith(term):
+                break
+            tokens.append(token)
+        return tokens
+
+    def _candidate_tokens(self, term: str) -> Set[str]:
+        """Return vocabulary tokens sharing at least one trigram with term
+
+        Terms shorter than a trigram only share padded trigrams, which miss
+        matches inside a word, so the vocabulary is scanned for them instead.
+        """
+        if len(term) < 3:
+            return {token for token in self.vocabulary if term in token}
+        candidates = set()
+        for gram in trigrams(term):
+            candidates.update(self.trigram_index.get(gram, ()))
+        return candidates
+
+    def _match_term(self, term: str) -> Dict[str, float]:
+        """Map each vocabulary token matching term to its match quality"""
+        matches = {}
+        if term in self.postings:
+            matches[term] = EXACT_MATCH
+
+        for token in self._prefix_tokens(term):
+            matches.setdefault(token, PREFIX_MATCH)
+
+        for token in self._candidate_tokens(term):
+            if token in matches:
+                continue
+            if term in token:
+                matches[token] = SUBSTRING_MATCH
+            elif len(term) >= 3:
+                ratio = SequenceMatcher(None, term, token).ratio()
+                if ratio >= self.fuzzy_threshold:
+                    matches[token] = FUZZY_MATCH * ratio
+
+        return matches
+
+    def search(self, query: str, limit: int = None) -> List[Dict]:
+        """Return servers matching every query term, best match first"""
+        terms = tokenize(query)
+        if not terms:
+            return list(self.servers[:limit] if limit else self.servers)
+
+        scores: Dict[int, float] = {}
+        for i, term in enumerate(terms):
+            term_scores: Dict[int, float] = {}
+            for token, quality in self._match_term(term).items():
+                for position, weight in self.postings[token].items():
+                    score = weight * quality
+                    if term_scores.get(position, 0.0) < score:
+                        term_scores[position] = score
+
+            if i == 0:
+                scores = term_scores
+            else:
+                scores = {
+                    position: score + term_scores[position]
+                    for position, score in scores.items()
+                    if position in term_scores
+                }
+            if not scores:
+                return []
+
+        ranked: List[Tuple[float, int]] = sorted(
+            ((-score, position) for position, score in scores.items())
+        )
+        if limit:
+            ranked = ranked[:limit]
+        return [self.servers[position] for _, position in ranked]
@@ -1,14 +1,23 @@
+import copy
+import hashlib
 import os
 import json
-import yaml
-import git
+import shutil
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
-import subprocess
-import platform
-import sys
-import time
+from .artifact_cache import ArtifactCache
+from .claude_config import ClaudeConfigFile, get_claude_config_path
+from .config_store import ConfigStore
+from .config_watcher import ConfigChange, ConfigWatcher, config_files
+from .git_cache import GitCache
+from .metrics import timed
+from .planner import InstallPlan, InstallPlanner, InstallResult, ProgressCallback
+from .reconcile import Reconciler, SyncPlan
+from .registry import DEFAULT_REGISTRY_URL
+from .slug import server_slug
+from .supervisor import ProcessSpec, ProcessSupervisor
+from .venv_manager import VenvManager
 
 @dataclass
 class ServerConfig:
@@ -22,14 +31,52 @@ class ServerConfig:
     command_args: List[str] = None
     env: Dict[str, str] = None
 
+# Files whose content decides whether a server's dependencies must be reinstalled
+DEPENDENCY_FILES = [
+    "requirements.txt", "pyproject.toml", "setup.py", "setup.cfg", "poetry.lock", "Pipfile.lock",
+    "package.json", "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml",
+]
+
+def dependency_hash(server_dir: Path, server_data: Dict) -> str:
+    """Hash of a server's dependency manifests, lockfiles and registry install arguments"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([
+        server_data.get("runtime"), server_data.get("install_command"), server_data.get("install_args")
+    ]).encode("utf-8"))
+    for filename in DEPENDENCY_FILES:
+        path = server_dir / filename
+        if path.is_file():
+            digest.update(f"\0{filename}\0".encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+DEFAULT_SETTINGS = {
+    "registry_url": DEFAULT_REGISTRY_URL,
+    "auto_update": True,
+}
+
 class ServerManager:
-    def __init__(self):
+    def __init__(self, offline: bool = False):
+        self.offline = offline
         self.config_dir = Path.home() / ".mcphub"
         self.servers_dir = self.config_dir / "servers"
         self.config_file = self.config_dir / "config.yaml"
-        self.claude_config_file = Path(os.path.expandvars("%APPDATA%")) / "Claude" / "claude_desktop_config.json"
+        self.claude_config_file = get_claude_config_path()
+        self.claude_config = ClaudeConfigFile(self.claude_config_file)
         self.setup_directories()
-        self.load_config()
+        self.config_store = ConfigStore(self.config_file, lambda: {"installed_servers": {}})
+        self.git_cache = GitCache(self.config_dir / "git-cache")
+        self.artifact_cache = ArtifactCache(self.config_dir / "cache")
+        self.venv_manager = VenvManager(self.config_dir / "venv-template")
+        self.supervisor = ProcessSupervisor(self.config_dir / "logs")
+        self.reconciler = Reconciler(self)
+
+    def watch_configs(self, on_change: Callable[[ConfigChange], None]) -> ConfigWatcher:
+        """Start watching config.yaml and the Claude config, including edits by other programs"""
+        watcher = ConfigWatcher(config_files(self.claude_config_file, self.config_file))
+        watcher.subscribe(on_change)
+        watcher.start()
+        return watcher
 
     def setup_directories(self):
         """Create necessary directories if they don't exist"""
@@ -37,125 +84,176 @@ class ServerManager:
         self.servers_dir.mkdir(exist_ok=True)
 
     def load_config(self) -> Dict:
-        """Load configuration from config file"""
-        if self.config_file.exists():
-            with open(self.config_file, 'r') as f:
-                return yaml.safe_load(f) or {"installed_servers": {}}
-        return {"installed_servers": {}}
+        """Return a copy of the cached configuration"""
+        return self.config_store.copy()
 
     def save_config(self, config: Dict):
-        """Save configuration to config file"""
-        with open(self.config_file, 'w') as f:
-            yaml.safe_dump(config, f)
+        """Replace the configuration; the write to disk is batched"""
+        self.config_store.set(config)
+
+    def flush_config(self):
+        """Write pending configuration changes to disk immediately"""
+        self.config_store.flush()
+
+    def get_settings(self) -> Dict:
+        """Return application settings merged over the defaults"""
+        with self.config_store.lock:
+            return dict(DEFAULT_SETTINGS, **self.config_store.get().get("settings", {}))
+
+    def update_settings(self, **settings):
+        """Update application settings"""
+        with self.config_store.transaction() as config:
+            config.setdefault("settings", {}).update(settings)
 
     def install_server(self, server_data: Dict) -> bool:
         """Install an MCP server from its repository"""
         try:
-            # Create server directory
-            server_dir = self.servers_dir / server_data["name"].lower().replace(" ", "_")
-            server_dir.mkdir(exist_ok=True)
-
-            # Clone repository if it has one
-            if server_data.get("repository"):
-                git.Repo.clone_from(server_data["repository"], server_dir)
-
-            # Install server based on runtime
-            if server_data.get("runtime") == "python":
-                if os.path.exists(server_dir / "requirements.txt"):
-                    subprocess.run(
-                        [sys.executable, "-m", "pip", "install", "-r", str(server_dir / "requirements.txt")],
-                        check=True
-                    )
-            elif server_data.get("runtime") == "node":
-                if "install_command" in server_data and server_data["install_command"] == "npm":
-                    install_args = ["npm"] + server_data.get("install_args", [])
-                    subprocess.run(install_args, check=True)
-
-            # Save server configuration
-            config = self.load_config()
-            server_name = server_data["name"].lower().replace(" ", "_")
-            config["installed_servers"][server_name] = {
-                "version": server_data["version"],
-                "install_path": str(server_dir),
-                "enabled": True,
-                "runtime": server_data.get("runtime", "node"),
-                "port": server_data.get("default_config", {}).get("port", 8000),
-                "auth_token": server_data.get("default_config", {}).get("auth_token", ""),
-                "command_args": server_data.get("command_args", []),
-                "env": server_data.get("default_config", {}).get("env", {})
-            }
-            self.save_config(config)
-
-            # Update Claude desktop config
-            self.update_claude_config(server_name, config["installed_servers"][server_name])
-
+            server_name, server_config = self.prepare_server(server_data)
+            self.record_installs({server_name: server_config})
             return True
 
         except Exception as e:
             print(f"Error installing server: {e}")
             return False
 
+    @timed("install_prepare")
+    def prepare_server(self, server_data: Dict) -> Tuple[str, Dict]:
+        """Clone a server and install its dependencies without touching any config"""
+        server_name = server_slug(server_data["name"])
+        server_dir = self.servers_dir / server_name
+
+        # Check out the pinned version through the shared mirror cache,
+        # reusing an existing checkout so reinstalls only fetch what changed
+        if server_data.get("repository"):
+            with timed("git_checkout"):
+                self.git_cache.checkout(server_data["repository"], server_dir, server_data.get("version"))
+        else:
+            server_dir.mkdir(exist_ok=True)
+
+        python_path = self.install_dependencies(server_data, server_dir)
+        return server_name, self.build_server_config(server_data, server_dir, python_path)
+
+    def build_server_config(self, server_data: Dict, server_dir: Path, python_path: Optional[Path]) -> Dict:
+        """The installed_servers entry of a server whose files and packages are in place"""
+        server_config = {
+            "version": server_data["version"],
+            "install_path": str(server_dir),
+            "enabled": True,
+            "runtime": server_data.get("runtime", "node"),
+            "port": server_data.get("default_config", {}).get("port", 8000),
+            "auth_token": server_data.get("default_config", {}).get("auth_token", ""),
+            "command_args": server_data.get("command_args", []),
+            "env": server_data.get("default_config", {}).get("env", {}),
+            "deps_hash": dependency_hash(server_dir, server_data)
+        }
+        if python_path:
+            server_config["python"] = str(python_path)
+        # The version may not exist as a tag, so record what was actually checked out
+        commit = self.git_cache.head_commit(server_dir)
+        if commit:
+            server_config["commit"] = commit
+        return server_config
+
+    @timed("install_dependencies")
+    def install_dependencies(self, server_data: Dict, server_dir: Path) -> Optional[Path]:
+        """Install a checked-out server's packages, returning its venv interpreter for Python servers"""
+        # Install server based on runtime, going through the shared artifact cache
+        python_path = None
+        if server_data.get("runtime") == "python":
+            # Each Python server gets its own venv inside its install directory
+            python_path = self.venv_manager.ensure(server_dir / ".venv")
+            if os.path.exists(server_dir / "requirements.txt"):
+                self.artifact_cache.pip_install(
+                    ["-r", str(server_dir / "requirements.txt")], python=str(python_path), offline=self.offline
+                )
+        elif server_data.get("runtime") == "node":
+            if "install_command" in server_data and server_data["install_command"] == "npm":
+                self.artifact_cache.npm_install(server_data.get("install_args", []), offline=self.offline)
+        return python_path
+
+    @timed("record_installs")
+    def record_installs(self, installed: Dict[str, Dict]):
+        """Save prepared servers with one config write and one Claude config write"""
+        if not installed:
+            return
+        with self.config_store.transaction() as config:
+            config.setdefault("installed_servers", {}).update(installed)
+
+        # Update Claude desktop config
+        self.update_claude_config_many(installed)
+
+    def plan_installs(self, servers: Iterable[Dict]) -> InstallPlan:
+        """Plan the deduplicated install steps of several servers without running them"""
+        return InstallPlanner(self).plan(servers)
+
+    def install_many(self, servers: Iterable[Dict], max_workers: int = 4,
+                     progress: Optional[ProgressCallback] = None) -> List[InstallResult]:
+        """Install several servers through one deduplicated step plan and commit their configs together"""
+        planner = InstallPlanner(self)
+        return planner.execute(planner.plan(servers), max_workers=max_workers, progress=progress)
+
+    def server_command(self, server_config: Dict) -> List[str]:
+        """Build the command line that launches an installed server"""
+        if server_config.get("runtime") == "python":
+            executable = server_config.get("python") or "python"
+        else:
+            executable = "node"
+        return [executable] + list(server_config.get("command_args") or [])
+
     def update_claude_config(self, server_name: str, server_config: Dict):
         """Update the Claude desktop configuration file"""
-        try:
-            if self.claude_config_file.exists():
-                with open(self.claude_config_file, 'r') as f:
-                    claude_config = json.load(f)
-            else:
-                claude_config = {}
-
-            if "mcpServers" not in claude_config:
-                claude_config["mcpServers"] = {}
-
-            # Prepare server config
-            cmd = "python" if server_config["runtime"] == "python" else "node"
-            claude_config["mcpServers"][server_name] = {
-                "command": cmd,
-                "args": server_config["command_args"],
-                "env": server_config.get("env", {})
-            }
-
-            # Save updated config
-            with open(self.claude_config_file, 'w') as f:
-                json.dump(claude_config, f, indent=2)
+        self.update_claude_config_many({server_name: server_config})
 
+    def update_claude_config_many(self, server_configs: Dict[str, Dict]):
+        """Update several servers in the Claude desktop configuration with at most one write"""
+        try:
+            # Only entries that differ from the file are written
+            self.reconciler.sync({
+                server_name: self.reconciler.claude_entry(server_config)
+                for server_name, server_config in server_configs.items()
+            })
         except Exception as e:
             print(f"Error updating Claude config: {e}")
 
+    def sync_claude_config(self, check: bool = False) -> SyncPlan:
+        """Make the Claude config match every installed server; with check, only report the drift"""
+        plan = self.reconciler.plan()
+        return plan if check else self.reconciler.apply(plan)
+
+    @timed("uninstall")
     def uninstall_server(self, server_name: str) -> bool:
         """Uninstall an MCP server"""
         try:
-            config = self.load_config()
-            if server_name in config["installed_servers"]:
-                server_dir = Path(config["installed_servers"][server_name]["install_path"])
+            # Its files cannot be removed from under it, and on Windows not at all while it runs;
+            # stopped outside the transaction, as it waits for the server to exit
+            self.supervisor.stop(server_name)
+
+            # Under the store lock, and rolled back if removing the files fails
+            with self.config_store.transaction() as config:
+                server_config = config["installed_servers"].pop(server_name, None)
+                if server_config is None:
+                    return False
+                server_dir = Path(server_config["install_path"])
                 if server_dir.exists():
                     shutil.rmtree(server_dir)
 
-                # Remove from Claude config
-                if self.claude_config_file.exists():
-                    with open(self.claude_config_file, 'r') as f:
-                        claude_config = json.load(f)
-                    
-                    if "mcpServers" in claude_config and server_name in claude_config["mcpServers"]:
-                        del claude_config["mcpServers"][server_name]
-                        
-                        with open(self.claude_config_file, 'w') as f:
-                            json.dump(claude_config, f, indent=2)
-
-                del config["installed_servers"][server_name]
-                self.save_config(config)
-                return True
-            return False
+            # Remove from Claude config, which is not written if the entry is already gone;
+            # should this fail, the next sync removes the entry as mcphub owns it
+            self.reconciler.sync({}, remove=[server_name])
+            return True
 
         except Exception as e:
             print(f"Error uninstalling server: {e}")
             return False
 
+    @timed("get_installed_servers")
     def get_installed_servers(self) -> List[ServerConfig]:
         """Get list of installed servers"""
-        config = self.load_config()
         servers = []
-        for name, data in config["installed_servers"].items():
+        with self.config_store.lock:
+            installed = self.config_store.get()["installed_servers"]
+            items = list(installed.items())
+        for name, data in items:
             servers.append(ServerConfig(
                 name=name,
                 version=data["version"],
@@ -164,24 +262,50 @@ class ServerManager:
                 enabled=data["enabled"],
                 install_path=data["install_path"],
                 runtime=data.get("runtime", "node"),
-                command_args=data.get("command_args", []),
-                env=data.get("env", {})
+                command_args=list(data.get("command_args", [])),
+                env=dict(data.get("env", {}))
             ))
         return servers
 
     def update_server_config(self, server_name: str, new_config: Dict) -> bool:
         """Update server configuration"""
         try:
-            config = self.load_config()
-            if server_name in config["installed_servers"]:
-                config["installed_servers"][server_name].update(new_config)
-                self.save_config(config)
-
-                # Update Claude config
-                self.update_claude_config(server_name, config["installed_servers"][server_name])
-                return True
-            return False
+            with self.config_store.lock:
+                if server_name not in self.config_store.get()["installed_servers"]:
+                    return False
+                with self.config_store.transaction() as config:
+                    config["installed_servers"][server_name].update(new_config)
+                    server_config = copy.deepcopy(config["installed_servers"][server_name])
+
+            # Update Claude config
+            self.update_claude_config(server_name, server_config)
+            return True
 
         except Exception as e:
             print(f"Error updating server config: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def start_server(self, server_name: str) -> bool:
+        """Start an installed server under the process supervisor"""
+        installed = self.config_store.copy()["installed_servers"]
+        if server_name not in installed:
+            return False
+        server_config = installed[server_name]
+        return self.supervisor.start(ProcessSpec(
+            name=server_name,
+            command=self.server_command(server_config),
+            env={key: str(value) for key, value in (server_config.get("env") or {}).items()},
+            cwd=server_config.get("install_path"),
+        ))
+
+    def stop_server(self, server_name: str) -> bool:
+        """Stop a supervised server gracefully"""
+        return self.supervisor.stop(server_name)
+
+    def stop_all_servers(self):
+        """Stop every supervised server"""
+        self.supervisor.stop_all()
+
+    def server_status(self, server_name: Optional[str] = None) -> Dict[str, Dict]:
+        """Report uptime, restarts, RSS and CPU of supervised servers"""
+        return self.supervisor.status(server_name)
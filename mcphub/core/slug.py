@@ -0,0 +1,72 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+
+def server_slug(name: str) -> str:
+    """Canonical key of a server, used for install directories, config.yaml and the Claude config"""
+    # Must stay byte-for-byte what earlier releases used, or existing installs lose their keys
+    return name.lower().replace(" ", "_")
+
+
+def claude_entry_updates(name: str, entry: Dict) -> Dict[str, Optional[Dict]]:
+    """Claude config updates that store a server's entry under its slug
+
+    Earlier agent releases keyed entries by display name, so such an entry is
+    removed rather than left to launch the same server a second time.
+    """
+    key = server_slug(name)
+    updates: Dict[str, Optional[Dict]] = {key: entry}
+    if name != key:
+        updates[name] = None
+    return updates
+
+
+def normalize_name(name: str) -> str:
+    """Loose lookup key, so "Git MCP Server", "git-mcp-server" and "git_mcp_server" all match"""
+    return _SEPARATORS.sub("_", name.lower()).strip("_")
+
+
+def server_aliases(server: Dict) -> List[str]:
+    """Alternative names a registry entry can be looked up by"""
+    aliases = list(server.get("aliases") or [])
+    repository = server.get("repository")
+    if repository:
+        repo_name = repository.rstrip("/").rsplit("/", 1)[-1]
+        aliases.append(repo_name[:-4] if repo_name.endswith(".git") else repo_name)
+    return aliases
+
+
+class SlugIndex:
+    """Registry entries by canonical slug, with aliases, built once per registry snapshot"""
+
+    def __init__(self, servers: Iterable[Dict]):
+        self.by_slug: Dict[str, Dict] = {}
+        self._lookup: Dict[str, Dict] = {}
+        aliases = []
+        for server in servers:
+            slug = server_slug(server["name"])
+            self.by_slug.setdefault(slug, server)
+            self._lookup.setdefault(normalize_name(server["name"]), server)
+            aliases.extend((alias, server) for alias in server_aliases(server))
+        # Aliases never shadow a server's own name
+        for alias, server in aliases:
+            self._lookup.setdefault(normalize_name(alias), server)
+
+    def __len__(self) -> int:
+        return len(self.by_slug)
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def get(self, name: str) -> Optional[Dict]:
+        """Look up a server by slug, display name or alias"""
+        server = self.by_slug.get(name)
+        if server is None:
+            server = self._lookup.get(normalize_name(name))
+        return server
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """Look up several servers, mapping each requested name to its entry or None"""
+        return {name: self.get(name) for name in names}
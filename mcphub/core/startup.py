@@ -0,0 +1,58 @@
+import os
+import sys
+import threading
+import time
+from typing import List, Optional, TextIO, Tuple
+
+from .metrics import REGISTRY
+
+STARTUP_PHASE_DURATION = REGISTRY.gauge(
+    "mcphub_startup_phase_seconds", "Duration of each phase of the last GUI startup", ["phase"]
+)
+
+
+class StartupTimer:
+    """Per-phase startup timings, reported like -X importtime but for whole phases
+
+    Each mark() closes the phase that started at the previous mark on the same
+    thread, so phases run in the background are timed separately from the UI.
+    A thread's first phase starts at the latest mark made by any thread.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.environ.get("MCPHUB_STARTUP_TIMING", "") not in ("", "0")
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, str, float, float]] = []
+        self._last = {}
+        self._latest = self.started
+        self._lock = threading.Lock()
+        self._reported = False
+
+    def mark(self, phase: str):
+        """Record the phase that just finished on the calling thread"""
+        now = time.perf_counter()
+        thread = threading.current_thread().name
+        with self._lock:
+            begin = self._last.get(thread, self._latest)
+            self._last[thread] = self._latest = now
+            self.phases.append((phase, thread, begin - self.started, now - begin))
+        STARTUP_PHASE_DURATION.labels(phase).set(now - begin)
+
+    def report(self, out: TextIO = sys.stderr):
+        """Print the phases once, if startup timing is enabled"""
+        with self._lock:
+            if not self.enabled or self._reported:
+                return
+            self._reported = True
+            phases = list(self.phases)
+        out.write("startup: phase                         | thread           |  start ms |   self ms\n")
+        for phase, thread, begin, duration in phases:
+            out.write(f"startup: {phase:<29} | {thread:<16.16} | {begin * 1000:>9.1f} | {duration * 1000:>9.1f}\n")
+        out.write(f"startup: total {(time.perf_counter() - self.started) * 1000:.1f} ms\n")
+        out.flush()
+
+
+# Created on first import, which app.py does before its other imports
+STARTUP = StartupTimer()
@@ -0,0 +1,259 @@
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import psutil
+except ImportError:  # optional, status falls back to /proc where available
+    psutil = None
+
+
+@dataclass
+class ProcessSpec:
+    name: str
+    command: List[str]
+    env: Dict[str, str] = field(default_factory=dict)
+    cwd: Optional[str] = None
+
+
+class ManagedProcess:
+    """A supervised server process and its restart bookkeeping"""
+
+    def __init__(self, spec: ProcessSpec, logger: logging.Logger, initial_backoff: float):
+        self.spec = spec
+        self.logger = logger
+        self.popen: Optional[subprocess.Popen] = None
+        self.started_at: Optional[float] = None
+        self.restarts = 0
+        self.backoff = initial_backoff
+        self.next_restart_at: Optional[float] = None
+        self.stopping = False
+        self.last_exit_code: Optional[int] = None
+        self.ps_process = None
+
+    @property
+    def running(self) -> bool:
+        return self.popen is not None and self.popen.poll() is None
+
+
+class ProcessSupervisor:
+    """Spawns server processes, restarts them when they crash and captures their output"""
+
+    def __init__(self, log_dir: Path, max_log_bytes: int = 5 * 1024 * 1024, log_backups: int = 3,
+                 initial_backoff: float = 1.0, max_backoff: float = 60.0, stable_after: float = 60.0,
+                 poll_interval: float = 0.5):
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.max_log_bytes = max_log_bytes
+        self.log_backups = log_backups
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.poll_interval = poll_interval
+        self.processes: Dict[str, ManagedProcess] = {}
+        self._lock = threading.RLock()
+        self._monitor: Optional[threading.Thread] = None
+
+    def _logger_for(self, name: str) -> logging.Logger:
+        logger = logging.getLogger(f"mcphub.servers.{name}")
+        if not logger.handlers:
+            handler = RotatingFileHandler(
+                self.log_dir / f"{name}.log", maxBytes=self.max_log_bytes, backupCount=self.log_backups
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+        return logger
+
+    def log_path(self, name: str) -> Path:
+        return self.log_dir / f"{name}.log"
+
+    def _spawn(self, managed: ManagedProcess):
+        spec = managed.spec
+        env = dict(os.environ)
+        env.update(spec.env or {})
+        kwargs = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            # Own process group, so npm/npx wrappers are signalled with their children
+            kwargs["start_new_session"] = True
+
+        managed.popen = subprocess.Popen(
+            spec.command, cwd=spec.cwd, env=env,
+            # stdio servers exit on EOF, so keep stdin open but unused
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            **kwargs
+        )
+        managed.started_at = time.time()
+        managed.next_restart_at = None
+        managed.ps_process = None
+        managed.logger.info(f"[mcphub] started pid {managed.popen.pid}: {' '.join(spec.command)}")
+
+        threading.Thread(
+            target=self._pump_output, args=(managed, managed.popen),
+            name=f"mcphub-log-{spec.name}", daemon=True
+        ).start()
+
+    def _close_stdin(self, popen: subprocess.Popen):
+        """Release the stdin pipe of an exited process, which would otherwise leak one fd per restart"""
+        if popen.stdin is not None:
+            try:
+                popen.stdin.close()
+            except OSError:
+                pass
+
+    def _pump_output(self, managed: ManagedProcess, popen: subprocess.Popen):
+        for line in iter(popen.stdout.readline, b""):
+            managed.logger.info(line.decode(errors="replace").rstrip())
+        popen.stdout.close()
+
+    def _ensure_monitor(self):
+        if self._monitor is None or not self._monitor.is_alive():
+            self._monitor = threading.Thread(target=self._monitor_loop, name="mcphub-supervisor", daemon=True)
+            self._monitor.start()
+
+    def _monitor_loop(self):
+        while True:
+            time.sleep(self.poll_interval)
+            now = time.time()
+            with self._lock:
+                for managed in self.processes.values():
+                    if managed.stopping or managed.popen is None:
+                        continue
+
+                    if managed.running:
+                        if managed.started_at and now - managed.started_at > self.stable_after:
+                            managed.backoff = self.initial_backoff
+                        continue
+
+                    if managed.next_restart_at is None:
+                        self._close_stdin(managed.popen)
+                        managed.last_exit_code = managed.popen.returncode
+                        managed.next_restart_at = now + managed.backoff
+                        managed.logger.info(
+                            f"[mcphub] exited with code {managed.last_exit_code}, "
+                            f"restarting in {managed.backoff:.1f}s"
+                        )
+                        managed.backoff = min(managed.backoff * 2, self.max_backoff)
+                    elif now >= managed.next_restart_at:
+                        managed.restarts += 1
+                        try:
+                            self._spawn(managed)
+                        except OSError as e:
+                            managed.logger.info(f"[mcphub] restart failed: {e}")
+                            managed.next_restart_at = None
+
+    def start(self, spec: ProcessSpec) -> bool:
+        """Start a server process, or do nothing if it is already running"""
+        with self._lock:
+            managed = self.processes.get(spec.name)
+            if managed is not None and managed.running:
+                return True
+            managed = ManagedProcess(spec, self._logger_for(spec.name), self.initial_backoff)
+            try:
+                self._spawn(managed)
+            except OSError as e:
+                print(f"Error starting server {spec.name}: {e}")
+                return False
+            self.processes[spec.name] = managed
+        self._ensure_monitor()
+        return True
+
+    def _signal(self, popen: subprocess.Popen, sig: int):
+        if sys.platform == "win32":
+            if sig == signal.SIGTERM:
+                popen.terminate()
+            else:
+                popen.kill()
+            return
+        try:
+            os.killpg(popen.pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def stop(self, name: str, timeout: float = 10.0) -> bool:
+        """Stop a server with SIGTERM, escalating to SIGKILL after timeout seconds"""
+        with self._lock:
+            managed = self.processes.get(name)
+            if managed is None:
+                return False
+            managed.stopping = True
+        popen = managed.popen
+        if popen is not None and popen.poll() is None:
+            self._signal(popen, signal.SIGTERM)
+            try:
+                popen.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self._signal(popen, signal.SIGKILL if hasattr(signal, "SIGKILL") else signal.SIGTERM)
+                popen.wait()
+            managed.logger.info(f"[mcphub] stopped with code {popen.returncode}")
+        if popen is not None:
+            self._close_stdin(popen)
+        with self._lock:
+            self.processes.pop(name, None)
+        return True
+
+    def stop_all(self, timeout: float = 10.0):
+        """Stop every supervised process"""
+        for name in list(self.processes):
+            self.stop(name, timeout)
+
+    def _resource_usage(self, managed: ManagedProcess) -> Dict[str, Optional[float]]:
+        pid = managed.popen.pid
+        if psutil is not None:
+            try:
+                if managed.ps_process is None:
+                    managed.ps_process = psutil.Process(pid)
+                return {
+                    "rss": managed.ps_process.memory_info().rss,
+                    "cpu_percent": managed.ps_process.cpu_percent(interval=None),
+                }
+            except psutil.Error:
+                return {"rss": None, "cpu_percent": None}
+
+        # Linux fallback: RSS from statm and average CPU over the process lifetime
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+            uptime = max(time.time() - managed.started_at, 1e-6)
+            return {"rss": rss, "cpu_percent": 100.0 * cpu_seconds / uptime}
+        except (OSError, ValueError, IndexError, AttributeError):
+            return {"rss": None, "cpu_percent": None}
+
+    def status(self, name: Optional[str] = None) -> Dict[str, Dict]:
+        """Report pid, uptime, restart count, RSS and CPU of supervised processes"""
+        with self._lock:
+            names = [name] if name else list(self.processes)
+            report = {}
+            for process_name in names:
+                managed = self.processes.get(process_name)
+                if managed is None:
+                    continue
+                running = managed.running
+                entry = {
+                    "running": running,
+                    "pid": managed.popen.pid if running else None,
+                    "uptime": time.time() - managed.started_at if running else 0.0,
+                    "restarts": managed.restarts,
+                    "last_exit_code": managed.last_exit_code,
+                    "log_file": str(self.log_path(process_name)),
+                    "rss": None,
+                    "cpu_percent": None,
+                }
+                if running:
+                    entry.update(self._resource_usage(managed))
+                report[process_name] = entry
+            return report
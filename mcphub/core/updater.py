@@ -0,0 +1,221 @@
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .registry import MCPRegistry
+from .server_manager import ProgressCallback, ServerManager, dependency_hash
+from .venv_manager import _link_or_copy
+
+_VERSION = re.compile(r"^v?(\d+(?:\.\d+)*)(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$")
+
+
+def parse_version(version: str) -> Tuple:
+    """Sort key for a semantic version; pre-releases sort before their release"""
+    match = _VERSION.match(str(version).strip())
+    if match is None:
+        # Unparseable versions only compare equal to themselves
+        return ((), 0, (str(version),))
+    release = tuple(int(part) for part in match.group(1).split("."))
+    # Trailing zeros do not matter, so 1.0 == 1.0.0
+    while len(release) > 1 and release[-1] == 0:
+        release = release[:-1]
+    prerelease = match.group(2)
+    if prerelease is None:
+        return (release, 1, ())
+    identifiers = tuple(
+        (0, int(part), "") if part.isdigit() else (1, 0, part) for part in prerelease.split(".")
+    )
+    return (release, 0, identifiers)
+
+
+def is_newer(candidate: str, current: str) -> bool:
+    """Whether version candidate is semantically newer than current"""
+    candidate_key, current_key = parse_version(candidate), parse_version(current)
+    if not candidate_key[0] or not current_key[0]:
+        return False
+    return candidate_key > current_key
+
+
+@dataclass
+class UpdateCandidate:
+    name: str
+    current_version: str
+    new_version: str
+    server_data: Dict
+
+
+@dataclass
+class UpdateResult:
+    name: str
+    success: bool
+    duration: float
+    from_version: str
+    to_version: str
+    deps_reinstalled: bool = False
+    error: Optional[str] = None
+
+
+def _copy_for_update(src: Path, dst: Path):
+    """Copy an install directory, hardlinking files that are never modified in place
+
+    Git objects and packs are immutable, and the venv is only ever replaced as
+    a whole, so both are shared with the backup. Everything else is copied, as
+    a checkout rewrites it.
+    """
+    objects = src / ".git" / "objects"
+    objects_info = objects / "info"
+    venv = src / ".venv"
+
+    def copy_function(source: str, target: str):
+        path = Path(source)
+        if venv in path.parents or (objects in path.parents and objects_info not in path.parents):
+            _link_or_copy(source, target)
+        else:
+            shutil.copy2(source, target)
+
+    shutil.copytree(src, dst, symlinks=True, copy_function=copy_function)
+
+
+class UpdateEngine:
+    """Finds installed servers with newer registry versions and updates them in place"""
+
+    def __init__(self, manager: ServerManager, registry: Optional[MCPRegistry] = None):
+        self.manager = manager
+        self.registry = registry or MCPRegistry()
+
+    def check(self, names: Optional[Iterable[str]] = None) -> List[UpdateCandidate]:
+        """Join installed servers against the registry and return those with newer versions"""
+        installed = self.manager.load_config()["installed_servers"]
+        if names is not None:
+            installed = {name: installed[name] for name in names if name in installed}
+        entries = self.registry.get_many(installed)
+
+        candidates = []
+        for name, server_config in installed.items():
+            server_data = entries.get(name)
+            if server_data is None:
+                continue
+            current = str(server_config.get("version", ""))
+            latest = str(server_data.get("version", ""))
+            if is_newer(latest, current):
+                candidates.append(UpdateCandidate(name, current, latest, server_data))
+        return candidates
+
+    def _backup_dir(self, server_dir: Path) -> Path:
+        return server_dir.with_name(f"{server_dir.name}.bak")
+
+    def apply(self, candidate: UpdateCandidate) -> Tuple[UpdateResult, Optional[Dict]]:
+        """Update one server's files, returning its result and new config
+
+        The previous install is kept in a .bak directory until commit() or
+        rollback() is called; a failed update is rolled back here.
+        """
+        started = time.perf_counter()
+        result = UpdateResult(candidate.name, False, 0.0, candidate.current_version, candidate.new_version)
+        server_config = self.manager.load_config()["installed_servers"][candidate.name]
+        server_data = candidate.server_data
+        server_dir = Path(server_config["install_path"])
+        backup_dir = self._backup_dir(server_dir)
+
+        if backup_dir.exists():
+            shutil.rmtree(backup_dir)
+        new_config = None
+        try:
+            # The rename is the checkpoint: until the update is committed the old install is intact
+            os.replace(server_dir, backup_dir)
+            _copy_for_update(backup_dir, server_dir)
+
+            if server_data.get("repository"):
+                # An update must not record new_version over whatever the default branch holds
+                self.manager.git_cache.checkout(
+                    server_data["repository"], server_dir, candidate.new_version, strict=True
+                )
+
+            deps_hash = dependency_hash(server_dir, server_data)
+            new_config = dict(server_config, version=candidate.new_version, deps_hash=deps_hash)
+            commit = self.manager.git_cache.head_commit(server_dir)
+            if commit:
+                new_config["commit"] = commit
+            if deps_hash != server_config.get("deps_hash"):
+                # Rebuild the venv instead of upgrading the copy, which shares files with the backup
+                venv_dir = server_dir / ".venv"
+                if venv_dir.exists():
+                    shutil.rmtree(venv_dir)
+                python_path = self.manager.install_dependencies(server_data, server_dir)
+                if python_path:
+                    new_config["python"] = str(python_path)
+                result.deps_reinstalled = True
+            result.success = True
+        except Exception as e:
+            result.error = str(e)
+            new_config = None
+            self.rollback(result, server_dir)
+
+        result.duration = time.perf_counter() - started
+        return result, new_config
+
+    def commit(self, server_dir: Path):
+        """Drop the backup of a successfully updated server"""
+        shutil.rmtree(self._backup_dir(server_dir), ignore_errors=True)
+
+    def rollback(self, result: UpdateResult, server_dir: Path):
+        """Put the previous install back with a single rename"""
+        backup_dir = self._backup_dir(server_dir)
+        try:
+            if backup_dir.exists():
+                if server_dir.exists():
+                    shutil.rmtree(server_dir)
+                os.replace(backup_dir, server_dir)
+        except OSError as e:
+            result.error = f"{result.error} (rollback failed: {e})"
+
+    def update(self, candidates: Optional[Iterable[UpdateCandidate]] = None, max_workers: int = 4,
+               progress: Optional[ProgressCallback] = None) -> List[UpdateResult]:
+        """Apply updates in parallel and save the updated configs together"""
+        candidates = list(self.check() if candidates is None else candidates)
+        if not candidates:
+            return []
+
+        installed = self.manager.load_config()["installed_servers"]
+        server_dirs = {c.name: Path(installed[c.name]["install_path"]) for c in candidates}
+        status = self.manager.server_status()
+        running = [c.name for c in candidates if status.get(c.name, {}).get("running")]
+        for name in running:
+            self.manager.stop_server(name)
+
+        updated: Dict[str, Dict] = {}
+
+        def run(candidate: UpdateCandidate) -> UpdateResult:
+            if progress:
+                progress(candidate.name, "started", 0.0)
+            result, new_config = self.apply(candidate)
+            if new_config is not None:
+                updated[candidate.name] = new_config
+            if progress:
+                progress(candidate.name, "done" if result.success else "failed", result.duration)
+            return result
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            results = list(executor.map(run, candidates))
+
+        try:
+            self.manager.record_installs(updated)
+        except Exception as e:
+            print(f"Error saving updated servers: {e}")
+            for result in results:
+                if result.success:
+                    result.success = False
+                    result.error = str(e)
+                    self.rollback(result, server_dirs[result.name])
+        for result in results:
+            if result.success:
+                self.commit(server_dirs[result.name])
+
+        for name in running:
+            self.manager.start_server(name)
+        return results
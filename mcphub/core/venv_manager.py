@@ -0,0 +1,85 @@
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+# Scripts larger than this are binaries and never contain the venv path as text
+MAX_SCRIPT_SIZE = 1024 * 1024
+
+
+def venv_python(venv_dir: Path) -> Path:
+    """Return the interpreter path inside a virtualenv"""
+    if sys.platform == "win32":
+        return venv_dir / "Scripts" / "python.exe"
+    return venv_dir / "bin" / "python"
+
+
+def _link_or_copy(src: str, dst: str):
+    """Hardlink a file, falling back to a copy across filesystems"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class VenvManager:
+    """Creates per-server virtualenvs by cloning a pre-built template venv"""
+
+    def __init__(self, template_dir: Optional[Path] = None, python: str = sys.executable):
+        self.template_dir = template_dir or Path.home() / ".mcphub" / "venv-template"
+        self.python = python
+        self._lock = threading.Lock()
+
+    def ensure_template(self) -> Path:
+        """Build the template venv once, the slow path every clone avoids"""
+        with self._lock:
+            if not (self.template_dir / "pyvenv.cfg").exists():
+                build_dir = self.template_dir.with_name(f"{self.template_dir.name}.{os.getpid()}.build")
+                if build_dir.exists():
+                    shutil.rmtree(build_dir)
+                subprocess.run([self.python, "-m", "venv", str(build_dir)], check=True)
+                if self.template_dir.exists():
+                    shutil.rmtree(self.template_dir)
+                os.replace(build_dir, self.template_dir)
+                # The venv was built under a temporary name
+                self.relocate(self.template_dir, build_dir)
+        return self.template_dir
+
+    def create(self, venv_dir: Path) -> Path:
+        """Create venv_dir as a hardlinked clone of the template, returning its interpreter"""
+        template = self.ensure_template()
+        if venv_dir.exists():
+            shutil.rmtree(venv_dir)
+        shutil.copytree(template, venv_dir, symlinks=True, copy_function=_link_or_copy)
+        self.relocate(venv_dir, template)
+        return venv_python(venv_dir)
+
+    def ensure(self, venv_dir: Path) -> Path:
+        """Return the interpreter of venv_dir, creating the venv if it is missing"""
+        python = venv_python(venv_dir)
+        if python.exists() and (venv_dir / "pyvenv.cfg").exists():
+            return python
+        return self.create(venv_dir)
+
+    def relocate(self, venv_dir: Path, old_dir: Path):
+        """Rewrite absolute paths of old_dir left in scripts and pyvenv.cfg"""
+        old = str(old_dir).encode()
+        new = str(venv_dir).encode()
+        scripts_dir = venv_dir / ("Scripts" if sys.platform == "win32" else "bin")
+        candidates = [venv_dir / "pyvenv.cfg"] + list(scripts_dir.iterdir())
+
+        for path in candidates:
+            if path.is_symlink() or not path.is_file() or path.stat().st_size > MAX_SCRIPT_SIZE:
+                continue
+            content = path.read_bytes()
+            if old not in content:
+                continue
+            # Write a new file rather than editing in place, which would
+            # change the hardlinked original in the template too
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            tmp_path.write_bytes(content.replace(old, new))
+            shutil.copymode(path, tmp_path)
+            os.replace(tmp_path, path)
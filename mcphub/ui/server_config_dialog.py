@@ -1,8 +1,5 @@
 import customtkinter as ctk
 from typing import Dict, Callable
-import json
-from pathlib import Path
-import os
 
 class EnvVarDialog(ctk.CTkToplevel):
     def __init__(self, parent, on_save):
@@ -172,34 +169,7 @@ class ServerConfigDialog(ctk.CTkToplevel):
             "env": self.env_vars
         }
 
-        # Update Claude desktop config
-        self.update_claude_config(config)
-        
-        # Call the original save callback
+        # The save callback also syncs the Claude desktop config
         self.on_save(config)
         self.destroy()
 
-    def update_claude_config(self, config):
-        config_path = Path(os.path.expandvars("%APPDATA%")) / "Claude" / "claude_desktop_config.json"
-        
-        if config_path.exists():
-            try:
-                with open(config_path, 'r') as f:
-                    claude_config = json.load(f)
-
-                # Update MCP server config
-                if "mcpServers" not in claude_config:
-                    claude_config["mcpServers"] = {}
-
-                server_name = self.title().replace("Configure ", "").lower()
-                claude_config["mcpServers"][server_name] = {
-                    "command": config.get("command", "node"),
-                    "args": config.get("command_args", []),
-                    "env": config.get("env", {})
-                }
-
-                with open(config_path, 'w') as f:
-                    json.dump(claude_config, f, indent=2)
-
-            except Exception as e:
-                print(f"Error updating Claude config: {e}")
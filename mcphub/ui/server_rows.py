@@ -0,0 +1,99 @@
+import customtkinter as ctk
+from typing import Callable, Dict, Optional
+
+
+class ServerRow(ctk.CTkFrame):
+    """Recyclable row showing a registry server in the browse list"""
+
+    height = 110
+
+    def __init__(self, parent, on_install: Callable[[Dict], None]):
+        super().__init__(parent)
+        self.on_install = on_install
+        self.server_data = None
+        self.grid_columnconfigure(0, weight=1)
+
+        self.name_label = ctk.CTkLabel(self, text="", font=ctk.CTkFont(size=16, weight="bold"))
+        self.name_label.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="w")
+
+        self.desc_label = ctk.CTkLabel(self, text="")
+        self.desc_label.grid(row=1, column=0, padx=10, pady=(0, 5), sticky="w")
+
+        self.info_label = ctk.CTkLabel(self, text="", text_color="gray")
+        self.info_label.grid(row=2, column=0, padx=10, pady=(0, 10), sticky="w")
+
+        self.install_button = ctk.CTkButton(
+            self, text="Install", width=100,
+            command=lambda: self.on_install(self.server_data)
+        )
+        self.install_button.grid(row=0, column=1, padx=10, pady=10, sticky="e")
+
+    def update_item(self, server_data: Dict):
+        self.server_data = server_data
+        self.name_label.configure(text=server_data["name"])
+        self.desc_label.configure(text=server_data["description"])
+        self.info_label.configure(
+            text=f"Version: {server_data['version']} | Tags: {', '.join(server_data['tags'])}"
+        )
+
+
+class InstalledServerRow(ctk.CTkFrame):
+    """Recyclable row showing an installed server with its controls"""
+
+    height = 80
+
+    def __init__(self, parent, on_start: Callable[[str], None], on_stop: Callable[[str], None],
+                 on_configure: Callable, on_uninstall: Callable[[str], None],
+                 health_lookup: Optional[Callable[[str], Optional[Dict]]] = None):
+        super().__init__(parent)
+        self.server = None
+        self.health_lookup = health_lookup
+        self.grid_columnconfigure(0, weight=1)
+
+        # Server name and status
+        self.name_label = ctk.CTkLabel(self, text="", font=ctk.CTkFont(size=16, weight="bold"))
+        self.name_label.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="w")
+
+        self.status_label = ctk.CTkLabel(self, text="", text_color="gray")
+        self.status_label.grid(row=1, column=0, padx=10, pady=(0, 10), sticky="w")
+
+        # Control buttons
+        button_frame = ctk.CTkFrame(self)
+        button_frame.grid(row=0, column=1, rowspan=2, padx=10, pady=10, sticky="e")
+
+        buttons = (
+            ("Start", lambda: on_start(self.server.name)),
+            ("Stop", lambda: on_stop(self.server.name)),
+            ("Configure", lambda: on_configure(self.server)),
+            ("Uninstall", lambda: on_uninstall(self.server.name)),
+        )
+        for text, command in buttons:
+            ctk.CTkButton(button_frame, text=text, width=80, command=command).pack(side="left", padx=5)
+
+    def update_item(self, server):
+        self.server = server
+        self.name_label.configure(text=server.name)
+        self.set_health(self.health_lookup(server.name) if self.health_lookup else None)
+
+    def set_health(self, health: Optional[Dict]):
+        """Show the latest probe result next to the enabled state"""
+        text = "Enabled" if self.server.enabled else "Disabled"
+        color = "gray"
+        if self.server.enabled and health and health.get("healthy") is not None:
+            if health["healthy"] and health.get("last_latency_ms") is not None:
+                text += f" | Healthy, {health['last_latency_ms']:.1f} ms"
+                color = "green"
+            elif health["healthy"]:
+                text += " | Running"
+                if health.get("rss") is not None:
+                    text += f", {health['rss'] / (1024 * 1024):.0f} MB"
+                if health.get("cpu_percent") is not None:
+                    text += f", {health['cpu_percent']:.0f}% CPU"
+                color = "green"
+            else:
+                text += f" | Unhealthy: {health['last_error']}"
+                color = "red"
+            if health.get("p95_ms") is not None:
+                text += f" (p95 {health['p95_ms']:.1f} ms"
+                text += f", {health['error_rate']:.0%} errors)"
+        self.status_label.configure(text=text, text_color=color)
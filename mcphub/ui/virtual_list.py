@@ -0,0 +1,124 @@
+import customtkinter as ctk
+from typing import Any, Callable, List, Optional, Sequence
+
+
+class VirtualList(ctk.CTkFrame):
+    """Scrollable list that only builds widgets for visible rows and recycles them"""
+
+    def __init__(self, master, row_height: int, create_row: Callable[[Any], Any],
+                 key: Optional[Callable[[Any], Any]] = None, scroll_step: int = 40, **kwargs):
+        super().__init__(master, **kwargs)
+        self.row_height = row_height
+        self.create_row = create_row
+        self.key = key or id
+        self.scroll_step = scroll_step
+
+        self.items: Sequence = []
+        self.offset = 0
+        # Pooled row widgets; each has update_item(item) and a bound_key attribute
+        self.rows: List[Any] = []
+
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent")
+        self.viewport.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.viewport.bind("<Configure>", lambda event: self._layout())
+        # Global bindings, filtered to events over this list in _on_wheel
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.bind_all(sequence, self._on_wheel, add="+")
+
+    def set_items(self, items: Sequence, reset_scroll: bool = False):
+        """Show a new list of items, rebinding only rows whose item changed"""
+        self.items = items
+        self.offset = 0 if reset_scroll else min(self.offset, self._max_offset())
+        self._layout()
+
+    def refresh(self, keys=None):
+        """Rebind visible rows whose items changed in place, or all of them if keys is None"""
+        for row in self.rows:
+            if keys is None or row.bound_key in keys:
+                row.bound_key = None
+        self._layout()
+
+    def _viewport_height(self) -> int:
+        return max(self.viewport.winfo_height(), 1)
+
+    def _max_offset(self) -> int:
+        return max(len(self.items) * self.row_height - self._viewport_height(), 0)
+
+    def _ensure_pool(self):
+        needed = self._viewport_height() // self.row_height + 2
+        while len(self.rows) < needed:
+            row = self.create_row(self.viewport)
+            row.bound_key = None
+            self.rows.append(row)
+
+    def _layout(self):
+        self._ensure_pool()
+        first = self.offset // self.row_height
+        shift = self.offset % self.row_height
+
+        for slot, row in enumerate(self.rows):
+            index = first + slot
+            y = slot * self.row_height - shift
+            if index >= len(self.items) or y >= self._viewport_height():
+                if row.bound_key is not None or row.winfo_ismapped():
+                    row.place_forget()
+                    row.bound_key = None
+                continue
+
+            item = self.items[index]
+            item_key = self.key(item)
+            if row.bound_key != item_key:
+                row.update_item(item)
+                row.bound_key = item_key
+            row.place(x=0, y=y, relwidth=1.0, height=self.row_height)
+
+        total = len(self.items) * self.row_height
+        if total <= self._viewport_height():
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self._viewport_height()) / total)
+
+    def scroll_to(self, offset: int):
+        offset = max(0, min(int(offset), self._max_offset()))
+        if offset != self.offset:
+            self.offset = offset
+            self._layout()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(value) * len(self.items) * self.row_height)
+        elif unit == "pages":
+            self.scroll_to(self.offset + int(value) * self._viewport_height())
+        else:
+            self.scroll_to(self.offset + int(value) * self.scroll_step)
+
+    def _contains_pointer(self, event) -> bool:
+        try:
+            widget = self.winfo_containing(event.x_root, event.y_root)
+        except (KeyError, AttributeError):
+            return False
+        while widget is not None:
+            # The scrollbar handles its own wheel events through _on_scrollbar
+            if widget is self.scrollbar:
+                return False
+            if widget is self:
+                return True
+            widget = getattr(widget, "master", None)
+        return False
+
+    def _on_wheel(self, event):
+        if not self.winfo_ismapped() or not self._contains_pointer(event):
+            return
+        if getattr(event, "num", None) == 4:
+            steps = -1
+        elif getattr(event, "num", None) == 5:
+            steps = 1
+        else:
+            steps = -1 if event.delta > 0 else 1
+        self.scroll_to(self.offset + steps * self.scroll_step)
@@ -1,33 +1,83 @@
 const { spawn } = require('child_process');
+const crypto = require('crypto');
 const fs = require('fs');
+const net = require('net');
 const path = require('path');
 const os = require('os');
+const util = require('util');
+
+// Lock files older than this are left over from a crashed writer
+const STALE_LOCK_MS = 30000;
+const LOCK_TIMEOUT_MS = 10000;
+
+// Socket of the desktop agent's --daemon mode, same default as desktop-agent/src/main.py
+function getSocketPath() {
+  return process.env.MCPHUB_AGENT_SOCKET || path.join(os.homedir(), '.mcphub', 'agent.sock');
+}
+
+// Forward messages to the agent daemon when it is running, so each request is an IPC round
+// trip to a warm process. Both sides use the same length-prefixed framing, so the bytes are
+// passed through unparsed. Without a daemon, handle messages here.
+function start() {
+  const daemon = net.createConnection(getSocketPath());
+  daemon.once('connect', () => {
+    daemon.removeAllListeners('error');
+    daemon.on('error', () => process.exit(1));
+    daemon.on('close', () => process.exit(0));
+    process.stdin.pipe(daemon);
+    daemon.pipe(process.stdout);
+  });
+  daemon.once('error', () => handleLocally());
+}
+
+// Largest reply a native messaging host may send back to Chrome
+const MAX_NATIVE_REPLY = 1024 * 1024;
 
 // Buffer for reading messages
-let buffer = '';
+let buffer = Buffer.alloc(0);
+// Messages without an id are handled one at a time, for extensions that match replies by order
+let pending = Promise.resolve();
 
-// Handle incoming messages
-process.stdin.on('data', (data) => {
-  buffer += data.toString();
-
-  // Messages are preceded by their length as a 32-bit integer
-  while (buffer.length >= 4) {
-    const length = buffer.readUInt32LE(0);
-    if (buffer.length >= length + 4) {
-      const message = JSON.parse(buffer.slice(4, length + 4));
-      handleMessage(message);
-      buffer = buffer.slice(length + 4);
-    } else {
-      break;
+function handleLocally() {
+  process.stdin.on('data', (data) => {
+    buffer = Buffer.concat([buffer, data]);
+
+    // Messages are preceded by their length as a 32-bit integer
+    while (buffer.length >= 4) {
+      const length = buffer.readUInt32LE(0);
+      if (buffer.length >= length + 4) {
+        const message = JSON.parse(buffer.subarray(4, length + 4).toString('utf8'));
+        if (message && message.id !== undefined) {
+          // Replies carry the request's id, so a long install does not hold up later requests
+          handleMessage(message);
+        } else {
+          pending = pending.then(() => handleMessage(message));
+        }
+        buffer = buffer.subarray(length + 4);
+      } else {
+        break;
+      }
     }
-  }
-});
+  });
+}
 
-// Send message back to the extension
-function sendMessage(message) {
-  const json = JSON.stringify(message);
-  const buffer = Buffer.alloc(4 + json.length);
-  buffer.writeUInt32LE(json.length, 0);
+// Send message back to the extension, as the reply to request
+function sendMessage(message, request) {
+  if (request && request.id !== undefined) {
+    message.id = request.id;
+  }
+  let json = JSON.stringify(message);
+  if (Buffer.byteLength(json) > MAX_NATIVE_REPLY) {
+    // Chrome drops a host that sends more, so send an error in its place
+    json = JSON.stringify({
+      success: false,
+      error: `Reply of ${Buffer.byteLength(json)} bytes is over the 1 MB native messaging limit`,
+      id: message.id,
+    });
+  }
+  const length = Buffer.byteLength(json);
+  const buffer = Buffer.alloc(4 + length);
+  buffer.writeUInt32LE(length, 0);
   buffer.write(json, 4);
   process.stdout.write(buffer);
 }
@@ -59,49 +109,470 @@ function ensureConfigExists() {
   }
 }
 
+// Version token of the config content, same as mcphub.core.claude_config.config_version
+function configVersion(raw) {
+  return crypto.createHash('sha1').update(raw).digest('hex').slice(0, 16);
+}
+
+// Take the advisory lock shared with the Python writers by creating <config>.lock exclusively
+async function acquireLock() {
+  const lockPath = getConfigPath() + '.lock';
+  const deadline = Date.now() + LOCK_TIMEOUT_MS;
+  while (true) {
+    try {
+      fs.writeFileSync(lockPath, String(process.pid), { flag: 'wx' });
+      return () => fs.rmSync(lockPath, { force: true });
+    } catch (error) {
+      if (error.code !== 'EEXIST') {
+        throw error;
+      }
+    }
+    try {
+      if (Date.now() - fs.statSync(lockPath).mtimeMs > STALE_LOCK_MS) {
+        fs.rmSync(lockPath, { force: true });
+      }
+    } catch (error) {
+      // Lock was released between our attempts
+    }
+    if (Date.now() > deadline) {
+      throw new Error(`Timed out waiting for ${lockPath}`);
+    }
+    await new Promise((resolve) => setTimeout(resolve, 20));
+  }
+}
+
+// Run fn while holding the config lock
+async function withConfigLock(fn) {
+  const release = await acquireLock();
+  try {
+    return fn();
+  } finally {
+    release();
+  }
+}
+
+// Write the config through an fsynced temporary file so readers never see a partial file,
+// same as mcphub.core.atomic.atomic_write_bytes
+function writeConfigAtomic(content) {
+  const configPath = getConfigPath();
+  const tmpPath = `${configPath}.${process.pid}.tmp`;
+  try {
+    const fd = fs.openSync(tmpPath, 'w');
+    try {
+      fs.writeSync(fd, content);
+      fs.fsyncSync(fd);
+    } finally {
+      fs.closeSync(fd);
+    }
+    fs.renameSync(tmpPath, configPath);
+  } catch (error) {
+    fs.rmSync(tmpPath, { force: true });
+    throw error;
+  }
+  // Persist the rename itself where directories can be opened
+  if (process.platform !== 'win32') {
+    const dirFd = fs.openSync(path.dirname(configPath), 'r');
+    try {
+      fs.fsyncSync(dirFd);
+    } finally {
+      fs.closeSync(dirFd);
+    }
+  }
+  return configVersion(content);
+}
+
+// Replace the config, failing if it changed since expectedVersion
+function updateConfig(config, expectedVersion) {
+  if (expectedVersion) {
+    const current = configVersion(fs.readFileSync(getConfigPath()));
+    if (current !== expectedVersion) {
+      throw new Error(`Config changed (expected version ${expectedVersion}, found ${current})`);
+    }
+  }
+  return writeConfigAtomic(JSON.stringify(config, null, 2));
+}
+
+// The JSON scanning below mirrors mcphub.core.claude_config, so both edit the file the same way
+
+function skipWs(text, idx) {
+  while (idx < text.length && ' \t\r\n'.includes(text[idx])) {
+    idx += 1;
+  }
+  return idx;
+}
+
+// End index of the JSON string starting at text[idx]
+function scanStringEnd(text, idx) {
+  let i = idx + 1;
+  while (i < text.length && text[i] !== '"') {
+    i += text[i] === '\\' ? 2 : 1;
+  }
+  if (i >= text.length) {
+    throw new SyntaxError('Unterminated string');
+  }
+  return i + 1;
+}
+
+const LITERAL = /-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null/y;
+
+// End index of the JSON value starting at text[idx], without building it
+function scanValueEnd(text, idx) {
+  const ch = text[idx];
+  if (ch === '"') {
+    return scanStringEnd(text, idx);
+  }
+  if (ch === '{' || ch === '[') {
+    let depth = 0;
+    let i = idx;
+    while (i < text.length) {
+      const c = text[i];
+      if (c === '"') {
+        i = scanStringEnd(text, i);
+        continue;
+      }
+      if (c === '{' || c === '[') {
+        depth += 1;
+      } else if (c === '}' || c === ']') {
+        depth -= 1;
+        if (depth === 0) {
+          return i + 1;
+        }
+      }
+      i += 1;
+    }
+    throw new SyntaxError('Unterminated value');
+  }
+  LITERAL.lastIndex = idx;
+  if (!LITERAL.test(text)) {
+    throw new SyntaxError(`Unexpected ${ch} at ${idx}`);
+  }
+  return LITERAL.lastIndex;
+}
+
+// [key, keyStart, valueStart, valueEnd] of each member of the object at text[start],
+// and the index of its closing brace
+function objectMembers(text, start) {
+  if (text[start] !== '{') {
+    throw new SyntaxError('Expected a JSON object');
+  }
+  const members = [];
+  let idx = skipWs(text, start + 1);
+  if (text[idx] === '}') {
+    return [members, idx];
+  }
+  while (true) {
+    if (text[idx] !== '"') {
+      throw new SyntaxError('Expected an object key');
+    }
+    const keyStart = idx;
+    idx = scanStringEnd(text, idx);
+    const key = JSON.parse(text.slice(keyStart, idx));
+    idx = skipWs(text, idx);
+    if (text[idx] !== ':') {
+      throw new SyntaxError("Expected ':'");
+    }
+    const valueStart = skipWs(text, idx + 1);
+    const valueEnd = scanValueEnd(text, valueStart);
+    members.push([key, keyStart, valueStart, valueEnd]);
+    idx = skipWs(text, valueEnd);
+    if (text[idx] === '}') {
+      return [members, idx];
+    }
+    if (text[idx] !== ',') {
+      throw new SyntaxError("Expected ',' or '}'");
+    }
+    idx = skipWs(text, idx + 1);
+  }
+}
+
+// Indentation before pos, or null if it is not at the start of a line
+function lineIndent(text, pos) {
+  const lineStart = text.lastIndexOf('\n', pos - 1) + 1;
+  const prefix = text.slice(lineStart, pos);
+  return prefix.trim() === '' && lineStart > 0 ? prefix : null;
+}
+
+// Serialise value so it lines up under a key indented by indent
+function dumpValue(value, indent, unit) {
+  if (indent === null) {
+    return JSON.stringify(value);
+  }
+  return JSON.stringify(value, null, unit).split('\n').join('\n' + indent);
+}
+
+// Add, replace or remove one mcpServers entry, leaving the rest of text untouched
+function spliceServer(text, name, entry) {
+  const rootStart = skipWs(text, 0);
+  const [rootMembers] = objectMembers(text, rootStart);
+  const servers = rootMembers.filter((member) => member[0] === 'mcpServers');
+  if (servers.length === 0) {
+    throw new SyntaxError('No mcpServers object');
+  }
+  const [, serversKeyStart, serversStart] = servers[servers.length - 1];
+  const [members, serversEnd] = objectMembers(text, serversStart);
+
+  // Indentation unit, taken from the first top-level key
+  const firstIndent = lineIndent(text, rootMembers[0][1]);
+  const unit = firstIndent ? firstIndent.length : 2;
+
+  const i = members.map((member) => member[0]).lastIndexOf(name);
+  if (i !== -1) {
+    const [, keyStart, valueStart, valueEnd] = members[i];
+    if (entry !== null) {
+      return text.slice(0, valueStart) + dumpValue(entry, lineIndent(text, keyStart), unit) + text.slice(valueEnd);
+    }
+    if (i > 0) {
+      return text.slice(0, members[i - 1][3]) + text.slice(valueEnd);
+    }
+    if (members.length > 1) {
+      return text.slice(0, keyStart) + text.slice(members[1][1]);
+    }
+    return text.slice(0, serversStart + 1) + text.slice(serversEnd);
+  }
+
+  if (entry === null) {
+    return text;
+  }
+
+  if (members.length > 0) {
+    const [, lastKeyStart, , lastValueEnd] = members[members.length - 1];
+    const indent = lineIndent(text, lastKeyStart);
+    const member = `${JSON.stringify(name)}: ${dumpValue(entry, indent, unit)}`;
+    const separator = indent !== null ? `,\n${indent}` : ', ';
+    return text.slice(0, lastValueEnd) + separator + member + text.slice(lastValueEnd);
+  }
+
+  const outer = lineIndent(text, serversKeyStart);
+  if (outer === null) {
+    const member = `${JSON.stringify(name)}: ${dumpValue(entry, null, unit)}`;
+    return text.slice(0, serversStart + 1) + member + text.slice(serversEnd);
+  }
+  const inner = outer + ' '.repeat(unit);
+  const member = `${JSON.stringify(name)}: ${dumpValue(entry, inner, unit)}`;
+  return text.slice(0, serversStart + 1) + `\n${inner}${member}\n${outer}` + text.slice(serversEnd);
+}
+
+// Set or remove (with null) mcpServers entries, rewriting only those entries,
+// same as mcphub.core.claude_config.ClaudeConfigFile.patch_servers
+function patchServers(updates) {
+  let raw = '';
+  try {
+    raw = fs.readFileSync(getConfigPath(), 'utf8');
+  } catch (error) {
+    if (error.code !== 'ENOENT') {
+      throw error;
+    }
+  }
+  const config = raw.trim() ? JSON.parse(raw) : {};
+  if (!config.mcpServers || typeof config.mcpServers !== 'object' || Array.isArray(config.mcpServers)) {
+    config.mcpServers = {};
+    raw = '';
+  }
+
+  const expected = structuredClone(config);
+  for (const [name, entry] of Object.entries(updates)) {
+    if (entry === null || entry === undefined) {
+      delete expected.mcpServers[name];
+    } else {
+      expected.mcpServers[name] = entry;
+    }
+  }
+  if (raw && util.isDeepStrictEqual(expected, config)) {
+    return configVersion(raw);
+  }
+
+  let text = raw;
+  try {
+    for (const [name, entry] of Object.entries(updates)) {
+      text = spliceServer(text, name, entry === undefined ? null : entry);
+    }
+    if (!util.isDeepStrictEqual(JSON.parse(text), expected)) {
+      throw new SyntaxError('Spliced config does not match');
+    }
+  } catch (error) {
+    if (!(error instanceof SyntaxError || error instanceof TypeError)) {
+      throw error;
+    }
+    // Fall back to a full rewrite for documents we cannot splice
+    text = JSON.stringify(expected, null, 2);
+  }
+  return writeConfigAtomic(text);
+}
+
+// Set or remove (with null) a single mcpServers entry
+function patchServer(name, entry) {
+  return patchServers({ [name]: entry });
+}
+
+// Config key of a server, same as mcphub.core.slug.server_slug
+function serverSlug(name) {
+  return name.toLowerCase().split(' ').join('_');
+}
+
+// Config updates storing a server's entry under its slug, same as mcphub.core.slug.claude_entry_updates.
+// Earlier releases keyed entries by display name, so such an entry is removed rather than launched twice
+function claudeEntryUpdates(name, entry) {
+  const key = serverSlug(name);
+  const updates = { [key]: entry };
+  if (name !== key) {
+    updates[name] = null;
+  }
+  return updates;
+}
+
+// The mcpServers entry of an installed server, same as the desktop agent's server_entry
+function serverEntry(server) {
+  const defaults = server.default_config || {};
+  return {
+    command: server.install_command,
+    args: server.command_args,
+    env: defaults.env || {},
+    port: defaults.port || 8000,
+    auth_token: defaults.auth_token || '',
+  };
+}
+
+// Apply install, uninstall and patch operations in order with a single config write,
+// like the desktop agent's /batch endpoint
+async function runBatch(operations) {
+  const results = operations.map((op) => ({
+    op: op.op, name: op.server ? op.server.name : op.name, status: 'ok',
+  }));
+  const installs = await Promise.all(operations.map((op) => (
+    op.op === 'install' && op.server
+      ? installServer(op.server).then(() => null, (error) => error.message)
+      : null
+  )));
+
+  await withConfigLock(() => {
+    const config = JSON.parse(fs.readFileSync(getConfigPath(), 'utf8'));
+    // Later operations see the effect of earlier ones, e.g. an uninstall after an install
+    const servers = { ...(config.mcpServers || {}) };
+    const updates = {};
+    operations.forEach((op, index) => {
+      const result = results[index];
+      let key;
+      let opUpdates;
+      if (op.op === 'install' && op.server) {
+        if (installs[index] !== null) {
+          Object.assign(result, { status: 'error', error: installs[index] });
+          return;
+        }
+        key = serverSlug(op.server.name);
+        // Also drops an entry an earlier release keyed by display name
+        opUpdates = claudeEntryUpdates(op.server.name, serverEntry(op.server));
+      } else if (op.op === 'uninstall' && op.name) {
+        key = op.name in servers ? op.name : serverSlug(op.name);
+        if (!(key in servers)) {
+          Object.assign(result, { status: 'not_found', error: 'Server not found' });
+          return;
+        }
+        opUpdates = { [key]: null };
+      } else if (op.op === 'patch' && op.name) {
+        key = op.name;
+        opUpdates = { [key]: op.entry === undefined ? null : op.entry };
+      } else {
+        Object.assign(result, { status: 'error', error: `Invalid operation ${op.op}` });
+        return;
+      }
+      result.key = key;
+      for (const [name, entry] of Object.entries(opUpdates)) {
+        updates[name] = entry;
+        if (entry === null) {
+          delete servers[name];
+        } else {
+          servers[name] = entry;
+        }
+      }
+    });
+
+    if (Object.keys(updates).length > 0) {
+      const version = patchServers(updates);
+      results.filter((result) => result.status === 'ok').forEach((result) => { result.version = version; });
+    }
+  });
+  return results;
+}
+
 // Handle incoming messages
 async function handleMessage(message) {
+  const reply = (response) => sendMessage(response, message);
   try {
     switch (message.type) {
-      case 'GET_CONFIG':
+      case 'GET_CONFIG': {
         ensureConfigExists();
-        const config = JSON.parse(fs.readFileSync(getConfigPath(), 'utf8'));
-        sendMessage({ success: true, data: config });
+        const raw = fs.readFileSync(getConfigPath());
+        reply({ success: true, data: JSON.parse(raw.toString('utf8')), version: configVersion(raw) });
         break;
+      }
 
-      case 'UPDATE_CONFIG':
+      case 'UPDATE_CONFIG': {
         ensureConfigExists();
-        fs.writeFileSync(getConfigPath(), JSON.stringify(message.config, null, 2));
-        sendMessage({ success: true });
+        const version = await withConfigLock(() => updateConfig(message.config, message.version));
+        reply({ success: true, version });
         break;
+      }
+
+      case 'PATCH_SERVER': {
+        ensureConfigExists();
+        const version = await withConfigLock(() => patchServer(message.serverName, message.entry));
+        reply({ success: true, version });
+        break;
+      }
 
-      case 'INSTALL_SERVER':
+      case 'BATCH': {
+        ensureConfigExists();
+        const results = await runBatch(message.operations || []);
+        reply({ success: results.every((result) => result.status === 'ok'), results });
+        break;
+      }
+
+      case 'INSTALL_SERVER': {
+        ensureConfigExists();
         await installServer(message.server);
-        sendMessage({ success: true });
+        const version = await withConfigLock(
+          () => patchServers(claudeEntryUpdates(message.server.name, serverEntry(message.server)))
+        );
+        reply({ success: true, version });
         break;
+      }
 
-      case 'UNINSTALL_SERVER':
-        await uninstallServer(message.serverName);
-        sendMessage({ success: true });
+      case 'UNINSTALL_SERVER': {
+        ensureConfigExists();
+        const version = await uninstallServer(message.serverName);
+        reply({ success: true, version });
         break;
+      }
 
       default:
-        sendMessage({ success: false, error: 'Unknown message type' });
+        reply({ success: false, error: 'Unknown message type' });
     }
   } catch (error) {
-    sendMessage({ success: false, error: error.message });
+    reply({ success: false, error: error.message });
   }
 }
 
+// Package manager command that installs a server, same as the desktop agent's run_package_steps
+function installCommand(server) {
+  const installArgs = server.install_args || [];
+  if (server.runtime === 'node') {
+    if (installArgs.length > 0) {
+      return { command: server.install_command, args: installArgs };
+    }
+    return { command: 'npm', args: ['install', '-g', server.repository] };
+  }
+  if (installArgs.length > 0) {
+    return { command: 'pip', args: ['install', ...installArgs] };
+  }
+  return { command: 'pip', args: ['install', '-e', '.'], cwd: server.repository };
+}
+
 // Install server using npm or pip
 async function installServer(server) {
   return new Promise((resolve, reject) => {
-    const command = server.runtime === 'node' ? 'npm' : 'pip';
-    const args = server.runtime === 'node' 
-      ? ['install', '-g', server.repository]
-      : ['install', server.repository];
+    const { command, args, cwd } = installCommand(server);
 
-    const process = spawn(command, args);
+    const process = spawn(command, args, { cwd });
 
     process.on('close', (code) => {
       if (code === 0) {
@@ -117,32 +588,50 @@ async function installServer(server) {
   });
 }
 
-// Uninstall server using npm or pip
+// Command that removes a server's package, same as the desktop agent's uninstall_command.
+// Only global npm packages can be told from the entry; other servers just lose their entry.
+function uninstallCommand(entry) {
+  const packages = (entry.args || []).filter((arg) => !arg.startsWith('-'));
+  if (['npm', 'npx', 'node'].includes(entry.command) && packages.length > 0) {
+    return { command: 'npm', args: ['uninstall', '-g', packages[0]] };
+  }
+  return null;
+}
+
+// Remove a server's package and its config entry, returning the new config version
 async function uninstallServer(serverName) {
-  // Read config to determine runtime
   const config = JSON.parse(fs.readFileSync(getConfigPath(), 'utf8'));
-  const serverConfig = config.mcpServers[serverName];
-
-  if (!serverConfig) {
+  const servers = config.mcpServers || {};
+  // Accept the config key itself or the registry name it was installed under
+  const key = serverName in servers ? serverName : serverSlug(serverName);
+  if (!(key in servers)) {
     throw new Error('Server not found in config');
   }
 
-  return new Promise((resolve, reject) => {
-    const command = serverConfig.command === 'node' ? 'npm' : 'pip';
-    const args = ['uninstall', '-g', serverName];
+  const uninstall = uninstallCommand(servers[key]);
+  if (uninstall) {
+    await new Promise((resolve, reject) => {
+      const process = spawn(uninstall.command, uninstall.args);
 
-    const process = spawn(command, args);
+      process.on('close', (code) => {
+        if (code === 0) {
+          resolve();
+        } else {
+          reject(new Error(`Uninstallation failed with code ${code}`));
+        }
+      });
 
-    process.on('close', (code) => {
-      if (code === 0) {
-        resolve();
-      } else {
-        reject(new Error(`Uninstallation failed with code ${code}`));
-      }
+      process.on('error', (error) => {
+        reject(error);
+      });
     });
+  }
+  // The entry stays if the package could not be removed, so the uninstall can be retried
+  return withConfigLock(() => patchServer(key, null));
+}
 
-    process.on('error', (error) => {
-      reject(error);
-    });
-  });
+if (require.main === module) {
+  start();
 }
+
+module.exports = { patchServers, spliceServer };
@@ -31,6 +31,7 @@ setup(
     entry_points={
         "console_scripts": [
             "mcphub=mcphub.app:main",
+            "mcphub-cli=mcphub.cli:main",
         ],
     },
 )
\ No newline at end of file
@@ -0,0 +1,66 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+
+def run_git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd, check=True, capture_output=True, text=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """A local repository with a v1.0.0 tag and one newer commit on main, as a file:// URL"""
+    repo = tmp_path / "upstream"
+    repo.mkdir()
+    run_git(repo, "init", "-q", "-b", "main")
+    (repo / "server.py").write_text("VERSION = '1.0.0'\n")
+    run_git(repo, "add", ".")
+    run_git(repo, "commit", "-q", "-m", "1.0.0")
+    run_git(repo, "tag", "v1.0.0")
+    (repo / "server.py").write_text("VERSION = 'dev'\n")
+    run_git(repo, "commit", "-q", "-am", "dev")
+    return repo
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """A ServerManager whose ~/.mcphub and Claude config live under tmp_path"""
+    from mcphub.core.server_manager import ServerManager
+
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    manager = ServerManager()
+    yield manager
+    manager.flush_config()
+
+
+@pytest.fixture
+def http_dir(tmp_path):
+    """Serve a directory over HTTP on localhost; yields (directory, base URL, request log)"""
+    import functools
+    import threading
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    root = tmp_path / "www"
+    root.mkdir()
+    requests = []
+
+    class Handler(SimpleHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            super().do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=str(root)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield root, f"http://127.0.0.1:{server.server_address[1]}/", requests
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,26 @@
+"""A minimal stdio MCP server for tests
+
+Writes its pid to the file named by FAKE_MCP_PID_FILE and answers initialize
+and ping, unless FAKE_MCP_SILENT is set, in which case it never answers.
+"""
+import json
+import os
+import sys
+import time
+
+if os.environ.get("FAKE_MCP_PID_FILE"):
+    with open(os.environ["FAKE_MCP_PID_FILE"], "a") as f:
+        f.write(f"{os.getpid()}\n")
+
+if os.environ.get("FAKE_MCP_SILENT"):
+    # Ignores EOF too, so only a kill stops it
+    while True:
+        time.sleep(1)
+
+for line in sys.stdin:
+    message = json.loads(line)
+    if "id" not in message:
+        continue
+    result = {"protocolVersion": "2024-11-05", "capabilities": {}} if message["method"] == "initialize" else {}
+    sys.stdout.write(json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": result}) + "\n")
+    sys.stdout.flush()
@@ -0,0 +1,66 @@
+import os
+import subprocess
+
+import pytest
+
+from mcphub.core import artifact_cache
+from mcphub.core.artifact_cache import ArtifactCache
+
+
+@pytest.fixture
+def commands(monkeypatch):
+    """Record pip commands; installs fail until the wheelhouse has the example wheel"""
+    ran = []
+
+    def fake_run(command, **kwargs):
+        ran.append(command[3])
+        wheelhouse = command[command.index("--find-links") + 1]
+        if command[3] == "install" and not os.path.exists(f"{wheelhouse}/example-1.0-py3-none-any.whl"):
+            raise subprocess.CalledProcessError(1, command)
+        if command[3] == "wheel":
+            staging = command[command.index("-w") + 1]
+            with open(f"{staging}/example-1.0-py3-none-any.whl", "wb") as f:
+                f.write(b"wheel")
+
+    monkeypatch.setattr(artifact_cache, "run_command", fake_run)
+    return ran
+
+
+def test_store_is_content_addressed(tmp_path):
+    cache = ArtifactCache(tmp_path / "cache")
+    first = tmp_path / "pkg-1.0-py3-none-any.whl"
+    first.write_bytes(b"same")
+    digest = cache.store(first)
+    assert cache.blob_path(digest).read_bytes() == b"same"
+    assert (cache.wheelhouse / first.name).read_bytes() == b"same"
+    assert not first.exists()
+
+
+def test_install_commands_never_ask_the_index_when_cacheable(tmp_path):
+    cache = ArtifactCache(tmp_path / "cache")
+    assert "--no-index" in cache.pip_install_command(["requests"])
+    assert "--no-index" not in cache.pip_install_command(["-e", "."])
+    wheel = cache.pip_wheel_command(["requests"], tmp_path / "staging")
+    assert wheel[3] == "wheel" and "--find-links" in wheel
+
+
+def test_missing_wheels_are_built_then_installed_from_the_wheelhouse(tmp_path, commands):
+    cache = ArtifactCache(tmp_path / "cache")
+    cache.pip_install(["example"])
+    assert commands == ["install", "wheel", "install"]
+    assert (cache.wheelhouse / "example-1.0-py3-none-any.whl").exists()
+
+
+def test_complete_cache_installs_without_building(tmp_path, commands):
+    cache = ArtifactCache(tmp_path / "cache")
+    cache.pip_install(["example"])
+    commands.clear()
+    cache.pip_install(["example"])
+    assert commands == ["install"]
+
+
+def test_offline_install_does_not_build(tmp_path, commands):
+    cache = ArtifactCache(tmp_path / "cache")
+    with pytest.raises(subprocess.CalledProcessError):
+        cache.pip_install(["example"], offline=True)
+    assert commands == ["install"]
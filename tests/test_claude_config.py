@@ -0,0 +1,125 @@
+import json
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from mcphub.core.claude_config import ClaudeConfigFile, ConfigConflictError, FileLock, config_version
+
+ORIGINAL = """{
+    "theme": "dark",
+    "mcpServers": {
+        "keep": {"command": "uvx",   "args": ["keep"]},
+        "edit": {
+            "command": "node",
+            "args": []
+        }
+    },
+    "trailing": [1,  2]
+}
+"""
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "Claude" / "claude_desktop_config.json"
+    path.parent.mkdir()
+    path.write_text(ORIGINAL)
+    return ClaudeConfigFile(path)
+
+
+def test_replacing_an_entry_leaves_the_rest_byte_for_byte(config_file):
+    config_file.patch_server("edit", {"command": "python", "args": ["-m", "edit"]})
+    text = config_file.path.read_text()
+    assert text.startswith('{\n    "theme": "dark",\n    "mcpServers": {\n'
+                           '        "keep": {"command": "uvx",   "args": ["keep"]},\n')
+    assert text.endswith('    "trailing": [1,  2]\n}\n')
+    assert json.loads(text)["mcpServers"]["edit"] == {"command": "python", "args": ["-m", "edit"]}
+
+
+def test_adding_an_entry_uses_the_file_indentation(config_file):
+    config_file.patch_server("new", {"command": "node"})
+    text = config_file.path.read_text()
+    assert '},\n        "new": {\n            "command": "node"\n        }\n    },' in text
+    assert json.loads(text)["mcpServers"]["keep"] == {"command": "uvx", "args": ["keep"]}
+
+
+@pytest.mark.parametrize("name", ["keep", "edit"])
+def test_removing_an_entry(config_file, name):
+    config_file.patch_server(name, None)
+    servers = json.loads(config_file.path.read_text())["mcpServers"]
+    assert name not in servers and len(servers) == 1
+
+
+def test_removing_the_last_entry(tmp_path):
+    config_file = ClaudeConfigFile(tmp_path / "config.json")
+    config_file.path.write_text('{"mcpServers": {"only": {}}, "other": 1}')
+    config_file.patch_server("only", None)
+    assert config_file.path.read_text() == '{"mcpServers": {}, "other": 1}'
+
+
+def test_unchanged_patch_does_not_write(config_file):
+    before = config_file.path.stat()
+    version = config_file.patch_server("keep", {"command": "uvx", "args": ["keep"]})
+    assert config_file.path.stat().st_ino == before.st_ino
+    assert version == config_version(ORIGINAL.encode())
+
+
+def test_missing_file_is_created(tmp_path):
+    config_file = ClaudeConfigFile(tmp_path / "new" / "config.json")
+    config_file.patch_server("a", {"command": "node"})
+    assert json.loads(config_file.path.read_text()) == {"mcpServers": {"a": {"command": "node"}}}
+
+
+def test_batch_patch_is_one_write(config_file):
+    config_file.patch_servers({"keep": None, "edit": None, "x": {"command": "x"}})
+    assert json.loads(config_file.path.read_text())["mcpServers"] == {"x": {"command": "x"}}
+
+
+def test_write_detects_conflicts(config_file):
+    _, version = config_file.read()
+    config_file.patch_server("new", {"command": "node"})
+    with pytest.raises(ConfigConflictError):
+        config_file.write({"mcpServers": {}}, version)
+
+
+def test_lock_times_out_while_held(tmp_path):
+    path = tmp_path / "config.json"
+    with FileLock(path):
+        with pytest.raises(TimeoutError):
+            FileLock(path, timeout=0.05).acquire()
+    assert not (tmp_path / "config.json.lock").exists()
+
+
+HOST_JS = Path(__file__).parent.parent / "native-host" / "host.js"
+PATCH_WITH_HOST_JS = """
+const { patchServers } = require(process.argv[1]);
+process.stdout.write(patchServers(JSON.parse(require('fs').readFileSync(0, 'utf8'))));
+"""
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs Node.js")
+@pytest.mark.parametrize("original, updates", [
+    (ORIGINAL, {"edit": {"command": "python", "args": ["-m", "edit"]}}),
+    (ORIGINAL, {"new": {"command": "node", "env": {"A": "1"}}, "keep": None}),
+    (ORIGINAL, {"keep": None, "edit": None}),
+    ('{"mcpServers": {"only": {}}, "other": 1}', {"only": None}),
+    ('{\n  "mcpServers": {}\n}\n', {"a": {"command": "node", "args": []}}),
+    ('{"mcpServers": null, "x": 1}', {"a": {"command": "node"}}),
+])
+def test_host_js_patches_like_python(tmp_path, original, updates):
+    python_file = ClaudeConfigFile(tmp_path / "python.json")
+    python_file.path.write_text(original)
+    python_version = python_file.patch_servers(updates)
+
+    home = tmp_path / "home"
+    js_path = home / ".config" / "Claude" / "claude_desktop_config.json"
+    js_path.parent.mkdir(parents=True)
+    js_path.write_text(original)
+    result = subprocess.run(["node", "-e", PATCH_WITH_HOST_JS, str(HOST_JS)], input=json.dumps(updates),
+                            capture_output=True, text=True, env=dict(os.environ, HOME=str(home)), check=True)
+    assert js_path.read_text() == python_file.path.read_text()
+    assert result.stdout == python_version
+    assert not list(js_path.parent.glob("*.tmp"))
@@ -0,0 +1,73 @@
+import pytest
+import yaml
+
+from mcphub.core.config_store import ConfigStore, merge_changes
+
+
+def make_store(tmp_path):
+    # A long delay, so only explicit flushes write
+    return ConfigStore(tmp_path / "config.yaml", lambda: {"installed_servers": {}}, flush_delay=60)
+
+
+def read(path):
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def test_defaults_when_missing(tmp_path):
+    assert make_store(tmp_path).get() == {"installed_servers": {}}
+
+
+def test_transaction_flushes(tmp_path):
+    store = make_store(tmp_path)
+    with store.transaction() as config:
+        config["installed_servers"]["a"] = {"version": "1"}
+    store.flush()
+    assert read(store.path) == {"installed_servers": {"a": {"version": "1"}}}
+
+
+def test_failed_transaction_is_rolled_back(tmp_path):
+    store = make_store(tmp_path)
+    with pytest.raises(RuntimeError):
+        with store.transaction() as config:
+            config["installed_servers"]["a"] = {"version": "1"}
+            raise RuntimeError("boom")
+    assert store.get() == {"installed_servers": {}}
+    store.flush()
+    assert not store.path.exists()
+
+
+def test_reloads_external_changes(tmp_path):
+    store = make_store(tmp_path)
+    store.get()
+    store.path.write_text(yaml.safe_dump({"installed_servers": {"b": {"version": "2"}}}))
+    assert store.get() == {"installed_servers": {"b": {"version": "2"}}}
+
+
+def test_pending_changes_merge_with_external_writes(tmp_path):
+    store = make_store(tmp_path)
+    store.path.write_text(yaml.safe_dump({"installed_servers": {"a": {"version": "1"}}}))
+    with store.transaction() as config:
+        config["installed_servers"]["a"]["version"] = "1.1"
+        config.setdefault("settings", {})["auto_update"] = False
+
+    # Another process adds a server before our debounced flush
+    other = make_store(tmp_path)
+    with other.transaction() as config:
+        config["installed_servers"]["b"] = {"version": "2"}
+    other.flush()
+
+    assert set(store.get()["installed_servers"]) == {"a", "b"}
+    store.flush()
+    assert read(store.path) == {
+        "installed_servers": {"a": {"version": "1.1"}, "b": {"version": "2"}},
+        "settings": {"auto_update": False},
+    }
+
+
+def test_merge_changes():
+    base = {"servers": {"a": 1, "b": 2}, "x": 1}
+    ours = {"servers": {"a": 10, "b": 2}}
+    theirs = {"servers": {"a": 1, "b": 20, "c": 3}, "x": 1, "y": 5}
+    assert merge_changes(base, ours, theirs) == {"servers": {"a": 10, "b": 20, "c": 3}, "y": 5}
+    assert merge_changes(base, base, theirs) is theirs
@@ -0,0 +1,65 @@
+import json
+import os
+import queue
+
+import pytest
+
+from mcphub.core import config_watcher
+from mcphub.core.config_watcher import ConfigWatcher, config_files
+
+
+@pytest.fixture
+def paths(tmp_path):
+    claude = tmp_path / "Claude" / "claude_desktop_config.json"
+    claude.parent.mkdir()
+    claude.write_text(json.dumps({"mcpServers": {}}))
+    return claude, tmp_path / ".mcphub" / "config.yaml"
+
+
+def open_fds():
+    return len(os.listdir("/proc/self/fd"))
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_changes_are_pushed_to_subscribers(paths, use_inotify):
+    claude, mcphub = paths
+    watcher = ConfigWatcher(config_files(claude, mcphub), debounce=0.05, poll_interval=0.05,
+                            use_inotify=use_inotify)
+    changes = queue.Queue()
+    watcher.subscribe(changes.put)
+    watcher.start()
+    try:
+        claude.write_text(json.dumps({"mcpServers": {"a": {"command": "node"}}}))
+        change = changes.get(timeout=5)
+        assert change.source == "claude" and change.added == {"a": {"command": "node"}}
+    finally:
+        watcher.stop()
+
+
+def test_polling_never_selects(paths, monkeypatch):
+    # Windows' select() only accepts sockets
+    def no_select(*args):
+        raise OSError("select() is not available for pipes")
+    monkeypatch.setattr(config_watcher.select, "select", no_select)
+    claude, mcphub = paths
+    watcher = ConfigWatcher(config_files(claude, mcphub), debounce=0.05, poll_interval=0.05,
+                            use_inotify=False)
+    changes = queue.Queue()
+    watcher.subscribe(changes.put)
+    watcher.start()
+    try:
+        claude.write_text(json.dumps({"mcpServers": {"b": {}}}))
+        assert changes.get(timeout=5).added == {"b": {}}
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_start_stop_releases_file_descriptors(paths, use_inotify):
+    watcher = ConfigWatcher(config_files(*paths), use_inotify=use_inotify)
+    before = open_fds()
+    for _ in range(5):
+        watcher.start()
+        watcher.stop()
+    assert open_fds() == before
+    assert watcher._wake_read is None and watcher._wake_write is None
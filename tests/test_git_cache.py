@@ -0,0 +1,53 @@
+import pytest
+
+from conftest import run_git
+from mcphub.core.git_cache import GitCache, VersionNotFoundError
+
+
+def test_mirror_path_is_stable_and_distinct(tmp_path):
+    cache = GitCache(tmp_path / "cache")
+    a = cache.mirror_path("https://github.com/example/server.git")
+    assert a == cache.mirror_path("https://github.com/example/server.git")
+    assert a.name.startswith("server-") and a.name.endswith(".git")
+    assert a != cache.mirror_path("https://github.com/other/server.git")
+
+
+def test_checkout_pins_the_version_tag(tmp_path, upstream):
+    cache = GitCache(tmp_path / "cache")
+    target = tmp_path / "servers" / "example"
+    cache.checkout(upstream.as_uri(), target, "1.0.0")
+    assert (target / "server.py").read_text() == "VERSION = '1.0.0'\n"
+    assert cache.head_commit(target) == run_git(upstream, "rev-parse", "v1.0.0")
+    # Objects come from the shared mirror
+    assert (target / ".git" / "objects" / "info" / "alternates").exists()
+
+
+def test_existing_checkout_is_updated_in_place(tmp_path, upstream):
+    cache = GitCache(tmp_path / "cache")
+    target = tmp_path / "servers" / "example"
+    cache.checkout(upstream.as_uri(), target, "1.0.0")
+    (upstream / "server.py").write_text("VERSION = '1.1.0'\n")
+    run_git(upstream, "commit", "-q", "-am", "1.1.0")
+    run_git(upstream, "tag", "1.1.0")
+
+    cache.checkout(upstream.as_uri(), target, "1.1.0")
+    assert (target / "server.py").read_text() == "VERSION = '1.1.0'\n"
+    assert cache.head_commit(target) == run_git(upstream, "rev-parse", "1.1.0")
+
+
+def test_unknown_version_falls_back_to_default_branch(tmp_path, upstream, capsys):
+    cache = GitCache(tmp_path / "cache")
+    target = tmp_path / "servers" / "example"
+    cache.checkout(upstream.as_uri(), target, "9.9.9")
+    assert "version 9.9.9 not found" in capsys.readouterr().out
+    assert cache.head_commit(target) == run_git(upstream, "rev-parse", "main")
+
+
+def test_unknown_version_raises_when_strict(tmp_path, upstream):
+    cache = GitCache(tmp_path / "cache")
+    with pytest.raises(VersionNotFoundError):
+        cache.checkout(upstream.as_uri(), tmp_path / "servers" / "example", "9.9.9", strict=True)
+
+
+def test_head_commit_of_a_plain_directory(tmp_path):
+    assert GitCache(tmp_path / "cache").head_commit(tmp_path) is None
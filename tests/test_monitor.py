@@ -0,0 +1,105 @@
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+from mcphub.core.monitor import HealthMonitor, probe_target, targets_from_claude_config, targets_from_installed
+from mcphub.core.supervisor import ProcessSpec, ProcessSupervisor
+
+FAKE_SERVER = str(Path(__file__).parent / "fake_mcp_server.py")
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def probe_once(tmp_path, **env):
+    pid_file = tmp_path / "pids"
+    target = probe_target("fake", [sys.executable, FAKE_SERVER], dict(env, FAKE_MCP_PID_FILE=str(pid_file)),
+                          mode="stdio")
+    monitor = HealthMonitor(lambda: [target], timeout=1.0)
+    asyncio.run(monitor.probe_all())
+    pids = [int(line) for line in pid_file.read_text().split()]
+    return monitor.status()["fake"], pids
+
+
+def test_probe_does_not_leave_a_server_running(tmp_path):
+    status, pids = probe_once(tmp_path)
+    assert status["healthy"] is True
+    assert status["last_latency_ms"] is not None
+    assert len(pids) == 1
+    assert not pid_alive(pids[0])
+
+
+def test_unresponsive_server_is_killed(tmp_path):
+    status, pids = probe_once(tmp_path, FAKE_MCP_SILENT="1")
+    assert status["healthy"] is False
+    assert "No response" in status["last_error"]
+    # The server ignores EOF, so only the kill after the timeout stops it
+    deadline = time.time() + 5
+    while pid_alive(pids[0]) and time.time() < deadline:
+        time.sleep(0.05)
+    assert not pid_alive(pids[0])
+
+
+def test_each_round_starts_a_fresh_instance(tmp_path):
+    pid_file = tmp_path / "pids"
+    target = probe_target("fake", [sys.executable, FAKE_SERVER], {"FAKE_MCP_PID_FILE": str(pid_file)},
+                          mode="stdio")
+    monitor = HealthMonitor(lambda: [target], timeout=1.0)
+
+    async def two_rounds():
+        await monitor.probe_all()
+        await monitor.probe_all()
+
+    asyncio.run(two_rounds())
+    pids = [int(line) for line in pid_file.read_text().split()]
+    assert len(pids) == 2
+    assert not any(pid_alive(pid) for pid in pids)
+    assert monitor.status()["fake"]["samples"] == 2
+
+
+def test_supervised_servers_are_not_started_again(tmp_path):
+    pid_file = tmp_path / "pids"
+    supervisor = ProcessSupervisor(tmp_path / "logs")
+    supervisor.start(ProcessSpec("fake", [sys.executable, FAKE_SERVER], {"FAKE_MCP_PID_FILE": str(pid_file)}))
+    try:
+        targets = [probe_target("fake", [sys.executable, FAKE_SERVER]), probe_target("stopped", ["false"])]
+        monitor = HealthMonitor(lambda: targets, process_status=lambda name: supervisor.status(name).get(name))
+        asyncio.run(monitor.probe_all())
+        status = monitor.status()
+        deadline = time.time() + 5
+        while not pid_file.exists() and time.time() < deadline:
+            time.sleep(0.05)
+        assert [int(line) for line in pid_file.read_text().split()] == [status["fake"]["pid"]]
+        assert status["fake"]["healthy"] is True and status["fake"]["mode"] == "process"
+        # Not run by mcphub, so its health is unknown rather than bad
+        assert status["stopped"]["healthy"] is None
+    finally:
+        supervisor.stop_all()
+
+
+def test_installed_servers_default_to_the_supervisor(manager):
+    with manager.config_store.transaction() as config:
+        config["installed_servers"]["a"] = {"runtime": "node", "command_args": ["a.js"], "port": 8000}
+        config["installed_servers"]["b"] = {"runtime": "node", "command_args": ["b.js"], "probe": "stdio"}
+        config["installed_servers"]["c"] = {"runtime": "node", "enabled": False}
+    modes = {target.name: target.mode for target in targets_from_installed(manager)}
+    assert modes == {"a": "process", "b": "stdio"}
+
+
+def test_claude_config_targets_skip_entries_mcphub_does_not_own():
+    config = {"mcpServers": {
+        "owned": {"command": "node", "args": ["a.js"]},
+        "by_hand": {"command": "uvx", "args": ["something"]},
+        "remote": {"command": "uvx", "probe": "tcp", "port": 9000},
+    }}
+    targets = {target.name: target for target in targets_from_claude_config(config, owned=["owned"])}
+    assert set(targets) == {"owned", "remote"}
+    assert targets["owned"].mode == "process"
+    assert targets["remote"].mode == "tcp" and targets["remote"].port == 9000
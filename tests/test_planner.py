@@ -0,0 +1,99 @@
+import time
+from pathlib import Path
+
+from mcphub.core.planner import InstallPlan, InstallPlanner, PlanStep
+
+
+class FakeManager:
+    offline = False
+
+    def __init__(self, servers_dir: Path):
+        self.servers_dir = servers_dir
+        self.recorded = {}
+
+    def build_server_config(self, server_data, server_dir, python_path):
+        return {"name": server_data["name"], "path": str(server_dir)}
+
+    def record_installs(self, installed):
+        self.recorded.update(installed)
+
+
+def make_plan(*servers):
+    plan = InstallPlan()
+    for name in servers:
+        plan.servers[name] = {"name": name}
+    return plan
+
+
+def test_duplicate_steps_are_merged():
+    plan = make_plan("a", "b")
+    calls = []
+    for name in ("a", "b"):
+        plan.add(PlanStep("npm:shared", "npm", "npm install shared", lambda: calls.append(1), 1.0), name)
+    assert len(plan.steps) == 1
+    assert plan.steps["npm:shared"].servers == ["a", "b"]
+
+
+def test_levels_follow_dependencies():
+    plan = make_plan("a")
+    plan.add(PlanStep("mirror", "mirror_clone", "clone", lambda: None, 8.0), "a")
+    plan.add(PlanStep("checkout", "checkout", "check out", lambda: None, 1.0, ["mirror"]), "a")
+    plan.add(PlanStep("npm", "npm", "npm", lambda: None, 12.0), "a")
+    levels = [[step.key for step in level] for level in plan.levels()]
+    assert levels == [["mirror", "npm"], ["checkout"]]
+    assert plan.critical_path() == 12.0
+    assert plan.total_cost() == 21.0
+
+
+def test_shared_step_runs_once(tmp_path):
+    plan = make_plan("a", "b")
+    calls = []
+    for name in ("a", "b"):
+        plan.add(PlanStep("npm:shared", "npm", "npm install shared", lambda: calls.append(1), 1.0), name)
+    manager = FakeManager(tmp_path)
+    results = InstallPlanner(manager).execute(plan)
+    assert calls == [1]
+    assert [result.success for result in results] == [True, True]
+    assert set(manager.recorded) == {"a", "b"}
+
+
+def test_failed_step_reports_failure(tmp_path):
+    def fail():
+        # Slow enough that the main thread is still waiting when the step finishes
+        time.sleep(0.3)
+        raise RuntimeError("npm exited with 1")
+
+    plan = make_plan("ok", "broken")
+    plan.add(PlanStep("mkdir:ok", "mkdir", "create ok", lambda: None, 0.0), "ok")
+    plan.add(PlanStep("npm:broken", "npm", "npm install broken", fail, 1.0), "broken")
+    events = []
+    manager = FakeManager(tmp_path)
+    results = {result.name: result for result in InstallPlanner(manager).execute(
+        plan, progress=lambda name, status, elapsed: events.append((name, status))
+    )}
+
+    assert ("broken", "failed") in events
+    assert ("broken", "done") not in events
+    assert ("ok", "done") in events
+    assert not results["broken"].success
+    assert "npm exited with 1" in results["broken"].error
+    assert results["ok"].success
+    assert set(manager.recorded) == {"ok"}
+
+
+def test_dependents_of_failed_step_are_skipped(tmp_path):
+    ran = []
+
+    def fail():
+        raise RuntimeError("clone failed")
+
+    plan = make_plan("a")
+    plan.add(PlanStep("mirror", "mirror_clone", "clone", fail, 8.0), "a")
+    plan.add(PlanStep("checkout", "checkout", "check out", lambda: ran.append(1), 1.0, ["mirror"]), "a")
+    events = []
+    results = InstallPlanner(FakeManager(tmp_path)).execute(
+        plan, progress=lambda name, status, elapsed: events.append((name, status))
+    )
+    assert ran == []
+    assert events == [("a", "started"), ("a", "failed")]
+    assert not results[0].success
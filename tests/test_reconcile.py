@@ -0,0 +1,84 @@
+import json
+
+from mcphub.core.reconcile import OWNED_KEY
+
+
+def installed_server(name):
+    return {"version": "1.0.0", "install_path": f"/srv/{name}", "enabled": True, "runtime": "node",
+            "port": 8000, "auth_token": "", "command_args": [f"{name}.js"], "env": {}}
+
+
+def write_claude(manager, servers):
+    manager.claude_config_file.parent.mkdir(parents=True, exist_ok=True)
+    manager.claude_config_file.write_text(json.dumps({"mcpServers": servers}, indent=2))
+
+
+def claude_servers(manager):
+    return json.loads(manager.claude_config_file.read_text())["mcpServers"]
+
+
+def install(manager, *names):
+    with manager.config_store.transaction() as config:
+        for name in names:
+            config["installed_servers"][name] = installed_server(name)
+
+
+def test_sync_adds_missing_entries_and_leaves_others_alone(manager):
+    write_claude(manager, {"by_hand": {"command": "uvx"}})
+    install(manager, "a", "b")
+    plan = manager.sync_claude_config()
+    assert plan.added == ["a", "b"]
+    assert plan.unmanaged == ["by_hand"]
+    assert claude_servers(manager)["a"] == {"command": "node", "args": ["a.js"], "env": {}}
+    assert claude_servers(manager)["by_hand"] == {"command": "uvx"}
+    assert manager.config_store.get()[OWNED_KEY] == ["a", "b"]
+
+
+def test_check_reports_drift_without_writing(manager):
+    write_claude(manager, {})
+    install(manager, "a")
+    plan = manager.sync_claude_config(check=True)
+    assert plan and plan.added == ["a"]
+    assert claude_servers(manager) == {}
+
+
+def test_sync_in_line_does_not_write(manager):
+    install(manager, "a")
+    manager.sync_claude_config()
+    before = manager.claude_config_file.stat()
+    plan = manager.sync_claude_config()
+    assert not plan
+    assert manager.claude_config_file.stat().st_ino == before.st_ino
+
+
+def test_changed_entries_are_rewritten(manager):
+    install(manager, "a")
+    manager.sync_claude_config()
+    with manager.config_store.transaction() as config:
+        config["installed_servers"]["a"]["env"] = {"TOKEN": "x"}
+    plan = manager.sync_claude_config()
+    assert plan.changed == ["a"]
+    assert claude_servers(manager)["a"]["env"] == {"TOKEN": "x"}
+
+
+def test_full_sync_removes_stale_entries_mcphub_added(manager):
+    write_claude(manager, {"by_hand": {"command": "uvx"}})
+    install(manager, "a", "b")
+    manager.sync_claude_config()
+
+    # Removed from config.yaml by hand, or by an uninstall whose Claude write failed
+    with manager.config_store.transaction() as config:
+        del config["installed_servers"]["b"]
+    plan = manager.sync_claude_config()
+    assert plan.removed == ["b"]
+    assert set(claude_servers(manager)) == {"a", "by_hand"}
+    assert manager.config_store.get()[OWNED_KEY] == ["a"]
+
+
+def test_partial_sync_does_not_remove_other_entries(manager):
+    install(manager, "a", "b")
+    manager.sync_claude_config()
+    with manager.config_store.transaction() as config:
+        del config["installed_servers"]["b"]
+    manager.update_claude_config("a", installed_server("a"))
+    assert set(claude_servers(manager)) == {"a", "b"}
@@ -0,0 +1,109 @@
+import os
+from pathlib import Path
+
+import pytest
+import yaml
+
+from mcphub.core.registry import MCPRegistry
+from mcphub.core.registry_shards import build_shards
+
+SERVERS = [
+    {"name": "Git MCP Server", "description": "Git operations", "repository": "https://example.com/git",
+     "version": "1.0.0", "tags": ["git"]},
+    {"name": "Atlas MCP Server", "description": "Task management", "repository": "https://example.com/atlas",
+     "version": "1.0.0", "tags": ["tasks"]},
+]
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    (tmp_path / "home").mkdir()
+
+
+def touch_later(path: Path):
+    """Move the mtime a few seconds on, as Last-Modified only has one second resolution"""
+    later = path.stat().st_mtime + 5
+    os.utime(path, (later, later))
+
+
+def write_servers(root: Path, servers):
+    path = root / "servers.yaml"
+    previous = path.stat().st_mtime if path.exists() else None
+    path.write_text(yaml.safe_dump({"servers": servers}))
+    if previous is not None:
+        os.utime(path, (previous, previous))
+        touch_later(path)
+
+
+def names(registry_data):
+    return sorted(server["name"] for server in registry_data["servers"])
+
+
+def test_fetch_and_revalidate(http_dir):
+    root, base, requests = http_dir
+    write_servers(root, SERVERS)
+    registry = MCPRegistry(base + "servers.yaml")
+    assert names(registry.fetch_registry()) == ["Atlas MCP Server", "Git MCP Server"]
+
+    # A fresh cache is served without a request
+    registry.fetch_registry()
+    assert len(requests) == 1
+
+    # A forced refresh revalidates and keeps the data on 304
+    assert names(registry.fetch_registry(force_refresh=True)) == ["Atlas MCP Server", "Git MCP Server"]
+    assert len(requests) == 2
+
+    write_servers(root, SERVERS[:1])
+    assert names(registry.fetch_registry(force_refresh=True)) == ["Git MCP Server"]
+
+
+def test_cache_survives_restarts(http_dir):
+    root, base, requests = http_dir
+    write_servers(root, SERVERS)
+    MCPRegistry(base + "servers.yaml").fetch_registry()
+    assert names(MCPRegistry(base + "servers.yaml").load_cached()) == ["Atlas MCP Server", "Git MCP Server"]
+
+
+def test_stale_cache_is_used_when_offline(http_dir):
+    root, base, _ = http_dir
+    write_servers(root, SERVERS)
+    registry = MCPRegistry(base + "servers.yaml")
+    registry.fetch_registry()
+    (root / "servers.yaml").unlink()
+    assert names(registry.fetch_registry(force_refresh=True)) == ["Atlas MCP Server", "Git MCP Server"]
+
+
+def test_cache_of_another_registry_is_never_used(http_dir):
+    root, base, _ = http_dir
+    write_servers(root, SERVERS)
+    MCPRegistry(base + "servers.yaml").fetch_registry()
+
+    other = MCPRegistry(base + "missing/servers.yaml")
+    assert other.load_cached() is None
+    assert other.fetch_registry() == {"servers": []}
+
+
+def test_sharded_registry_fetches_only_changed_shards(http_dir):
+    root, base, requests = http_dir
+    build_shards(SERVERS, root)
+    registry = MCPRegistry(base + "index.yaml")
+    assert names(registry.fetch_registry()) == ["Atlas MCP Server", "Git MCP Server"]
+    shard_requests = [path for path in requests if "shards/" in path]
+    assert len(shard_requests) == 2
+
+    changed = [dict(SERVERS[0], version="1.1.0"), SERVERS[1]]
+    build_shards(changed, root)
+    touch_later(root / "index.yaml")
+    requests.clear()
+    data = registry.fetch_registry(force_refresh=True)
+    assert {server["name"]: server["version"] for server in data["servers"]}["Git MCP Server"] == "1.1.0"
+    assert [path for path in requests if "shards/" in path] == ["/shards/g.yaml"]
+
+
+def test_search_and_lookup(http_dir):
+    root, base, _ = http_dir
+    write_servers(root, SERVERS)
+    registry = MCPRegistry(base + "servers.yaml")
+    assert [server["name"] for server in registry.search_servers("task")] == ["Atlas MCP Server"]
+    assert registry.get_server_metadata("git_mcp_server")["name"] == "Git MCP Server"
@@ -0,0 +1,47 @@
+from mcphub.core.search import SearchIndex
+
+SERVERS = [
+    {"name": "Git MCP Server", "description": "Git operations server for LLMs", "tags": ["git", "version-control"]},
+    {"name": "GitHub MCP Server", "description": "GitHub operations server for LLMs", "tags": ["github"]},
+    {"name": "Atlas MCP Server", "description": "Task management and organization server", "tags": ["task-management"]},
+]
+
+
+def names(results):
+    return [server["name"] for server in results]
+
+
+def test_empty_query_returns_everything():
+    assert names(SearchIndex(SERVERS).search("")) == names(SERVERS)
+
+
+def test_exact_match_ranks_first():
+    assert names(SearchIndex(SERVERS).search("git"))[0] == "Git MCP Server"
+
+
+def test_prefix_match():
+    assert names(SearchIndex(SERVERS).search("atl")) == ["Atlas MCP Server"]
+
+
+def test_mid_word_substring():
+    assert names(SearchIndex(SERVERS).search("ithu")) == ["GitHub MCP Server"]
+
+
+def test_short_terms_match_inside_words():
+    index = SearchIndex(SERVERS)
+    assert set(names(index.search("it"))) == {"Git MCP Server", "GitHub MCP Server"}
+    assert names(index.search("hu")) == ["GitHub MCP Server"]
+    assert names(index.search("x")) == []
+
+
+def test_every_term_must_match():
+    assert names(SearchIndex(SERVERS).search("git task")) == []
+    assert names(SearchIndex(SERVERS).search("github server")) == ["GitHub MCP Server"]
+
+
+def test_fuzzy_match():
+    assert names(SearchIndex(SERVERS).search("atlass")) == ["Atlas MCP Server"]
+
+
+def test_limit():
+    assert len(SearchIndex(SERVERS).search("server", limit=2)) == 2
@@ -0,0 +1,63 @@
+import json
+import sys
+from pathlib import Path
+
+from mcphub.core.supervisor import ProcessSpec
+
+
+def server_data(upstream):
+    return {"name": "Example Server", "repository": upstream.as_uri(), "version": "1.0.0",
+            "runtime": "custom", "command_args": ["server.py"], "default_config": {"env": {"TOKEN": "x"}}}
+
+
+def claude_servers(manager):
+    return json.loads(manager.claude_config_file.read_text()).get("mcpServers", {})
+
+
+def test_install_records_both_configs(manager, upstream):
+    assert manager.install_server(server_data(upstream))
+    installed = manager.load_config()["installed_servers"]
+    assert list(installed) == ["example_server"]
+    assert Path(installed["example_server"]["install_path"]).is_dir()
+    assert claude_servers(manager)["example_server"] == {
+        "command": "node", "args": ["server.py"], "env": {"TOKEN": "x"}
+    }
+
+
+def test_uninstall_removes_files_and_entries(manager, upstream):
+    assert manager.install_server(server_data(upstream))
+    server_dir = Path(manager.load_config()["installed_servers"]["example_server"]["install_path"])
+
+    assert manager.uninstall_server("example_server")
+    assert not server_dir.exists()
+    assert manager.load_config()["installed_servers"] == {}
+    assert "example_server" not in claude_servers(manager)
+
+
+def test_uninstall_of_unknown_server_changes_nothing(manager):
+    assert not manager.uninstall_server("missing")
+    manager.flush_config()
+    assert not manager.config_file.exists()
+
+
+def test_failed_uninstall_keeps_the_entry(manager, upstream, monkeypatch):
+    assert manager.install_server(server_data(upstream))
+
+    def fail(path):
+        raise OSError("busy")
+
+    monkeypatch.setattr("mcphub.core.server_manager.shutil.rmtree", fail)
+    assert not manager.uninstall_server("example_server")
+    assert "example_server" in manager.load_config()["installed_servers"]
+    assert "example_server" in claude_servers(manager)
+
+
+def test_uninstall_stops_the_running_server(manager, upstream):
+    assert manager.install_server(server_data(upstream))
+    fake_server = str(Path(__file__).parent / "fake_mcp_server.py")
+    assert manager.supervisor.start(ProcessSpec("example_server", [sys.executable, fake_server]))
+    popen = manager.supervisor.processes["example_server"].popen
+
+    assert manager.uninstall_server("example_server")
+    assert popen.poll() is not None
+    assert manager.server_status() == {}
@@ -0,0 +1,48 @@
+import json
+
+from mcphub.core.claude_config import ClaudeConfigFile
+from mcphub.core.slug import SlugIndex, claude_entry_updates, normalize_name, server_slug
+
+SERVERS = [
+    {"name": "Git MCP Server", "repository": "https://github.com/cyanheads/git-mcp-server.git"},
+    {"name": "GitHub MCP Server", "repository": "https://github.com/modelcontextprotocol/server-github",
+     "aliases": ["gh"]},
+]
+
+
+def test_server_slug_matches_earlier_releases():
+    assert server_slug("Git MCP Server") == "git_mcp_server"
+    # Repeated and surrounding spaces are kept as they always were
+    assert server_slug("Git  MCP ") == "git__mcp_"
+    assert server_slug("Tab\tName") == "tab\tname"
+
+
+def test_reinstall_replaces_entries_keyed_by_display_name(tmp_path):
+    # Written by an agent release that keyed entries by display name
+    config_file = ClaudeConfigFile(tmp_path / "claude_desktop_config.json")
+    config_file.path.write_text(json.dumps({"mcpServers": {
+        "Git MCP Server": {"command": "node", "args": ["old.js"]},
+        "other": {"command": "uvx"},
+    }}, indent=2))
+    config_file.patch_servers(claude_entry_updates("Git MCP Server", {"command": "node", "args": ["new.js"]}))
+    servers = json.loads(config_file.path.read_text())["mcpServers"]
+    assert servers == {"other": {"command": "uvx"}, "git_mcp_server": {"command": "node", "args": ["new.js"]}}
+
+
+def test_entry_updates_of_a_name_that_is_its_own_slug():
+    assert claude_entry_updates("git", {"command": "node"}) == {"git": {"command": "node"}}
+
+
+def test_normalize_name():
+    assert normalize_name("Git MCP Server") == normalize_name("git-mcp-server") == "git_mcp_server"
+
+
+def test_lookup_by_slug_name_and_alias():
+    index = SlugIndex(SERVERS)
+    assert len(index) == 2
+    assert index.get("git_mcp_server")["name"] == "Git MCP Server"
+    assert index.get("GitHub MCP Server")["name"] == "GitHub MCP Server"
+    assert index.get("gh")["name"] == "GitHub MCP Server"
+    assert index.get("server-github")["name"] == "GitHub MCP Server"
+    assert index.get("git-mcp-server")["name"] == "Git MCP Server"
+    assert "missing" not in index
@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+
+import pytest
+
+from mcphub.core.supervisor import ProcessSpec, ProcessSupervisor
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_crashed_process_is_restarted(tmp_path):
+    supervisor = ProcessSupervisor(tmp_path, initial_backoff=0.01, max_backoff=0.01, poll_interval=0.01)
+    supervisor.start(ProcessSpec("crasher", [sys.executable, "-c", "import sys; sys.exit(3)"]))
+    wait_for(lambda: supervisor.status("crasher")["crasher"]["restarts"] >= 2)
+    assert supervisor.status("crasher")["crasher"]["last_exit_code"] == 3
+    assert supervisor.stop("crasher")
+    assert supervisor.status("crasher") == {}
+
+
+def test_stdin_of_crashed_process_is_closed(tmp_path):
+    supervisor = ProcessSupervisor(tmp_path, initial_backoff=0.01, max_backoff=0.01, poll_interval=0.01)
+    supervisor.start(ProcessSpec("crasher", [sys.executable, "-c", "pass"]))
+    first = supervisor.processes["crasher"].popen
+    wait_for(lambda: supervisor.processes["crasher"].popen is not first)
+    assert first.stdin.closed
+    supervisor.stop("crasher")
+
+
+def test_stop_terminates_a_running_process(tmp_path):
+    supervisor = ProcessSupervisor(tmp_path)
+    supervisor.start(ProcessSpec("sleeper", [sys.executable, "-c", "import time; time.sleep(60)"]))
+    pid = supervisor.status("sleeper")["sleeper"]["pid"]
+    assert supervisor.stop("sleeper", timeout=5)
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
@@ -0,0 +1,39 @@
+from conftest import run_git
+from mcphub.core.updater import UpdateCandidate, UpdateEngine, is_newer, parse_version
+
+
+def server_data(upstream, version):
+    return {"name": "Example Server", "repository": upstream.as_uri(), "version": version,
+            "runtime": "custom", "command_args": ["server.py"]}
+
+
+def test_version_ordering():
+    assert is_newer("1.10.0", "1.9.0")
+    assert is_newer("1.0.0", "1.0.0-rc.1")
+    assert not is_newer("1.0", "1.0.0")
+    assert parse_version("v1.2") == parse_version("1.2.0")
+    assert not is_newer("latest", "1.0.0")
+
+
+def test_update_to_a_tagged_version(manager, upstream):
+    assert manager.install_server(server_data(upstream, "1.0.0"))
+    run_git(upstream, "tag", "v1.1.0")
+
+    engine = UpdateEngine(manager, registry=object())
+    [result] = engine.update([UpdateCandidate("example_server", "1.0.0", "1.1.0", server_data(upstream, "1.1.0"))])
+    assert result.success, result.error
+    config = manager.load_config()["installed_servers"]["example_server"]
+    assert config["version"] == "1.1.0"
+    assert config["commit"] == run_git(upstream, "rev-parse", "v1.1.0")
+
+
+def test_update_to_a_missing_version_is_rolled_back(manager, upstream):
+    assert manager.install_server(server_data(upstream, "1.0.0"))
+    before = manager.load_config()["installed_servers"]["example_server"]
+
+    engine = UpdateEngine(manager, registry=object())
+    [result] = engine.update([UpdateCandidate("example_server", "1.0.0", "2.0.0", server_data(upstream, "2.0.0"))])
+    assert not result.success
+    assert "2.0.0 not found" in result.error
+    assert manager.load_config()["installed_servers"]["example_server"] == before
+    assert before["commit"] == run_git(upstream, "rev-parse", "v1.0.0")
@@ -1,4 +1,5 @@
 const EXTENSION_ID = 'EXTENSION_ID_HERE'; // Replace with your extension ID after publishing
+const AGENT_URL = 'http://localhost:3004';
 
 export async function checkExtension() {
   try {
@@ -65,3 +66,61 @@ export async function uninstallServer(serverName: string) {
     throw new Error(`Failed to uninstall server: ${error.message}`);
   }
 }
+
+export type BatchOperation =
+  | { op: 'install'; server: any }
+  | { op: 'uninstall'; name: string }
+  | { op: 'patch'; name: string; entry: any | null };
+
+export interface BatchResult {
+  op: string;
+  name: string | null;
+  status: 'ok' | 'error' | 'not_found';
+  key?: string;
+  error?: string;
+  job_id?: string;
+  version?: string;
+}
+
+// Applies all operations with one config read and one config write, and reports each one
+export async function batch(operations: BatchOperation[]): Promise<BatchResult[]> {
+  try {
+    const response = await chrome.runtime.sendMessage(EXTENSION_ID, {
+      type: 'BATCH',
+      operations
+    });
+    if (!response.results) {
+      throw new Error(response.error);
+    }
+    return response.results;
+  } catch (error: any) {
+    throw new Error(`Failed to run batch: ${error.message}`);
+  }
+}
+
+export async function installServers(servers: any[]): Promise<BatchResult[]> {
+  return batch(servers.map((server) => ({ op: 'install' as const, server })));
+}
+
+export async function uninstallServers(serverNames: string[]): Promise<BatchResult[]> {
+  return batch(serverNames.map((name) => ({ op: 'uninstall' as const, name })));
+}
+
+export interface ConfigChange {
+  source: 'claude' | 'mcphub';
+  path: string;
+  added: Record<string, any>;
+  changed: Record<string, any>;
+  removed: string[];
+  timestamp: number;
+}
+
+// Calls onChange with a diff of the servers whenever a config file changes, so only those
+// servers need re-rendering. Returns a function that closes the subscription.
+export function subscribeConfigChanges(onChange: (change: ConfigChange) => void): () => void {
+  const events = new EventSource(`${AGENT_URL}/events`);
+  events.addEventListener('config', (event) => {
+    onChange(JSON.parse((event as MessageEvent).data));
+  });
+  return () => events.close();
+}